@@ -0,0 +1,282 @@
+"""
+End-to-end crawl benchmark against the local mock marketplace.
+
+    python -m bench.bench_crawl [--stages fetch,crawl,clean] [--queries 4] [--showrooms 4]
+                                [--pages 5] [--latency-ms 50] [--error-rate 0.01]
+                                [--burst-every 300] [--json out.json] [--baseline old.json]
+
+Two ``bench.mock_server`` instances (one per marketplace, so each gets its
+own host lane) run in a child process, so the numbers below only include
+crawler work:
+
+    fetch   ``IndiaMartFetcher`` / ``AlibabaFetcher.fetch_records`` driven
+            in-process over every listing URL (client-side latency)
+    crawl   ``python -m src.cli crawl`` end to end (server-side latency)
+    clean   ``python -m src.cli clean`` over the crawl output
+
+Each stage reports pages/sec, items/sec, p50/p99 latency, CPU seconds and
+peak RSS. ``--json`` writes them with the git commit for later comparison;
+``--baseline`` prints the relative change against an earlier JSON file.
+"""
+from __future__ import annotations
+import argparse, asyncio, json, multiprocessing as mp, os, platform, re, subprocess, sys, tempfile, time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.request import urlopen
+
+import yaml
+
+from bench.mock_server import MockConfig, MockMarketplace
+
+ROOT = Path(__file__).resolve().parent.parent
+STAGES = ("fetch", "crawl", "clean")
+
+try:
+    import resource
+except ImportError:  # Windows: no rusage, CPU/RSS are reported as null
+    resource = None
+
+
+# -------------------- mock servers --------------------
+
+def _serve(cfg: MockConfig, conn) -> None:
+    servers = [MockMarketplace(cfg).start() for _ in range(2)]
+    conn.send([s.base_url for s in servers])
+    conn.recv()  # block until the parent is done
+    for s in servers:
+        s.stop()
+
+
+def _server_stats(bases: List[str], reset: bool = False) -> dict:
+    out: Dict[str, object] = {"requests": 0, "by_status": {}}
+    for base in bases:
+        with urlopen(f"{base}/__reset" if reset else f"{base}/__stats") as r:
+            if reset:
+                continue
+            d = json.loads(r.read())
+        out["requests"] += sum(d["by_status"].values())
+        for k, v in d["by_status"].items():
+            out["by_status"][k] = out["by_status"].get(k, 0) + v
+        for k in ("service_ms_p50", "service_ms_p99"):
+            out[k] = max(out.get(k) or 0, d[k] or 0)
+    return out
+
+
+# -------------------- measurement helpers --------------------
+
+def _pct(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    v = sorted(values)
+    return round(v[min(len(v) - 1, int(q * len(v)))], 2)
+
+
+def _rss_mb(ru) -> Optional[float]:
+    if ru is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(ru.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def _report(pages: int, items: int, seconds: float, cpu: Optional[float], rss: Optional[float],
+            latencies: Optional[List[float]] = None, server: Optional[dict] = None) -> dict:
+    r = {"pages": pages, "items": items, "seconds": round(seconds, 3),
+         "pages_per_sec": round(pages / seconds, 2) if seconds else None,
+         "items_per_sec": round(items / seconds, 1) if seconds else None,
+         "cpu_seconds": round(cpu, 3) if cpu is not None else None, "peak_rss_mb": rss}
+    if latencies is not None:
+        r["latency_ms_p50"], r["latency_ms_p99"] = _pct(latencies, 0.50), _pct(latencies, 0.99)
+    elif server is not None:
+        r["latency_ms_p50"], r["latency_ms_p99"] = server.get("service_ms_p50"), server.get("service_ms_p99")
+    if server is not None:
+        r["server"] = server
+    return r
+
+
+def _run_cli(args: List[str], env: dict):
+    """Run ``python -m src.cli ...``; returns (stdout, seconds, cpu_seconds, peak_rss_mb)."""
+    t0 = time.perf_counter()
+    p = subprocess.Popen([sys.executable, "-m", "src.cli", *args], cwd=ROOT, env=env,
+                         stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    out = p.stdout.read()
+    ru = None
+    if hasattr(os, "wait4"):
+        _, status, ru = os.wait4(p.pid, 0)
+        p.returncode = os.waitstatus_to_exitcode(status)
+    else:
+        p.wait()
+    dt = time.perf_counter() - t0
+    if p.returncode != 0:
+        raise RuntimeError(f"src.cli {args[0]} failed ({p.returncode}):\n{out}")
+    return out, dt, (ru.ru_utime + ru.ru_stime) if ru else None, _rss_mb(ru)
+
+
+def _settings(bases: List[str], args) -> dict:
+    return {
+        "concurrency_per_domain": args.concurrency,
+        "timeout_seconds": 20,
+        "max_retries": 4,
+        "cache": {"mode": "off"},
+        "rate_limit": {"initial_rps": args.rps, "max_rps": args.max_rps, "increase": 1.0,
+                       "base_backoff": 0.5, "max_backoff": 5},
+        "respect_robots": True,
+        "parser_backend": args.backend,
+        "indiamart_search_url": f"{bases[0]}/search.mp",
+    }
+
+
+def _listing_urls(bases: List[str], args, ind) -> List[tuple]:
+    urls = []
+    for i in range(args.queries):
+        for pg in range(1, args.pages + 1):
+            urls.append(("indiamart", ind._build_search_url(f"query {i}", pg), f"query {i}"))
+    for i in range(args.showrooms):
+        for pg in range(1, args.pages + 1):
+            urls.append(("alibaba", f"{bases[1]}/showroom/cat-{i}.html?page={pg}", f"cat-{i}"))
+    return urls
+
+
+# -------------------- stages --------------------
+
+async def _fetch_stage(bases: List[str], args) -> dict:
+    from src.common.http import HttpSession
+    from src.sites.alibaba import AlibabaFetcher
+    from src.sites.indiamart import IndiaMartFetcher
+
+    st = _settings(bases, args)
+    latencies: List[float] = []
+    pages = items = 0
+    async with HttpSession(st) as session:
+        fetchers = {"indiamart": IndiaMartFetcher(st, session=session),
+                    "alibaba": AlibabaFetcher(st, session=session)}
+        sem = asyncio.Semaphore(args.concurrency * 2)
+
+        async def one(site, url, label):
+            nonlocal pages, items
+            async with sem:
+                t0 = time.perf_counter()
+                got = await fetchers[site].fetch_records(session, url, label)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                pages += 1
+                items += len(got)
+
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        await asyncio.gather(*(one(*u) for u in _listing_urls(bases, args, fetchers["indiamart"])))
+        dt, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    ru = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+    return _report(pages, items, dt, cpu, _rss_mb(ru), latencies=latencies, server=_server_stats(bases))
+
+
+def _crawl_stage(bases: List[str], args, tmp: Path, env: dict) -> dict:
+    (tmp / "settings.yaml").write_text(yaml.safe_dump(_settings(bases, args)))
+    cats = [{"slug": f"cat-{i}",
+             "indiamart": {"search_queries": [f"query {i}"] if i < args.queries else []},
+             "alibaba": {"showroom_urls": [f"{bases[1]}/showroom/cat-{i}.html"] if i < args.showrooms else []}}
+            for i in range(max(args.queries, args.showrooms))]
+    (tmp / "categories.yaml").write_text(yaml.safe_dump({"categories": cats}))
+    out, dt, cpu, rss = _run_cli([
+        "crawl", "--site", "both", "--settings-cfg", str(tmp / "settings.yaml"),
+        "--categories-cfg", str(tmp / "categories.yaml"), "--out", str(tmp / "raw.jsonl"),
+        "--max-pages", str(args.pages), "--frontier", str(tmp / "frontier.sqlite"),
+        "--checkpoint-interval", "0", "--parse-workers", str(args.parse_workers),
+        *(["--enrich"] if args.enrich else []),
+    ], env)
+    m = re.search(r"\((\d+) items from (\d+) pages", out)
+    items, pages = (int(m.group(1)), int(m.group(2))) if m else (0, 0)
+    return _report(pages, items, dt, cpu, rss, server=_server_stats(bases))
+
+
+def _clean_stage(tmp: Path, env: dict) -> dict:
+    raw = tmp / "raw.jsonl"
+    if not raw.exists():
+        raise RuntimeError("clean stage needs the crawl stage's output")
+    rows = sum(1 for _ in raw.open("rb"))
+    _, dt, cpu, rss = _run_cli(["clean", "--inp", str(raw), "--out", str(tmp / "clean.csv")], env)
+    return _report(0, rows, dt, cpu, rss)
+
+
+# -------------------- driver --------------------
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(results: dict, baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    print(f"\nvs. baseline {base.get('meta', {}).get('commit')} ({baseline_path}):")
+    for stage, r in results["stages"].items():
+        b = base.get("stages", {}).get(stage)
+        if not b:
+            continue
+        parts = []
+        for k in ("pages_per_sec", "items_per_sec", "latency_ms_p99", "cpu_seconds", "peak_rss_mb"):
+            if r.get(k) and b.get(k):
+                parts.append(f"{k} {100 * (r[k] - b[k]) / b[k]:+.1f}%")
+        print(f"  {stage:6s} " + ", ".join(parts))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--queries", type=int, default=4, help="IndiaMART search queries")
+    ap.add_argument("--showrooms", type=int, default=4, help="Alibaba showrooms")
+    ap.add_argument("--pages", type=int, default=5, help="listing pages per query/showroom")
+    ap.add_argument("--concurrency", type=int, default=4, help="workers per host")
+    ap.add_argument("--rps", type=float, default=20.0, help="initial requests/sec per host")
+    ap.add_argument("--max-rps", type=float, default=200.0)
+    ap.add_argument("--parse-workers", type=int, default=0)
+    ap.add_argument("--backend", default="auto", help="parser backend (auto = settings default)")
+    ap.add_argument("--enrich", action="store_true", help="also fetch detail pages in the crawl stage")
+    for field, default in vars(MockConfig()).items():
+        ap.add_argument(f"--{field.replace('_', '-')}", type=type(default), default=default)
+    ap.add_argument("--json", dest="json_out", default=None)
+    ap.add_argument("--baseline", default=None, help="earlier --json output to compare against")
+    args = ap.parse_args()
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        ap.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    cfg = MockConfig(**{k: getattr(args, k) for k in vars(MockConfig())})
+    parent, child = mp.Pipe()
+    server = mp.Process(target=_serve, args=(cfg, child), daemon=True)
+    server.start()
+    bases = parent.recv()
+    results = {"meta": {"commit": _git_commit(), "python": platform.python_version(),
+                        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "args": {k: v for k, v in vars(args).items() if k not in ("json_out", "baseline")}},
+               "stages": {}}
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-crawl-") as d:
+            tmp = Path(d)
+            env = {**os.environ, "DATA_DIR": str(tmp / "data"), "ART_DIR": str(tmp / "artifacts")}
+            for stage in stages:
+                _server_stats(bases, reset=True)
+                if stage == "fetch":
+                    r = asyncio.run(_fetch_stage(bases, args))
+                elif stage == "crawl":
+                    r = _crawl_stage(bases, args, tmp, env)
+                else:
+                    r = _clean_stage(tmp, env)
+                results["stages"][stage] = r
+                lat = f"p50 {r.get('latency_ms_p50')} / p99 {r.get('latency_ms_p99')} ms" if "latency_ms_p50" in r else ""
+                print(f"{stage:6s} {r['pages']:>5d} pages {r['items']:>7d} items in {r['seconds']:>7.2f}s  "
+                      f"{r['pages_per_sec'] or 0:>7.1f} pages/s {r['items_per_sec'] or 0:>9.1f} items/s  "
+                      f"cpu {r['cpu_seconds']}s rss {r['peak_rss_mb']} MB  {lat}")
+    finally:
+        parent.send("stop")
+        server.join(timeout=5)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        _compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
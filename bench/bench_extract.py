@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: listing extraction throughput (pages/sec) per backend.
+
+    python -m bench.bench_extract [--rounds 20] [--json out.json]
+
+``legacy`` is the previous per-anchor approach (serialise each anchor and
+re-parse it with a fresh Selector); it is kept here only as the baseline.
+It reads href and title only, while the backends read all six fields.
+
+Each site's pages come from ``bench/fixtures/<site>_*.html`` captures when
+present, else from the synthetic generator; the output says which, since
+synthetic pages say nothing about how the selectors fare on live markup.
+
+Before timing anything, every page is extracted with each installed
+backend and the run aborts if their records or next links differ, since
+``parser_backend: auto`` picks whichever one is installed.
+"""
+from __future__ import annotations
+import argparse, json, time
+
+from bench.fixtures import load_sources
+from src.sites.extract import BACKENDS, SPECS, extract_listing, extract_page
+
+
+def legacy_extract(html: str, site: str) -> list:
+    from parsel import Selector
+    out = []
+    for a_html in Selector(html).css(SPECS[site].link).getall():
+        s = Selector(text=a_html)
+        href = s.css("a::attr(href)").get()
+        title = s.css("a::attr(title), a::text").get()
+        if href:
+            out.append({"product_page_url": href, "title": (title or "").strip() or None})
+    return out
+
+
+def check_parity(site: str, pages) -> None:
+    # same records (and next link) from every installed backend, page by page
+    for i, html in enumerate(pages):
+        ref_backend, ref = None, None
+        for backend in BACKENDS:
+            try:
+                got = extract_page(html, site, backend)
+            except ImportError:
+                continue
+            if ref_backend is None:
+                ref_backend, ref = backend, got
+            elif got != ref:
+                diff = next((f"record {n}: {a} != {b}" for n, (a, b) in enumerate(zip(ref[0], got[0])) if a != b),
+                            f"{len(ref[0])} vs {len(got[0])} records, next {ref[1]!r} vs {got[1]!r}")
+                raise SystemExit(f"{site} page {i}: {ref_backend} and {backend} disagree, {diff}")
+
+
+def _bench(fn, pages, rounds: int) -> dict:
+    n_pages = n_items = 0
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for html in pages:
+            n_items += len(fn(html))
+            n_pages += 1
+    dt = time.perf_counter() - t0
+    return {"pages": n_pages, "seconds": round(dt, 4), "pages_per_sec": round(n_pages / dt, 1),
+            "items_per_page": n_items // max(1, n_pages)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rounds", type=int, default=20)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    results, sources = {}, {}
+    for site, (source, pages) in load_sources().items():
+        sources[site] = f"{len(pages)} {source} pages"
+        check_parity(site, pages)
+        results[site] = {"legacy": _bench(lambda h: legacy_extract(h, site), pages, args.rounds)}
+        for backend in BACKENDS:
+            try:
+                results[site][backend] = _bench(lambda h: extract_listing(h, site, backend), pages, args.rounds)
+            except ImportError as e:
+                results[site][backend] = {"error": str(e)}
+    for site, by_backend in results.items():
+        print(f"{site}: {sources[site]}")
+        for backend, r in by_backend.items():
+            print(f"{site:10s} {backend:11s} " + (f"{r['pages_per_sec']:>8.1f} pages/s  "
+                  f"({r['items_per_page']} items/page)" if "error" not in r else r["error"]))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({site: {"source": sources[site], **r} for site, r in results.items()}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: vectorized price normalization vs. the previous row-wise path.
+
+    python -m bench.bench_prices [--n 1000000] [--legacy-n N] [--json out.json]
+
+``rowwise`` is the old ``eda_report._norm_price`` applied with
+``df.apply(axis=1)``; it is timed on ``--legacy-n`` rows (default: all of
+them, which takes a while) and reported as rows/sec so both are comparable.
+"""
+from __future__ import annotations
+import argparse, json, random, time
+
+import numpy as np
+import pandas as pd
+
+from src.common.prices import normalize_prices
+
+
+def legacy_norm_price(row):
+    lo = row.get("price_min")
+    hi = row.get("price_max")
+    if pd.isna(lo) and pd.isna(hi) and isinstance(row.get("price_text"), str):
+        import re
+        nums = re.findall(r"[0-9]+(?:[.,][0-9]+)*", row["price_text"])
+        nums = [x.replace(",", "") for x in nums]
+        if nums:
+            nums = list(map(float, nums))
+            lo = min(nums)
+            hi = max(nums)
+    return pd.Series({"price_lo": lo, "price_hi": hi})
+
+
+def synthetic_prices(n: int, seed: int = 7) -> pd.Series:
+    rng = random.Random(seed)
+    templates = [
+        lambda: f"₹ {rng.randint(1, 9)},{rng.randint(10, 99)},{rng.randint(100, 999)} / Piece",
+        lambda: f"US${rng.randint(10, 5000)}.00-{rng.randint(5000, 9000)}.00",
+        lambda: f"${rng.randint(1, 99)} - ${rng.randint(100, 999)}",
+        lambda: f"Rs. {rng.randint(100, 9999)}/Kg",
+        lambda: f"{rng.randint(1, 50)} to {rng.randint(51, 99)} USD per Set",
+        lambda: "Price on request",
+        lambda: None,
+    ]
+    # ~1 distinct string per 4 rows; real crawls repeat prices far more often
+    pool = [rng.choice(templates)() for _ in range(max(1, n // 4))]
+    idx = np.random.default_rng(seed).integers(0, len(pool), size=n)
+    return pd.Series([pool[i] for i in idx], dtype="object")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--legacy-n", type=int, default=None)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    s = synthetic_prices(args.n)
+    t0 = time.perf_counter()
+    normalize_prices(s)
+    vec = time.perf_counter() - t0
+
+    m = args.legacy_n or args.n
+    df = pd.DataFrame({"price_text": s.iloc[:m], "price_min": np.nan, "price_max": np.nan})
+    t0 = time.perf_counter()
+    df.apply(legacy_norm_price, axis=1)
+    row = time.perf_counter() - t0
+
+    res = {
+        "vectorized": {"rows": args.n, "seconds": round(vec, 3), "rows_per_sec": round(args.n / vec)},
+        "rowwise": {"rows": m, "seconds": round(row, 3), "rows_per_sec": round(m / row)},
+    }
+    res["speedup"] = round(res["vectorized"]["rows_per_sec"] / res["rowwise"]["rows_per_sec"], 1)
+    for k in ("vectorized", "rowwise"):
+        print(f"{k:10s} {res[k]['rows']:>9d} rows  {res[k]['seconds']:>8.3f}s  {res[k]['rows_per_sec']:>10d} rows/s")
+    print(f"speedup    {res['speedup']}x")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Deterministic synthetic listing pages shaped like IndiaMART search results
+and Alibaba showrooms. Used by the benchmarks when no recorded pages are
+present in ``bench/fixtures/``.
+
+The synthetic tiles use the class names ``src/sites/extract.py`` looks for,
+so they measure parser speed, not whether the selectors still match the
+live sites. For that, capture real pages (through the crawler's session,
+headers and robots.txt check) and the benchmarks pick them up:
+
+    python -m bench.fixtures --site indiamart "https://dir.indiamart.com/search.mp?ss=cnc+machine"
+    python -m bench.fixtures --site alibaba "https://www.alibaba.com/showroom/cnc-machine.html"
+"""
+from __future__ import annotations
+import argparse, random, re
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+
+_WORDS = ["CNC", "Lathe", "Conveyor", "Belt", "Automatic", "Industrial", "Power", "Loom",
+          "Knitting", "SMT", "Pick", "Place", "PCB", "Printer", "Hydraulic", "Press"]
+_CITIES = ["Ahmedabad", "Rajkot", "Pune", "Coimbatore", "Ludhiana", "Delhi", "Mumbai"]
+_COUNTRIES = ["CN", "IN", "VN", "TR", "US"]
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 6)))
+
+
+def _noise(rng: random.Random, n: int) -> str:
+    # navigation / script-ish filler so pages are realistically heavy
+    return "".join(
+        f'<div class="nav-item"><a href="/cat/{rng.randint(1, 10**6)}">{_title(rng)}</a>'
+        f'<span class="badge">{rng.randint(1, 99)}</span></div>'
+        for _ in range(n)
+    )
+
+
+def indiamart_page(n_tiles: int = 120, seed: int = 1, page: int = 1) -> str:
+    rng = random.Random(seed * 1000 + page)
+    tiles = []
+    for i in range(n_tiles):
+        pid = rng.randint(10**9, 10**10)
+        price = f"₹ {rng.randint(1, 9)},{rng.randint(10, 99)},{rng.randint(100, 999)}"
+        tiles.append(
+            f'<div class="card"><div class="prd-img"><img src="/img/{pid}.jpg"></div>'
+            f'<a class="prd-name" href="https://www.indiamart.com/proddetail/item-{pid}.html">{_title(rng)}</a>'
+            f'<p class="prc">{price} <span class="unit">/ Piece</span></p>'
+            f'<span class="moq">MOQ: {rng.randint(1, 50)} Piece</span>'
+            f'<div class="companyname"><a href="/comp/{pid}">{_title(rng)} Pvt Ltd</a></div>'
+            f'<span class="newLocationUi">{rng.choice(_CITIES)}, India</span></div>'
+        )
+    nxt = f'<a class="next" rel="next" href="/search.mp?ss=q&amp;pg={page + 1}">Next</a>'
+    return (f"<html><head><title>search</title></head><body>{_noise(rng, 200)}"
+            f'<div id="results">{"".join(tiles)}</div>{nxt}{_noise(rng, 100)}</body></html>')
+
+
+def alibaba_page(n_tiles: int = 120, seed: int = 1, page: int = 1) -> str:
+    rng = random.Random(seed * 7919 + page)
+    tiles = []
+    for i in range(n_tiles):
+        pid = rng.randint(10**11, 10**12)
+        lo = rng.randint(100, 5000)
+        tiles.append(
+            f'<div class="organic-list-offer-outter"><div class="offer-img"><img src="/i/{pid}.jpg"></div>'
+            f'<a href="https://www.alibaba.com/product-detail/item_{pid}.html" title="{_title(rng)}">'
+            f"<h2>{_title(rng)}</h2></a>"
+            f'<div class="elements-offer-price-normal">US${lo}.00-{lo * 2}.00</div>'
+            f'<div class="element-offer-minorder-normal">Min. order: {rng.randint(1, 10)} set</div>'
+            f'<a class="organic-gallery-offer__seller-company" href="/s/{pid}">{_title(rng)} Co., Ltd.</a>'
+            f'<span class="seller-tag__country">{rng.choice(_COUNTRIES)}</span></div>'
+        )
+    nxt = f'<a class="next" rel="next" href="?page={page + 1}">Next</a>'
+    return (f"<html><body>{_noise(rng, 250)}<div class=\"list\">{''.join(tiles)}</div>"
+            f"{nxt}{_noise(rng, 100)}</body></html>")
+
+
+GENERATORS = {"indiamart": indiamart_page, "alibaba": alibaba_page}
+
+
+def detail_page(site: str, pid: str) -> str:
+    """Product detail page with schema.org JSON-LD, as both marketplaces embed."""
+    import json
+    rng = random.Random(f"{site}:{pid}")
+    lo = rng.randint(100, 5000)
+    cur = "INR" if site == "indiamart" else "USD"
+    ld = {"@context": "https://schema.org", "@type": "Product", "name": _title(rng),
+          "image": [f"/img/{pid}_{i}.jpg" for i in range(rng.randint(1, 5))],
+          "offers": {"@type": "AggregateOffer", "lowPrice": lo, "highPrice": lo * 2, "priceCurrency": cur,
+                     "seller": {"@type": "Organization", "name": f"{_title(rng)} Co."}},
+          "aggregateRating": {"ratingValue": round(rng.uniform(3, 5), 1), "reviewCount": rng.randint(0, 500)}}
+    return (f'<html><head><script type="application/ld+json">{json.dumps(ld)}</script></head>'
+            f"<body>{_noise(rng, 150)}<div class=\"min-order\">Min. order: {rng.randint(1, 20)} Piece</div>"
+            f'<div class="location">{rng.choice(_CITIES)}</div><span class="years">{rng.randint(1, 20)} yrs</span>'
+            f"</body></html>")
+
+
+def load_pages() -> Dict[str, List[str]]:
+    """Recorded pages from ``FIXTURE_DIR`` by site prefix, else synthetic ones."""
+    return {site: pages for site, (_, pages) in load_sources().items()}
+
+
+def load_sources() -> Dict[str, Tuple[str, List[str]]]:
+    """Like ``load_pages``, with each site's source: ``"recorded"`` or ``"synthetic"``."""
+    out: Dict[str, Tuple[str, List[str]]] = {}
+    for site, gen in GENERATORS.items():
+        recorded = sorted(FIXTURE_DIR.glob(f"{site}_*.html"))
+        if recorded:
+            out[site] = ("recorded", [p.read_text(encoding="utf-8", errors="replace") for p in recorded])
+        else:
+            out[site] = ("synthetic", [gen(seed=s) for s in range(1, 4)])
+    return out
+
+
+def capture(site: str, urls: List[str], settings_cfg: str = "configs/settings.yaml") -> List[Path]:
+    """Fetch live listing pages into ``FIXTURE_DIR/<site>_<slug>.html``."""
+    import asyncio
+    from src.sites.alibaba import AlibabaFetcher
+    from src.sites.indiamart import IndiaMartFetcher
+
+    fetcher = {"indiamart": IndiaMartFetcher, "alibaba": AlibabaFetcher}[site](settings_cfg)
+
+    async def run() -> List[Path]:
+        saved = []
+        async with fetcher._session() as session:
+            for url in urls:
+                html = await fetcher.fetch_html(session, url)
+                if not html:
+                    continue
+                slug = re.sub(r"[^A-Za-z0-9]+", "-", url.split("://", 1)[-1]).strip("-")[:80]
+                path = FIXTURE_DIR / f"{site}_{slug}.html"
+                FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+                path.write_text(html, encoding="utf-8")
+                saved.append(path)
+        return saved
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Capture live listing pages as benchmark fixtures.")
+    ap.add_argument("--site", required=True, choices=sorted(GENERATORS))
+    ap.add_argument("--settings-cfg", default="configs/settings.yaml")
+    ap.add_argument("urls", nargs="+")
+    args = ap.parse_args()
+    from src.sites.extract import extract_listing
+    for path in capture(args.site, args.urls, args.settings_cfg):
+        html = path.read_text(encoding="utf-8")
+        print(f"{path.name}: {len(html) // 1024} KiB, {len(extract_listing(html, args.site))} products extracted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Startup budget: import time of ``crawl --help``, of the crawl pipeline and
+of the FastAPI app.
+
+    python -m bench.importtime_budget [--repeat 3] [--budget crawl-help=400] [--top 8] [--json out.json]
+
+Each target runs in a fresh interpreter under ``python -X importtime``; the
+sum of the top-level cumulative import times (best of ``--repeat`` runs) is
+checked against the target's budget in ms. Every target also lists heavy
+modules it must not load at startup (they belong inside the command or
+endpoint that needs them), since one stray top-level import can stay under
+a generous time budget on a fast machine. Exits 1 when a target is over
+budget, loads a forbidden module or fails to run, so CI can call it as is.
+"""
+from __future__ import annotations
+import argparse, json, os, re, subprocess, sys, tempfile
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "numpy", "pyarrow", "matplotlib", "parsel", "selectolax", "httpx", "zstandard")
+
+TARGETS: Dict[str, dict] = {
+    "crawl-help": {"argv": ["-m", "src.cli", "crawl", "--help"], "budget_ms": 400,
+                   "forbidden": HEAVY + ("pydantic", "orjson", "yaml")},
+    # what a crawl run loads: the HTTP stack and parsers, but not clean's numpy or the pydantic models
+    "crawl": {"argv": ["-c", "import src.pipelines.crawl"], "budget_ms": 1000,
+              "forbidden": ("pandas", "numpy", "pyarrow", "matplotlib", "pydantic", "orjson")},
+    # fastapi itself needs pydantic; everything else waits for the first request that uses it
+    "api": {"argv": ["-c", "import src.api"], "budget_ms": 1500, "forbidden": HEAVY},
+}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    """Total ms of the top-level imports, ``(ms, module)`` per top-level import, and every module name."""
+    top, names = [], []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        names.append(m.group(4))
+        if len(m.group(3)) == 1:  # nested imports are indented by two more spaces per level
+            top.append((int(m.group(2)) / 1000, m.group(4)))
+    return sum(ms for ms, _ in top), top, names
+
+
+def measure(argv: List[str], data_dir: str) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    # DATA_DIR keeps src.paths from creating data/ in the checkout
+    env = dict(os.environ, DATA_DIR=data_dir, ART_DIR=os.path.join(data_dir, "artifacts"),
+               PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    p = subprocess.run([sys.executable, "-X", "importtime", *argv], cwd=ROOT, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if p.returncode != 0:
+        tail = "\n".join(l for l in p.stderr.splitlines() if not l.startswith("import time:"))[-2000:]
+        raise RuntimeError(f"exit {p.returncode}: {tail}")
+    return parse_importtime(p.stderr)
+
+
+def check(name: str, target: dict, repeat: int, top_n: int, data_dir: str) -> dict:
+    try:
+        runs = [measure(target["argv"], data_dir) for _ in range(max(1, repeat))]
+    except RuntimeError as e:
+        return {"target": name, "ok": False, "error": str(e)}
+    total, top, names = min(runs, key=lambda r: r[0])
+    loaded = sorted({n.split(".")[0] for n in names} & set(target["forbidden"]))
+    return {
+        "target": name, "ms": round(total, 1), "budget_ms": target["budget_ms"], "forbidden_loaded": loaded,
+        "ok": total <= target["budget_ms"] and not loaded,
+        "top": [{"module": m, "ms": round(ms, 1)} for ms, m in sorted(top, reverse=True)[:top_n]],
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=3, help="runs per target; the fastest counts")
+    ap.add_argument("--budget", action="append", default=[], metavar="TARGET=MS", help="override a budget")
+    ap.add_argument("--only", action="append", choices=sorted(TARGETS), help="check just these targets")
+    ap.add_argument("--top", type=int, default=8, help="slowest top-level imports to list")
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    targets = {k: dict(v) for k, v in TARGETS.items() if not args.only or k in args.only}
+    for spec in args.budget:
+        name, _, ms = spec.partition("=")
+        if name not in targets or not ms:
+            ap.error(f"--budget expects TARGET=MS with TARGET in {', '.join(targets)}")
+        targets[name]["budget_ms"] = float(ms)
+
+    with tempfile.TemporaryDirectory(prefix="importtime-") as data_dir:
+        results = [check(name, t, args.repeat, args.top, data_dir) for name, t in targets.items()]
+    for r in results:
+        if "error" in r:
+            print(f"{r['target']:11s} FAIL  {r['error']}")
+            continue
+        print(f"{r['target']:11s} {'ok  ' if r['ok'] else 'FAIL'}  {r['ms']:>7.1f} ms  (budget {r['budget_ms']:g} ms)")
+        if r["forbidden_loaded"]:
+            print(f"{'':11s}       loads at startup: {', '.join(r['forbidden_loaded'])}")
+        for t in r["top"]:
+            print(f"{'':11s} {t['ms']:>13.1f} ms  {t['module']}")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Local stand-in for IndiaMART / Alibaba used by the crawl benchmarks.
+
+    python -m bench.mock_server [--port 8765] [--latency-ms 50] [--error-rate 0.01]
+                                [--burst-every 300 --burst-len 10]
+
+Routes (all pages deterministic per URL):
+
+    /search.mp?ss=<q>&pg=<n>      IndiaMART-style search results
+    /showroom/<slug>.html?page=n  Alibaba-style showroom
+    /proddetail/<id>.html         IndiaMART product detail page
+    /product-detail/<id>.html     Alibaba product detail page
+    /robots.txt                   allows everything
+    /__stats                      JSON: request counts and service latency
+    /__reset                      clear the stats (between benchmark stages)
+
+Recorded ``<site>_*.html`` pages in ``bench/fixtures/`` are served in
+rotation instead of synthetic listings when present. Product links are
+rewritten to point back at this server (and made unique per page, so a
+recorded page reused for page 3 doesn't look like a repeat of page 1).
+Every listing page up to ``max_pages`` carries a ``rel="next"`` link to the
+following page of the same query/showroom; the last one has none.
+
+Fault injection: every response waits ``latency`` +/- ``jitter`` ms, a
+fraction ``error_rate`` of listing/detail requests get a 500, and after
+every ``burst_every`` requests the next ``burst_len`` get a 429 with
+``Retry-After: 1``.
+"""
+from __future__ import annotations
+import argparse, json, random, re, threading, time, zlib
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, quote_plus, urlsplit
+
+from bench.fixtures import FIXTURE_DIR, detail_page, alibaba_page, indiamart_page
+
+_LIVE_HOSTS = re.compile(r"https?://(?:www\.|dir\.)?(?:indiamart|alibaba)\.com")
+_NEXT_LINK = re.compile(r"<a[^>]*\brel=\"next\"[^>]*>.*?</a>", re.S)
+_PRODUCT_LINK = re.compile(r"(/(?:proddetail|product-detail)/[^\"'?#]*?)(\.html)")
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    error_rate: float = 0.0
+    burst_every: int = 0          # 0 = no 429 bursts
+    burst_len: int = 5
+    tiles: int = 60               # products per synthetic listing page
+    max_pages: int = 50           # listing pages past this come back empty
+    seed: int = 1
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.by_status: dict = {}
+        self.service_ms: List[float] = []
+
+    def add(self, status: int, ms: float) -> None:
+        with self.lock:
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+            self.service_ms.append(ms)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.by_status, self.service_ms = {}, []
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            lat = sorted(self.service_ms)
+        pct = (lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))], 2)) if lat else (lambda q: None)
+        return {"requests": self.requests, "by_status": {str(k): v for k, v in sorted(self.by_status.items())},
+                "service_ms_p50": pct(0.50), "service_ms_p99": pct(0.99)}
+
+
+def _recorded(site: str) -> List[str]:
+    return [p.read_text(encoding="utf-8", errors="replace") for p in sorted(FIXTURE_DIR.glob(f"{site}_*.html"))]
+
+
+class MockMarketplace:
+    """Threaded HTTP server; ``start()`` serves in a background thread."""
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self.stats = _Stats()
+        self._rng = random.Random(self.config.seed)
+        self._recorded = {"indiamart": _recorded("indiamart"), "alibaba": _recorded("alibaba")}
+        self._pages: dict = {}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockMarketplace":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockMarketplace":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---- content ----
+    def _listing(self, site: str, key: str, page: int) -> str:
+        # generated once per URL so the server's own CPU stays out of the way
+        k = (site, key, page)
+        if k not in self._pages:
+            self._pages[k] = self._render(site, key, page)
+        return self._pages[k]
+
+    def _render(self, site: str, key: str, page: int) -> str:
+        if page > self.config.max_pages:
+            return "<html><body><div class='list'></div></body></html>"
+        rec = self._recorded[site]
+        if rec:
+            html = rec[(zlib.crc32(key.encode()) + page) % len(rec)]
+        else:
+            gen = indiamart_page if site == "indiamart" else alibaba_page
+            html = gen(n_tiles=self.config.tiles, seed=zlib.crc32(key.encode()) % 10_000, page=page)
+        if rec and page > 1:
+            html = _PRODUCT_LINK.sub(rf"\1-p{page}\2", html)
+        if page < self.config.max_pages:
+            href = (f"/search.mp?ss={quote_plus(key)}&amp;pg={page + 1}" if site == "indiamart"
+                    else f"{key}?page={page + 1}")
+            nxt = f'<a class="next" rel="next" href="{href}">Next</a>'
+        else:
+            nxt = ""
+        html = _NEXT_LINK.sub(lambda m: nxt, html, count=1) if _NEXT_LINK.search(html) else html + nxt
+        return _LIVE_HOSTS.sub(self.base_url, html)
+
+    def _fault(self) -> Optional[int]:
+        cfg = self.config
+        with self.stats.lock:
+            self.stats.requests += 1
+            n = self.stats.requests
+            roll = self._rng.random()
+        if cfg.burst_every and n > cfg.burst_every and (n - 1) % cfg.burst_every < cfg.burst_len:
+            return 429
+        if roll < cfg.error_rate:
+            return 500
+        return None
+
+    def _respond(self, path: str, query: dict):
+        """(status, content_type, body, headers) for one request."""
+        if path == "/robots.txt":
+            return 200, "text/plain", b"User-agent: *\nAllow: /\n", {}
+        if path == "/__stats":
+            return 200, "application/json", json.dumps(self.stats.as_dict()).encode(), {}
+        if path == "/__reset":
+            self.stats.reset()
+            return 200, "text/plain", b"ok", {}
+        fault = self._fault()
+        if fault == 429:
+            return 429, "text/plain", b"slow down", {"Retry-After": "1"}
+        if fault:
+            return fault, "text/plain", b"error", {}
+        if path == "/search.mp":
+            q = (query.get("ss") or [""])[0]
+            return 200, "text/html", self._listing("indiamart", q, int((query.get("pg") or ["1"])[0])).encode(), {}
+        if path.startswith("/showroom/"):
+            page = int((query.get("page") or ["1"])[0])
+            return 200, "text/html", self._listing("alibaba", path, page).encode(), {}
+        for prefix, site in (("/proddetail/", "indiamart"), ("/product-detail/", "alibaba")):
+            if path.startswith(prefix):
+                return 200, "text/html", detail_page(site, path[len(prefix):]).encode(), {}
+        return 404, "text/plain", b"not found", {}
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                t0 = time.perf_counter()
+                u = urlsplit(self.path)
+                status, ctype, body, headers = mock._respond(u.path, parse_qs(u.query))
+                control = u.path in ("/__stats", "/__reset", "/robots.txt")
+                if not control:
+                    cfg = mock.config
+                    delay = cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+                    time.sleep(max(0.0, delay) / 1000)
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+                if not control:
+                    mock.stats.add(status, (time.perf_counter() - t0) * 1000)
+
+        return Handler
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    for field, default in asdict(MockConfig()).items():
+        ap.add_argument(f"--{field.replace('_', '-')}", type=type(default), default=default)
+    args = ap.parse_args()
+    cfg = MockConfig(**{k: getattr(args, k) for k in asdict(MockConfig())})
+    mock = MockMarketplace(cfg, args.host, args.port)
+    print(f"mock marketplace on {mock.base_url} ({cfg})")
+    try:
+        mock.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
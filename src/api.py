@@ -1,31 +1,212 @@
 # src/api.py
-import subprocess
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
-from src.paths import RAW_JSONL, CLEAN_CSV
+import asyncio, json, os, re, threading, zlib
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from src.common.metrics import METRICS
+from src.paths import RAW_JSONL, CLEAN_CSV, RAW_PARQUET, CLEAN_PARQUET, INDEX_DB
+from src.pipelines.jobs import JobManager, JobParams
 
-app = FastAPI(title="Slooze B2B Crawler API")
+jobs = JobManager()
 
-def _run(args: list[str]) -> None:
-    p = subprocess.run(args, capture_output=True, text=True)
-    if p.returncode != 0:
-        raise HTTPException(status_code=500, detail=p.stderr or "Command failed")
+@asynccontextmanager
+async def lifespan(_app):
+    yield
+    # stop running crawls at their next page instead of leaving threads behind
+    await jobs.shutdown()
 
-@app.post("/run")
-def run(site: str = "both", pages: int = 2):
-    _run(["python", "-m", "src.cli", "crawl", "--site", site, "--max-pages", str(pages), "--out", str(RAW_JSONL)])
-    _run(["python", "-m", "src.cli", "clean", "--inp", str(RAW_JSONL), "--out", str(CLEAN_CSV)])
-    _run(["python", "-m", "src.cli", "eda", "--inp", str(CLEAN_CSV)])
-    return {"ok": True, "raw": str(RAW_JSONL), "clean": str(CLEAN_CSV)}
+app = FastAPI(title="Slooze B2B Crawler API", lifespan=lifespan)
+
+def _job_params(site: str, pages: int, fmt: str, **kw) -> JobParams:
+    # shared by /jobs and /run, so bad input fails the request rather than the job
+    if site not in ("indiamart", "alibaba", "both"):
+        raise HTTPException(400, "site must be indiamart|alibaba|both")
+    if fmt not in ("csv", "parquet"):
+        raise HTTPException(400, "fmt must be csv|parquet")
+    if pages < 1:
+        raise HTTPException(400, "pages must be >= 1")
+    return JobParams(site=site, pages=pages, fmt=fmt, **kw)
+
+@app.post("/jobs", status_code=202)
+async def create_job(site: str = "both", pages: int = 2, incremental: bool = True, fmt: str = "csv", eda: bool = True,
+                     enrich: bool = False):
+    job = jobs.submit(_job_params(site, pages, fmt, incremental=incremental, eda=eda, enrich=enrich))
+    return {"id": job.id, "status": job.status, "url": f"/jobs/{job.id}"}
+
+@app.delete("/jobs/{job_id}", status_code=202)
+async def cancel_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "job not found")
+    if not jobs.cancel(job_id):
+        raise HTTPException(409, f"job already {job.status}")
+    return {"id": job.id, "status": "cancelling", "url": f"/jobs/{job.id}"}
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus scrape target: crawl counters/timings of every run in this process, plus job states
+    states = {}
+    for j in jobs.jobs.values():
+        states[j.status] = states.get(j.status, 0) + 1
+    lines = ["# HELP slooze_jobs Jobs known to this server, by status", "# TYPE slooze_jobs gauge"]
+    lines += [f'slooze_jobs{{status="{k}"}} {v}' for k, v in sorted(states.items())]
+    return Response(METRICS.render() + "\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@app.get("/jobs")
+async def list_jobs():
+    return [j.snapshot() for j in reversed(jobs.jobs.values())]
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, stream: bool = False, interval: float = 1.0):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "job not found")
+    if not stream:
+        return job.snapshot()
+    async def progress():
+        # one NDJSON line per tick until the job finishes
+        while True:
+            yield json.dumps(job.snapshot()) + "\n"
+            if job.done:
+                return
+            await asyncio.sleep(max(0.2, interval))
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+@app.post("/run", status_code=202)
+async def run(site: str = "both", pages: int = 2, incremental: bool = True, fmt: str = "csv"):
+    # kept for existing cron callers; now enqueues a job instead of blocking on subprocesses
+    job = jobs.submit(_job_params(site, pages, fmt, incremental=incremental))
+    return {"ok": True, "job": job.id, "raw": job.params.raw, "clean": job.params.clean}
+
+PARQUET_MEDIA = "application/vnd.apache.parquet"
+
+def _send_file(request: Request, path, filename: str, media_type: str):
+    # single byte ranges (Range: bytes=a-b) so large downloads can resume
+    rng = request.headers.get("range", "")
+    size = os.path.getsize(path)
+    m = re.fullmatch(r"bytes=(\d*)-(\d*)", rng.strip())
+    if not m or not (m.group(1) or m.group(2)):
+        return FileResponse(path, filename=filename, media_type=media_type, headers={"Accept-Ranges": "bytes"})
+    a, b = m.groups()
+    start, end = (int(a), min(int(b) if b else size - 1, size - 1)) if a else (max(0, size - int(b)), size - 1)
+    if start > end:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    def body(chunk=1 << 16):
+        with open(path, "rb") as f:
+            f.seek(start)
+            left = end - start + 1
+            while left > 0:
+                data = f.read(min(chunk, left))
+                if not data:
+                    return
+                left -= len(data)
+                yield data
+    return StreamingResponse(body(), status_code=206, media_type=media_type, headers={
+        "Accept-Ranges": "bytes", "Content-Range": f"bytes {start}-{end}/{size}",
+        "Content-Length": str(end - start + 1), "Content-Disposition": f'attachment; filename="{filename}"'})
 
 @app.get("/download/raw")
-def download_raw():
+def download_raw(request: Request, format: str = "jsonl"):
+    if format == "parquet":
+        if not RAW_PARQUET.exists():
+            raise HTTPException(404, "raw parquet not found")
+        return _send_file(request, RAW_PARQUET, "products.parquet", PARQUET_MEDIA)
     if not RAW_JSONL.exists():
         raise HTTPException(404, "raw not found")
-    return FileResponse(RAW_JSONL, filename="products.jsonl", media_type="application/json")
+    return _send_file(request, RAW_JSONL, "products.jsonl", "application/json")
 
 @app.get("/download/clean")
-def download_clean():
+def download_clean(request: Request, format: str = "csv"):
+    if format == "parquet":
+        if not CLEAN_PARQUET.exists():
+            raise HTTPException(404, "clean parquet not found")
+        return _send_file(request, CLEAN_PARQUET, "products.parquet", PARQUET_MEDIA)
     if not CLEAN_CSV.exists():
         raise HTTPException(404, "clean not found")
-    return FileResponse(CLEAN_CSV, filename="products.csv", media_type="text/csv")
+    return _send_file(request, CLEAN_CSV, "products.csv", "text/csv")
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    # opened on first /products call: the index module pulls in clean/numpy/orjson, which
+    # neither startup nor the job endpoints need (sync endpoints run in a thread pool, hence the lock)
+    global _index
+    with _index_lock:
+        if _index is None:
+            from src.pipelines.index import DatasetIndex
+            _index = DatasetIndex(INDEX_DB, RAW_JSONL)
+    return _index
+
+def _accept_q(accept: str) -> dict:
+    # coding -> q from an Accept-Encoding header; a malformed q counts as 0
+    out = {}
+    for part in accept.split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for p in params:
+            k, _, v = p.partition("=")
+            if k.strip().lower() == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        out[coding.lower()] = q
+    return out
+
+def _pick_encoding(accept: str) -> str:
+    # highest q wins; zstd before gzip on a tie; q=0 (explicit or via "*;q=0") excludes a coding
+    q = _accept_q(accept)
+    candidates = ["gzip"]
+    try:
+        import zstandard  # noqa: F401
+        candidates.insert(0, "zstd")
+    except ImportError:
+        pass
+    best, best_q = "identity", 0.0
+    for coding in candidates:
+        cq = q.get(coding, q.get("*", 0.0))
+        if cq > best_q:
+            best, best_q = coding, cq
+    return best
+
+def _encode(batches, encoding: str):
+    if encoding == "zstd":
+        import zstandard
+        z = zstandard.ZstdCompressor(level=3).compressobj()
+        flush = lambda: z.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    elif encoding == "gzip":
+        z = zlib.compressobj(6, zlib.DEFLATED, 31)
+        flush = lambda: z.flush(zlib.Z_SYNC_FLUSH)
+    else:
+        z = None
+    for docs in batches:
+        data = b"\n".join(docs) + b"\n"
+        # flush per batch so clients see rows as they are produced
+        yield z.compress(data) + flush() if z else data
+    if z:
+        yield z.flush()
+
+@app.get("/products")
+def products(request: Request, site: Optional[str] = None, category: Optional[str] = None,
+             min_price: Optional[float] = None, max_price: Optional[float] = None,
+             since: Optional[datetime] = None, until: Optional[datetime] = None,
+             cursor: int = 0, limit: int = Query(1000, ge=1, le=50_000)):
+    index = get_index()
+    index.refresh()
+    filters = dict(site=site, category=category, min_price=min_price, max_price=max_price,
+                   since=since, until=until, after=cursor)
+    headers = {"Vary": "Accept-Encoding"}
+    nxt = index.next_cursor(limit, **filters)
+    if nxt is not None:
+        headers["X-Next-Cursor"] = str(nxt)
+        headers["Link"] = f'<{request.url.include_query_params(cursor=nxt)}>; rel="next"'
+    encoding = _pick_encoding(request.headers.get("accept-encoding", ""))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(_encode(index.iter_docs(limit, **filters), encoding),
+                             media_type="application/x-ndjson", headers=headers)
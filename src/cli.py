@@ -1,56 +1,133 @@
 
 from __future__ import annotations
-import asyncio, json, os, yaml
-from typing import List
-import typer, pandas as pd
-from src.pipelines.write_jsonl import JsonlWriter
-from src.sites.indiamart import IndiaMartFetcher
-from src.sites.alibaba import AlibabaFetcher
+import os
+from typing import Optional
+import typer
+from src.paths import FRONTIER_DB, SNAPSHOT_DIR, STATE_DIR
+# heavy deps (httpx, parsel, pandas, pydantic, numpy) are imported inside the commands that use them,
+# so `--help` and light commands start fast; bench/importtime_budget.py keeps it that way
 app = typer.Typer(add_completion=False, no_args_is_help=True)
 def load_yaml(path:str):
+    import yaml
     with open(path,"r",encoding="utf-8") as f: return yaml.safe_load(f)
 @app.command()
 def crawl(site: str = typer.Option("both", help="indiamart|alibaba|both"),
           categories_cfg: str = typer.Option("configs/categories.yaml"),
           settings_cfg: str = typer.Option("configs/settings.yaml"),
-          out: str = typer.Option("data/raw/products.jsonl"),
-          max_pages: int = typer.Option(2)):
-    cfg=load_yaml(categories_cfg); st=load_yaml(settings_cfg)
-    user_agents: List[str]=st.get("user_agent_pool", []); proxy=st.get("proxy") or None; respect_robots=bool(st.get("respect_robots", True))
-    base_delay=float(st.get("base_delay_seconds",1.2)); jitter=float(st.get("jitter_seconds",1.0))
-    ind=IndiaMartFetcher(user_agents, proxy=proxy, respect_robots=respect_robots)
-    ali=AlibabaFetcher(user_agents, proxy=proxy, respect_robots=respect_robots)
-    jw=JsonlWriter(out)
-    async def do_ind(cat):
-        for q in cat.get("indiamart", {}).get("search_queries", []):
-            async for item in ind.iter_search(q, max_pages=max_pages, base_delay=base_delay, jitter=jitter):
-                jw.write_one(item.model_dump())
-        urls=cat.get("indiamart", {}).get("category_urls", [])
-        async for item in ind.iter_category_pages(urls, label=cat["slug"], base_delay=base_delay, jitter=jitter):
-            jw.write_one(item.model_dump())
-    async def do_ali(cat):
-        urls=cat.get("alibaba", {}).get("showroom_urls", [])
-        async for item in ali.iter_showrooms(urls, label=cat["slug"], base_delay=base_delay, jitter=jitter):
-            jw.write_one(item.model_dump())
-    async def main():
-        for cat in cfg.get("categories", []):
-            if site in ("indiamart","both"): await do_ind(cat)
-            if site in ("alibaba","both"): await do_ali(cat)
-    asyncio.run(main()); jw.close(); typer.echo(f"Saved: {out}")
+          out: str = typer.Option("data/raw/products.jsonl", help=".jsonl, .jsonl.gz, .jsonl.zst or .parquet"),
+          max_pages: int = typer.Option(2),
+          parse_workers: int = typer.Option(0, help="parse HTML in N worker processes (0 = inline)"),
+          cache: str = typer.Option(None, help="HTTP cache mode: off|on|offline (default: settings)"),
+          incremental: bool = typer.Option(False, help="append only new/changed products, skipping known URLs"),
+          frontier: str = typer.Option(str(FRONTIER_DB), help="persistent seen-URL database"),
+          resume: bool = typer.Option(False, help="continue from the last checkpoint of --out"),
+          checkpoint_interval: float = typer.Option(30.0, help="seconds between checkpoints (0 = off)"),
+          enrich: bool = typer.Option(False, help="fetch product detail pages for price, supplier, rating, images"),
+          report: str = typer.Option(None, help="run report path (default <out>.report.json; '' = none)"),
+          profile: str = typer.Option(None, help="profile the crawl: cprofile (<out>.prof) | pyspy (<out>.svg)"),
+          queue: str = typer.Option(None, help="join a distributed crawl through this work queue (path or sqlite:///path)"),
+          run_id: str = typer.Option(None, help="distributed run to join (required with --queue; use a new id per run)"),
+          worker_id: str = typer.Option(None, help="this worker's name in the run (default: host-pid)"),
+          snapshots: Optional[bool] = typer.Option(None, "--snapshots/--no-snapshots", help="archive fetched listing HTML for `reparse` (default: settings)")):
+    import asyncio
+    from src.common.profiling import ProfilerUnavailable, profiled
+    from src.pipelines.crawl import run_crawl
+    cfg=load_yaml(categories_cfg); st=load_yaml(settings_cfg) or {}
+    if queue and (resume or out.endswith(".parquet")): typer.echo("--queue writes JSONL parts and resumes through the queue; drop --resume / use .jsonl"); raise typer.Exit(1)
+    if queue and not run_id: typer.echo("--queue needs --run-id (the same on every worker, new for each run)"); raise typer.Exit(1)
+    try:
+        with profiled(profile, out) as prof:
+            runner=asyncio.run(run_crawl(cfg.get("categories", []), st, out, site=site, max_pages=max_pages,
+                                         parse_workers=parse_workers, cache_mode=cache, incremental=incremental,
+                                         frontier_path=frontier, resume=resume, checkpoint_interval=checkpoint_interval,
+                                         enrich=enrich, report=report, queue=queue, run_id=run_id, worker_id=worker_id,
+                                         snapshots=snapshots))
+    except (FileNotFoundError, ValueError, ProfilerUnavailable) as e: typer.echo(str(e)); raise typer.Exit(1)
+    incremental=runner.incremental; rc=runner.session.cache
+    if runner.queue is not None:
+        typer.echo(f"Distributed run {runner.run_id} as {runner.worker_id}: {runner.pages_claimed} pages claimed"
+                   + (f"; merged {runner.merged_parts} worker parts into {out}" if runner.merged_parts is not None else "; other workers still running or already merged"))
+    typer.echo(f"Saved: {out} ({runner.items_written} items from {runner.pages_fetched} pages"
+               + (f", {runner.items_skipped} already known)" if incremental else ")"))
+    en=runner.enricher
+    ar=runner.archive
+    if ar is not None: a=ar.stats.as_dict(); typer.echo(f"Snapshots: {a['pages']} pages archived, {a['stored_bytes']/1e6:.1f} MB stored" + (f" ({a['ratio']}x smaller)" if a['ratio'] else ""))
+    if en is not None: typer.echo(f"Enrich: {en.fetched} detail pages, {en.reused} reused, {en.failed} failed")
+    cs=runner.session.stats; typer.echo(f"HTTP: {cs.requests} requests, {cs.new_connections} new connections, {cs.reused_connections} reused")
+    lim=runner.session.limiter
+    for host, m in (lim.metrics() if lim else {}).items():
+        typer.echo(f"Rate {host}: {m['rate_rps']} req/s, {m['throttled']} throttled, {m['server_error']+m['transport_error']} errors, backoff {m['last_backoff_s']}s")
+    if runner.robots is not None and runner.robots.blocked: typer.echo(f"robots.txt: {runner.robots.blocked} URLs skipped")
+    if rc.enabled: k=rc.stats; typer.echo(f"Cache ({rc.mode}): {k.hits} hits, {k.misses} misses, {k.revalidated} revalidated, {k.evicted} evicted")
+    for name, t in runner.metrics.summary().items(): typer.echo(f"Time {name}: {t['total_s']}s over {t['count']} (mean {t['mean_ms']} ms)")
+    if runner.report_path: typer.echo(f"Report: {runner.report_path}")
+    if prof: typer.echo(f"Profile: {prof}")
+@app.command("queue")
+def queue_status(queue: str = typer.Option(str(STATE_DIR / "queue.sqlite"), help="work queue of the distributed crawl"),
+                 run_id: str = typer.Option(..., help="run to inspect"),
+                 merge: str = typer.Option(None, help="(re)merge the run's worker parts into this --out once it is finished"),
+                 incremental: bool = typer.Option(False, help="append the merged parts instead of replacing --out")):
+    from src.pipelines.workqueue import merge_parts, open_queue
+    with open_queue(queue) as q: c=q.counts(run_id); done=q.finished(run_id)
+    typer.echo(f"Run {run_id}: " + ", ".join(f"{n} {s}" for s, n in c.items()) + ("; finished" if done else ""))
+    if merge:
+        if c["pending"] or c["leased"]: typer.echo("Run not finished; nothing merged."); raise typer.Exit(1)
+        typer.echo(f"Merged {merge_parts(merge, run_id, append=incremental)} worker parts into {merge}")
+@app.command()
+def reparse(archive: str = typer.Option(str(SNAPSHOT_DIR), help="snapshot archive written by crawl --snapshots"),
+            out: str = typer.Option("data/raw/products.jsonl", help=".jsonl, .jsonl.gz, .jsonl.zst or .parquet"),
+            settings_cfg: str = typer.Option("configs/settings.yaml"),
+            site: str = typer.Option("both", help="indiamart|alibaba|both"),
+            until: str = typer.Option(None, help="use each page as archived at this UTC time (ISO, e.g. 2026-10-01)"),
+            all_versions: bool = typer.Option(False, help="every archived fetch, not just the newest copy of each page"),
+            workers: Optional[int] = typer.Option(None, help="parse processes (0 = in-process; default one per CPU)")):
+    # re-run the extractors over archived HTML instead of recrawling; --out is replaced when done
+    from datetime import datetime, timezone
+    from src.pipelines.reparse import reparse as run_reparse
+    if not os.path.exists(os.path.join(archive, "index.sqlite")): typer.echo(f"No snapshot archive at {archive}"); raise typer.Exit(1)
+    ts=None
+    if until: d=datetime.fromisoformat(until); ts=(d if d.tzinfo else d.replace(tzinfo=timezone.utc)).timestamp()
+    r=run_reparse(archive, out, load_yaml(settings_cfg) or {}, workers=workers, site=None if site=="both" else site, until=ts, all_versions=all_versions)
+    if not r.pages: typer.echo("No archived pages match; nothing written."); raise typer.Exit(1)
+    typer.echo(f"Reparsed {r.pages} archived pages into {out}: {r.records} items, {r.failed} unreadable pages in {r.seconds:.2f}s")
+@app.command("snapshots")
+def snapshots_status(archive: str = typer.Option(str(SNAPSHOT_DIR), help="snapshot archive written by crawl --snapshots"),
+                     settings_cfg: str = typer.Option("configs/settings.yaml"),
+                     prune: bool = typer.Option(False, help="apply the retention policy now"),
+                     max_age_days: float = typer.Option(None, help="with --prune: drop segments older than this (default: settings)"),
+                     max_bytes: int = typer.Option(None, help="with --prune: keep the archive under this size (default: settings)")):
+    from src.pipelines.snapshots import SnapshotArchive
+    if not os.path.exists(os.path.join(archive, "index.sqlite")): typer.echo(f"No snapshot archive at {archive}"); raise typer.Exit(1)
+    with SnapshotArchive.from_settings(load_yaml(settings_cfg) or {}, archive) as ar:
+        if prune: p=ar.prune(max_age_days=max_age_days, max_bytes=max_bytes); typer.echo(f"Pruned {p.segments} segments ({p.pages} pages, {p.bytes/1e6:.1f} MB)")
+        s=ar.summary()
+    import time; utc=lambda t: time.strftime("%Y-%m-%d %H:%M", time.gmtime(t))
+    span=f" fetched {utc(s['first_fetch'])} to {utc(s['last_fetch'])} UTC" if s["pages"] else ""
+    typer.echo(f"Archive {archive}: {s['pages']} pages of {s['urls']} URLs in {s['segments']} segments ({s['open_segments']} open), {s['bytes']/1e6:.1f} MB{span}")
 @app.command()
 def clean(inp: str = typer.Option("data/raw/products.jsonl"),
-          out: str = typer.Option("data/clean/products.csv")):
-    rows=[]; 
-    with open(inp,"rb") as f:
-        for line in f:
-            if not line.strip(): continue
-            rows.append(json.loads(line))
-    if not rows: typer.echo("No input rows."); raise typer.Exit(1)
-    df=pd.DataFrame(rows)
-    if "product_page_url" in df: df=df.drop_duplicates(subset=["product_page_url"], keep="first")
-    else: df=df.drop_duplicates(subset=["title","site"], keep="first")
-    os.makedirs(os.path.dirname(out), exist_ok=True); df.to_csv(out, index=False); typer.echo(f"Wrote {out} ({len(df)} rows)")
+          out: str = typer.Option("data/clean/products.csv", help=".csv or .parquet"),
+          chunk_mb: int = typer.Option(4, help="read the input in chunks of roughly this many MB"),
+          near_dups: bool = typer.Option(True, help="cluster near-duplicate titles (SimHash) into cluster_id"),
+          max_distance: int = typer.Option(3, help="max title SimHash Hamming distance within a cluster")):
+    # streaming two-pass dedupe; incremental crawls append changed listings, so the latest copy wins
+    from src.pipelines.clean import stream_clean
+    if not os.path.exists(inp) or os.path.getsize(inp) == 0: typer.echo("No input rows."); raise typer.Exit(1)
+    stats=stream_clean(inp, out, chunk_bytes=chunk_mb << 20, near_dups=near_dups, max_distance=max_distance)
+    if not stats.written: typer.echo("No input rows."); raise typer.Exit(1)
+    typer.echo(f"Wrote {out} ({stats.written} rows; {stats.duplicates} duplicates dropped, {stats.bad_lines} bad lines, {stats.invalid} invalid; {stats.clusters} unique products)")
+@app.command()
+def index(inp: str = typer.Option("data/raw/products.jsonl")):
+    # build/refresh the query index the API serves /products from
+    from src.pipelines.index import DatasetIndex; from src.paths import INDEX_DB
+    ix=DatasetIndex(INDEX_DB, inp); n=ix.refresh(); typer.echo(f"Indexed {n} new rows ({len(ix)} products) into {INDEX_DB}")
 @app.command()
-def eda(inp: str = typer.Option("data/clean/products.csv")):
-    from src.eda.eda_report import run as run_eda; run_eda(inp)
+def eda(inp: str = typer.Option("data/clean/products.csv"), force: bool = typer.Option(False, help="Recompute even if the input is unchanged"),
+        workers: Optional[int] = typer.Option(None, help="Chart render processes (0 = in-process; default one per chart)")):
+    # outputs go to EDA_DIR / ART_DIR and are reused while the input's fingerprint matches
+    from src.eda.eda_report import run as run_eda
+    if not os.path.exists(inp): typer.echo(f"No input at {inp}"); raise typer.Exit(1)
+    r=run_eda(inp, workers=workers, force=force)
+    if not r.rows: raise typer.Exit(1)
+    typer.echo(f"EDA {'unchanged, reused' if r.cached else 'written'}: {len(r.outputs)} outputs for {r.rows} rows in {r.seconds:.2f}s")
 if __name__=="__main__": app()
@@ -0,0 +1,225 @@
+from __future__ import annotations
+import gzip, hashlib, json, os, time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+
+MODES = ("off", "on", "offline")
+
+# request headers that change what the server sends back
+_VARY = ("accept", "accept-language")
+# response headers worth keeping for replay / revalidation
+_KEEP = ("content-type", "etag", "last-modified")
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a URL has no cached response."""
+
+
+def _compressor():
+    try:
+        import zstandard
+        return "zstd", zstandard.ZstdCompressor(level=6).compress
+    except ImportError:
+        return "gzip", lambda b: gzip.compress(b, 6)
+
+
+def _decompressor(codec: str):
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress
+    return gzip.decompress
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    stored_at: float
+    codec: str
+    size: int
+
+    def etag(self) -> Optional[str]:
+        return self.headers.get("etag")
+
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get("last-modified")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    revalidated: int = 0
+    stored: int = 0
+    evicted: int = 0
+    bytes_stored: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache under ``DATA_DIR/cache/http``.
+
+    Entries are keyed by a SHA-256 of the URL plus the request headers that
+    affect the response (``accept``, ``accept-language``). Each entry is a
+    small JSON metadata file and a compressed body (zstd when available,
+    gzip otherwise), sharded by the first two hex digits of the key.
+
+    Modes:
+        ``off``     bypass the cache entirely
+        ``on``      serve fresh entries (younger than ``ttl_seconds``); revalidate
+                    stale ones with If-None-Match / If-Modified-Since
+        ``offline`` serve whatever is on disk regardless of age; a miss raises
+                    ``CacheMiss`` instead of touching the network
+
+    The directory is kept under ``max_bytes`` by evicting the least recently
+    stored entries.
+    """
+
+    def __init__(self, root: os.PathLike, mode: str = "on", ttl_seconds: float = 6 * 3600,
+                 max_bytes: int = 256 * 1024 * 1024):
+        if mode not in MODES:
+            raise ValueError(f"cache mode must be one of {MODES}, got {mode!r}")
+        self.root = Path(root)
+        self.mode = mode
+        self.ttl = float(ttl_seconds)
+        self.max_bytes = int(max_bytes)
+        self.stats = CacheStats()
+        self._codec, self._compress = _compressor()
+        self._total: Optional[int] = None
+
+    @classmethod
+    def from_settings(cls, settings: dict, root: os.PathLike, mode: Optional[str] = None) -> "ResponseCache":
+        c = (settings or {}).get("cache", {}) or {}
+        return cls(
+            root,
+            mode=mode or c.get("mode", "on"),
+            ttl_seconds=float(c.get("ttl_seconds", 6 * 3600)),
+            max_bytes=int(c.get("max_bytes", 256 * 1024 * 1024)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    # -------------------- keys & paths --------------------
+
+    @staticmethod
+    def key_for(url: str, headers: Optional[dict] = None) -> str:
+        h = {k.lower(): v for k, v in (headers or {}).items()}
+        parts = [url] + [f"{k}:{h.get(k, '')}" for k in _VARY]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        d = self.root / key[:2]
+        return d / f"{key}.json", d / f"{key}.body"
+
+    # -------------------- read --------------------
+
+    def lookup(self, url: str, headers: Optional[dict] = None) -> Optional[CacheEntry]:
+        meta_p, body_p = self._paths(self.key_for(url, headers))
+        try:
+            with open(meta_p, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not body_p.exists():
+            return None
+        return CacheEntry(**meta)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self.mode == "offline" or (time.time() - entry.stored_at) < self.ttl
+
+    def body(self, entry: CacheEntry) -> bytes:
+        _, body_p = self._paths(entry.key)
+        with open(body_p, "rb") as f:
+            return _decompressor(entry.codec)(f.read())
+
+    def to_response(self, entry: CacheEntry) -> httpx.Response:
+        return httpx.Response(
+            entry.status,
+            headers={**entry.headers, "x-cache": "HIT"},
+            content=self.body(entry),
+            request=httpx.Request("GET", entry.url),
+        )
+
+    def conditional_headers(self, entry: CacheEntry) -> dict:
+        h = {}
+        if entry.etag():
+            h["if-none-match"] = entry.etag()
+        if entry.last_modified():
+            h["if-modified-since"] = entry.last_modified()
+        return h
+
+    # -------------------- write --------------------
+
+    def _write_meta(self, entry: CacheEntry) -> None:
+        meta_p, _ = self._paths(entry.key)
+        tmp = meta_p.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(entry), f)
+        os.replace(tmp, meta_p)
+
+    def touch(self, entry: CacheEntry) -> None:
+        """Mark a revalidated (304) entry fresh again."""
+        entry.stored_at = time.time()
+        self._write_meta(entry)
+        self.stats.revalidated += 1
+
+    def store(self, url: str, headers: Optional[dict], response: httpx.Response) -> None:
+        key = self.key_for(url, headers)
+        meta_p, body_p = self._paths(key)
+        meta_p.parent.mkdir(parents=True, exist_ok=True)
+        if self._total is None:
+            self._total = self._disk_usage()
+        blob = self._compress(response.content)
+        tmp = body_p.with_suffix(".body.tmp")
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        old = body_p.stat().st_size if body_p.exists() else 0
+        os.replace(tmp, body_p)
+        entry = CacheEntry(
+            key=key, url=url, status=response.status_code,
+            headers={k: response.headers[k] for k in _KEEP if k in response.headers},
+            stored_at=time.time(), codec=self._codec, size=len(blob),
+        )
+        self._write_meta(entry)
+        self.stats.stored += 1
+        self.stats.bytes_stored += len(blob)
+        self._total += len(blob) - old
+        if self._total > self.max_bytes:
+            self.evict()
+
+    # -------------------- eviction --------------------
+
+    def _disk_usage(self) -> int:
+        if not self.root.exists():
+            return 0
+        return sum(p.stat().st_size for p in self.root.glob("*/*.body"))
+
+    def evict(self, target_ratio: float = 0.9) -> None:
+        """Drop oldest entries until the cache is below ``target_ratio * max_bytes``."""
+        entries = []
+        for body_p in self.root.glob("*/*.body"):
+            st = body_p.stat()
+            entries.append((st.st_mtime, st.st_size, body_p))
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * target_ratio)
+        for _, size, body_p in sorted(entries):
+            if total <= target:
+                break
+            for p in (body_p, body_p.with_suffix(".json")):
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+            total -= size
+            self.stats.evicted += 1
+        self._total = total
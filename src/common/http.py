@@ -0,0 +1,210 @@
+from __future__ import annotations
+import asyncio, time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+import httpx
+
+from src.common.cache import CacheMiss, ResponseCache
+from src.common.metrics import METRICS, Metrics
+from src.common.ratelimit import RateLimiter, parse_retry_after
+from src.common.scheduler import host_of
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@dataclass
+class ConnectionStats:
+    requests: int = 0
+    new_connections: int = 0
+    http2_responses: int = 0
+
+    @property
+    def reused_connections(self) -> int:
+        return max(0, self.requests - self.new_connections)
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d["reused_connections"] = self.reused_connections
+        return d
+
+
+class HttpSession:
+    """
+    Pooled ``httpx.AsyncClient`` shared by the site fetchers for a whole run.
+
+    Pool limits and keep-alive expiry come from the ``http:`` block of
+    ``settings.yaml``. HTTP/2 is enabled only when requested *and* the ``h2``
+    package is importable, so Windows installs without it keep working.
+
+    With a ``ResponseCache`` attached, ``get`` serves fresh entries from
+    disk, revalidates stale ones conditionally and stores new 200s; in
+    offline mode it never touches the network.
+
+    Every request that does go to the network first takes a token from the
+    host's adaptive ``RateLimiter`` (``rate_limit:`` in settings) and reports
+    its status and latency back, so 429/503 and slow responses throttle that
+    host. Cache hits bypass the limiter.
+
+    Requests, response bytes, cache hits, network time and rate-limit waits
+    are recorded per host in ``metrics`` (the process-wide ``METRICS`` unless
+    a run passes its own).
+
+    With a ``gate`` (the shared ``WorkQueue`` of a distributed crawl) each
+    network request also reserves a slot for its host that is shared by all
+    replicas. The slot interval is the limiter's current rate, or
+    ``base_delay_seconds`` when adaptive limiting is off. Backoffs are
+    published through the gate, so one replica's 429 pauses all of them.
+    Gate calls are blocking (an SQLite write for the built-in queue) and run
+    on one dedicated thread, so waiting for the store's lock never stalls
+    the event loop.
+
+    Usage::
+
+        async with HttpSession(settings, proxy=proxy) as session:
+            r = await session.get(url, headers=...)
+        print(session.stats.as_dict())
+    """
+
+    def __init__(self, settings: Optional[dict] = None, proxy: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None, limiter: Optional[RateLimiter] = None,
+                 metrics: Optional[Metrics] = None, gate=None):
+        settings = settings or {}
+        http = settings.get("http", {}) or {}
+        self.timeout = float(settings.get("timeout_seconds", 20))
+        self.proxy = proxy
+        self.limits = httpx.Limits(
+            max_connections=int(http.get("max_connections", 20)),
+            max_keepalive_connections=int(http.get("max_keepalive_connections", 10)),
+            keepalive_expiry=float(http.get("keepalive_expiry", 30.0)),
+        )
+        self.http2 = bool(http.get("http2", True)) and _h2_available()
+        self.cache = cache
+        self.limiter = limiter if limiter is not None else RateLimiter.from_settings(settings)
+        self.stats = ConnectionStats()
+        self.metrics = metrics if metrics is not None else METRICS
+        self.gate = gate
+        self.gate_interval = float(settings.get("base_delay_seconds", 1.2))
+        self._gate_pool: Optional[ThreadPoolExecutor] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    # -------------------- lifecycle --------------------
+
+    async def open(self) -> "HttpSession":
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+                proxies=self.proxy,
+            )
+        if self.gate is not None and self._gate_pool is None:
+            self._gate_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gate")
+        return self
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._gate_pool is not None:
+            self._gate_pool.shutdown(wait=True)
+            self._gate_pool = None
+
+    async def __aenter__(self) -> "HttpSession":
+        return await self.open()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("HttpSession is not open; use 'async with HttpSession(...)'")
+        return self._client
+
+    # -------------------- requests --------------------
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        # httpcore emits connect_tcp only when the pool has to dial a new socket
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.new_connections += 1
+
+    async def _gate_call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._gate_pool, fn, *args)
+
+    async def _share_backoff(self, host: str, lim) -> None:
+        if self.gate is not None and lim.strikes:
+            left = lim.backoff_until - time.monotonic()
+            if left > 0:
+                await self._gate_call(self.gate.backoff, host, left)
+
+    async def get(self, url: str, headers: Optional[dict] = None,
+                  timeout: Optional[float] = None) -> httpx.Response:
+        cache = self.cache if self.cache is not None and self.cache.enabled else None
+        entry = None
+        host = host_of(url)
+        m = self.metrics
+        if cache is not None:
+            entry = cache.lookup(url, headers)
+            if entry is not None and cache.is_fresh(entry):
+                cache.stats.hits += 1
+                m.inc("http_cache_hits_total", host=host)
+                return cache.to_response(entry)
+            cache.stats.misses += 1
+            if cache.mode == "offline":
+                raise CacheMiss(url)
+            if entry is not None:
+                headers = {**(headers or {}), **cache.conditional_headers(entry)}
+
+        lim = self.limiter.host(host) if self.limiter is not None else None
+        if lim is not None:
+            with m.time("ratelimit_wait_seconds", host=host):
+                await lim.acquire()
+        if self.gate is not None:
+            wait = await self._gate_call(self.gate.reserve, host,
+                                         1.0 / lim.rate if lim is not None else self.gate_interval)
+            if wait > 0:
+                with m.time("ratelimit_wait_seconds", host=host, scope="global"):
+                    await asyncio.sleep(wait)
+        self.stats.requests += 1
+        t0 = time.monotonic()
+        try:
+            r = await self.client.get(
+                url,
+                headers=headers,
+                timeout=timeout if timeout is not None else self.timeout,
+                extensions={"trace": self._trace},
+            )
+        except httpx.TransportError:
+            elapsed = time.monotonic() - t0
+            m.observe("http_request_seconds", elapsed, host=host)
+            m.inc("http_requests_total", host=host, status=0)
+            if lim is not None:
+                lim.record(None, elapsed)
+                await self._share_backoff(host, lim)
+            raise
+        elapsed = time.monotonic() - t0
+        m.observe("http_request_seconds", elapsed, host=host)
+        m.inc("http_requests_total", host=host, status=r.status_code)
+        m.inc("http_response_bytes_total", len(r.content), host=host)
+        if lim is not None:
+            lim.record(r.status_code, elapsed, parse_retry_after(r.headers.get("retry-after")))
+            await self._share_backoff(host, lim)
+        if r.http_version == "HTTP/2":
+            self.stats.http2_responses += 1
+
+        if cache is not None:
+            if r.status_code == 304 and entry is not None:
+                cache.touch(entry)
+                return cache.to_response(entry)
+            if r.status_code == 200:
+                cache.store(url, headers, r)
+        return r
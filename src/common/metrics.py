@@ -0,0 +1,145 @@
+"""
+Lightweight in-process metrics: labelled counters and timing histograms.
+
+Cheap enough for the crawl hot path (a lock, a dict update and a
+``perf_counter`` pair per observation). A run gets its own ``Metrics``
+whose updates also flow into the process-wide ``METRICS``, so a crawl can
+write its own report while the API's ``/metrics`` endpoint shows totals
+across all runs in Prometheus text format.
+"""
+from __future__ import annotations
+import bisect, threading, time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "http_requests_total": "HTTP requests sent, by host and status (status 0 = transport error)",
+    "http_response_bytes_total": "Response body bytes received, by host",
+    "http_cache_hits_total": "Responses served from the on-disk cache, by host",
+    "http_request_seconds": "Network time per HTTP request, by host",
+    "ratelimit_wait_seconds": "Time spent waiting for a rate-limit token, by host",
+    "fetch_seconds": "Time in the fetchers' _get (retries and waits included), by site",
+    "fetch_retries_total": "Retried requests, by site",
+    "parse_seconds": "Listing/detail selector extraction per page, by site and kind",
+    "build_items_seconds": "Listing record construction per page, by site",
+    "write_seconds": "Writer time per record",
+    "crawl_pages_total": "Listing pages fetched, by site",
+    "crawl_items_total": "Records written, by site and category",
+    "crawl_items_skipped_total": "Known products skipped by incremental crawls, by site",
+}
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Timer:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+
+class Metrics:
+    def __init__(self, parent: Optional["Metrics"] = None):
+        self.parent = parent
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[tuple, float]] = {}
+        self.timers: Dict[str, Dict[tuple, _Timer]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        k = _key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[k] = series.get(k, 0) + value
+        if self.parent is not None:
+            self.parent.inc(name, value, **labels)
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        k = _key(labels)
+        with self._lock:
+            series = self.timers.setdefault(name, {})
+            t = series.get(k)
+            if t is None:
+                t = series[k] = _Timer()
+            t.add(seconds)
+        if self.parent is not None:
+            self.parent.observe(name, seconds, **labels)
+
+    @contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    # ---- output ----
+    def as_dict(self) -> dict:
+        """JSON-friendly snapshot for run reports."""
+        with self._lock:
+            counters = {n: [{"labels": dict(k), "value": v} for k, v in s.items()]
+                        for n, s in sorted(self.counters.items())}
+            timers = {n: [{"labels": dict(k), "count": t.count, "total_s": round(t.total, 4),
+                           "mean_ms": round(1000 * t.total / t.count, 3) if t.count else None,
+                           "max_ms": round(1000 * t.max, 3)} for k, t in s.items()]
+                      for n, s in sorted(self.timers.items())}
+        return {"counters": counters, "timers": timers}
+
+    def summary(self) -> dict:
+        """Per-stage totals (all label sets of a timer summed)."""
+        out = {}
+        with self._lock:
+            for name, series in sorted(self.timers.items()):
+                n = sum(t.count for t in series.values())
+                total = sum(t.total for t in series.values())
+                out[name] = {"count": n, "total_s": round(total, 4),
+                             "mean_ms": round(1000 * total / n, 3) if n else None}
+        return out
+
+    def render(self, prefix: str = "slooze_") -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        def labels(k, extra=()):
+            items = list(k) + list(extra)
+            if not items:
+                return ""
+            body = ",".join(f'{a}="{_esc(b)}"' for a, b in items)
+            return "{" + body + "}"
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                full = prefix + name
+                lines += [f"# HELP {full} {HELP.get(name, name)}", f"# TYPE {full} counter"]
+                lines += [f"{full}{labels(k)} {v:g}" for k, v in series.items()]
+            for name, series in sorted(self.timers.items()):
+                full = prefix + name
+                lines += [f"# HELP {full} {HELP.get(name, name)}", f"# TYPE {full} histogram"]
+                for k, t in series.items():
+                    acc = 0
+                    for bound, n in zip(BUCKETS + (float("inf"),), t.buckets):
+                        acc += n
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{full}_bucket{labels(k, [('le', le)])} {acc}")
+                    lines.append(f"{full}_sum{labels(k)} {t.total:.6f}")
+                    lines.append(f"{full}_count{labels(k)} {t.count}")
+        return "\n".join(lines) + "\n"
+
+
+# process-wide totals (what /metrics serves)
+METRICS = Metrics()
@@ -2,6 +2,8 @@ from __future__ import annotations
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
+# re-exported; the record lives in a pydantic-free module so crawling doesn't load pydantic
+from src.common.records import RECORD_FIELDS, ProductRecord, utc_now_iso  # noqa: F401
 
 class ProductItem(BaseModel):
     site: str
@@ -22,3 +24,6 @@ class ProductItem(BaseModel):
     product_page_url: Optional[str] = None
     images: List[str] = []
     scraped_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+assert RECORD_FIELDS == tuple(ProductItem.model_fields), "ProductRecord must mirror ProductItem"
@@ -0,0 +1,109 @@
+"""
+Price / currency / unit normalization, batched over whole columns.
+
+All patterns are compiled once at import. ``normalize_prices`` works on a
+pandas Series with ``.str.extract`` over the distinct strings (no
+``pd.Series`` built per row); ``parse_price_text`` applies the same patterns to a single
+string for callers outside pandas.
+
+Handles Indian digit grouping ("₹ 3,50,000"), western grouping
+("US$1,234.50"), ranges ("$10 - $15", "10 to 20", "US$2024.00-4048.00")
+and trailing units ("/ Piece", "per Set").
+"""
+from __future__ import annotations
+import re
+from typing import Optional, Tuple
+
+CURRENCY_SYMBOLS = {"US$": "USD", "CN¥": "CNY", "₹": "INR", "$": "USD", "€": "EUR", "£": "GBP", "¥": "CNY"}
+CURRENCY_CODES = ("INR", "USD", "EUR", "GBP", "CNY", "JPY", "AED")
+
+# longest symbols first so "US$" wins over "$"
+_SYM_ALT = "|".join(re.escape(s) for s in sorted(CURRENCY_SYMBOLS, key=len, reverse=True))
+CURRENCY_PAT = rf"({_SYM_ALT}|\bRs\.?(?=\s*\d)|\b(?:{'|'.join(CURRENCY_CODES)})\b)"
+# 3,50,000 | 1,234.50 | 1234.5
+NUM_PAT = r"(\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+RANGE_PAT = rf"{NUM_PAT}(?:\s*(?:-|–|~|to)\s*(?:{_SYM_ALT}|[A-Z]{{3}})?\s*{NUM_PAT})?"
+UNIT_PAT = r"(?:/|\bper\b)\s*([A-Za-z]+(?:\s[A-Za-z]+)?)"
+
+CURRENCY_RE = re.compile(CURRENCY_PAT, re.I)
+RANGE_RE = re.compile(RANGE_PAT, re.I)
+UNIT_RE = re.compile(UNIT_PAT, re.I)
+
+
+def _currency_code(token: Optional[str]) -> Optional[str]:
+    if not token:
+        return None
+    if token in CURRENCY_SYMBOLS:
+        return CURRENCY_SYMBOLS[token]
+    t = token.upper()
+    if t.startswith("RS"):
+        return "INR"
+    return CURRENCY_SYMBOLS.get(t, t)
+
+
+def _num(s: Optional[str]) -> Optional[float]:
+    return float(s.replace(",", "")) if s else None
+
+
+def parse_price_text(text: Optional[str]) -> Tuple[Optional[float], Optional[float], Optional[str], Optional[str]]:
+    """Scalar version: ``(price_min, price_max, currency, unit)``."""
+    if not text:
+        return None, None, None, None
+    cur = CURRENCY_RE.search(text)
+    unit = UNIT_RE.search(text)
+    m = RANGE_RE.search(text)
+    lo = hi = None
+    if m:
+        a, b = _num(m.group(1)), _num(m.group(2))
+        lo, hi = (a, a) if b is None else (min(a, b), max(a, b))
+    return lo, hi, _currency_code(cur.group(1) if cur else None), (unit.group(1).strip() if unit else None)
+
+
+def normalize_prices(price_text):
+    """
+    Vectorized normalization of a Series of price strings.
+    Returns a DataFrame with ``price_min``, ``price_max``, ``currency``, ``unit``.
+
+    Listings repeat the same price strings a lot, so the regexes run over the
+    distinct values only and results are broadcast back by factor code.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(price_text, use_na_sentinel=True)
+    s = pd.Series(uniques, dtype="string")
+    rng = s.str.extract(RANGE_RE)
+    a = pd.to_numeric(rng[0].str.replace(",", "", regex=False), errors="coerce")
+    b = pd.to_numeric(rng[1].str.replace(",", "", regex=False), errors="coerce").fillna(a)
+    cur = s.str.extract(CURRENCY_RE)[0].map(_currency_code, na_action="ignore")
+    unit = s.str.extract(UNIT_RE)[0].str.strip()
+    per_unique = pd.DataFrame({
+        "price_min": a.where(a <= b, b).astype("float64"),
+        "price_max": b.where(a <= b, a).astype("float64"),
+        "currency": cur.astype("object").where(cur.notna(), None),
+        "unit": unit.astype("object").where(unit.notna(), None),
+    })
+    # NA inputs (code -1) pick an all-null sentinel row appended at the end
+    per_unique.loc[len(per_unique)] = [np.nan, np.nan, None, None]
+    out = per_unique.iloc[np.where(codes < 0, len(per_unique) - 1, codes)]
+    out.index = price_text.index
+    return out
+
+
+def fill_prices(df):
+    """Fill missing price_min/price_max/currency/unit in ``df`` from ``price_text`` (in place)."""
+    if "price_text" not in df or df.empty:
+        return df
+    for c in ("price_min", "price_max", "currency", "unit"):
+        if c not in df:
+            df[c] = None
+    need = df["price_min"].isna() & df["price_max"].isna() & df["price_text"].notna()
+    if need.any():
+        norm = normalize_prices(df.loc[need, "price_text"])
+        df.loc[need, "price_min"] = norm["price_min"]
+        df.loc[need, "price_max"] = norm["price_max"]
+        for c in ("currency", "unit"):
+            missing = need & df[c].isna()
+            if missing.any():
+                df.loc[missing, c] = norm[c]
+    return df
@@ -0,0 +1,66 @@
+"""
+Optional profilers for a CLI run.
+
+``cprofile`` uses the standard library and writes ``<out>.prof`` (open it
+with ``snakeviz`` or ``python -m pstats``), printing the top functions by
+cumulative time. ``pyspy`` attaches the external ``py-spy`` sampler to this
+process and writes a flamegraph ``<out>.svg``; it sees native frames (lxml,
+zstd) and costs next to nothing, but needs ``pip install py-spy`` and, on
+Linux, permission to ptrace (root or ``kernel.yama.ptrace_scope=0``).
+"""
+from __future__ import annotations
+import os, shutil, signal, subprocess, tempfile, time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+PROFILERS = ("cprofile", "pyspy")
+
+
+class ProfilerUnavailable(RuntimeError):
+    """Unknown profiler, or py-spy missing / unable to attach."""
+
+
+@contextmanager
+def profiled(mode: Optional[str], out: str, top: int = 25) -> Iterator[Optional[str]]:
+    """Profile the body with ``mode``; yields the output path (None when off)."""
+    if not mode:
+        yield None
+        return
+    if mode not in PROFILERS:
+        raise ProfilerUnavailable(f"unknown profiler {mode!r}; use one of {', '.join(PROFILERS)}")
+    if mode == "cprofile":
+        import cProfile, pstats
+
+        path = f"{out}.prof"
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield path
+        finally:
+            prof.disable()
+            prof.dump_stats(path)
+            pstats.Stats(prof).sort_stats("cumulative").print_stats(top)
+        return
+
+    exe = shutil.which("py-spy")
+    if exe is None:
+        raise ProfilerUnavailable("py-spy is not installed (pip install py-spy)")
+    path = f"{out}.svg"
+    log = tempfile.TemporaryFile()  # not a pipe: py-spy must never block on a full one
+    proc = subprocess.Popen([exe, "record", "--pid", str(os.getpid()), "--rate", "100",
+                             "--output", path, "--nonblocking"],
+                            stdout=subprocess.DEVNULL, stderr=log)
+    time.sleep(0.5)  # let it attach before the interesting part starts
+    if proc.poll() is not None:
+        log.seek(0)
+        raise ProfilerUnavailable(f"py-spy failed: {log.read().decode(errors='replace').strip()}")
+    try:
+        yield path
+    finally:
+        # SIGINT makes py-spy stop sampling and write the flamegraph
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        log.close()
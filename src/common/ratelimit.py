@@ -0,0 +1,164 @@
+from __future__ import annotations
+import asyncio, random, time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+
+# statuses worth another attempt; anything else (404, 403, 410, ...) fails fast
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUSES
+    return isinstance(exc, httpx.TransportError)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+class HostLimiter:
+    """
+    Token bucket for one host whose refill rate adapts to how the host behaves
+    (AIMD, like TCP congestion control):
+
+    - a fast success (latency EWMA under ``target_latency``) adds
+      ``increase`` requests/sec, up to ``max_rps``;
+    - slow responses shave 10% off the rate;
+    - 429/503 halve the rate and pause the host for an exponentially growing
+      backoff, or for ``Retry-After`` when the server sends one;
+    - other 5xx and transport errors cut the rate by a quarter with a shorter
+      backoff.
+    """
+
+    def __init__(self, host: str, initial_rps: float = 1.0, min_rps: float = 0.1, max_rps: float = 5.0,
+                 burst: float = 2.0, target_latency: float = 1.5, increase: float = 0.1,
+                 base_backoff: float = 2.0, max_backoff: float = 300.0, jitter: float = 0.1):
+        self.host = host
+        self.min_rps, self.max_rps = float(min_rps), float(max_rps)
+        self.rate = min(self.max_rps, max(self.min_rps, float(initial_rps)))
+        self.burst = max(1.0, float(burst))
+        self.target_latency = float(target_latency)
+        self.increase = float(increase)
+        self.base_backoff = float(base_backoff)
+        self.max_backoff = float(max_backoff)
+        self.jitter = float(jitter)
+        self.tokens = 1.0
+        self.latency: Optional[float] = None   # EWMA, seconds
+        self.strikes = 0                       # consecutive throttles/errors
+        self.backoff_until = 0.0
+        self.last_backoff = 0.0
+        self._stamp = time.monotonic()
+        self.counts: Dict[str, int] = {"ok": 0, "throttled": 0, "server_error": 0, "client_error": 0,
+                                       "transport_error": 0}
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Seconds until the next request may go out (0 if a token is available)."""
+        now = time.monotonic() if now is None else now
+        if now < self.backoff_until:
+            return self.backoff_until - now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    async def acquire(self) -> None:
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                self.tokens -= 1
+                return
+            await asyncio.sleep(wait * (1 + random.uniform(0, self.jitter)))
+
+    def _backoff(self, seconds: float) -> None:
+        self.last_backoff = min(self.max_backoff, seconds)
+        self.backoff_until = max(self.backoff_until, time.monotonic() + self.last_backoff)
+        self.tokens = min(self.tokens, 0.0)
+
+    def record(self, status: Optional[int], latency: float, retry_after: Optional[float] = None) -> None:
+        """Feed back one response (``status=None`` for a transport error)."""
+        if status is not None and status < 500 and status not in THROTTLE_STATUSES:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        if status is None or status in THROTTLE_STATUSES or status >= 500:
+            throttled = status in THROTTLE_STATUSES
+            self.counts["throttled" if throttled else "transport_error" if status is None else "server_error"] += 1
+            self.rate = max(self.min_rps, self.rate * (0.5 if throttled else 0.75))
+            wait = self.base_backoff * (2 ** self.strikes) / (1 if throttled else 2)
+            self.strikes += 1
+            self._backoff(retry_after if retry_after is not None else wait)
+            return
+        self.strikes = 0
+        if status >= 400:
+            self.counts["client_error"] += 1
+            return
+        self.counts["ok"] += 1
+        if self.latency is not None and self.latency > 2 * self.target_latency:
+            self.rate = max(self.min_rps, self.rate * 0.9)
+        elif self.latency is None or self.latency <= self.target_latency:
+            self.rate = min(self.max_rps, self.rate + self.increase)
+
+    def cap(self, max_rps: float) -> None:
+        """Lower the ceiling (e.g. to honour robots.txt ``Crawl-delay``)."""
+        self.max_rps = min(self.max_rps, float(max_rps))
+        self.min_rps = min(self.min_rps, self.max_rps)
+        self.rate = min(self.rate, self.max_rps)
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        return {
+            "rate_rps": round(self.rate, 3),
+            "latency_ewma_s": round(self.latency, 3) if self.latency is not None else None,
+            "backoff_remaining_s": round(max(0.0, self.backoff_until - now), 2),
+            "last_backoff_s": round(self.last_backoff, 2),
+            "strikes": self.strikes,
+            **self.counts,
+        }
+
+
+class RateLimiter:
+    """
+    Registry of ``HostLimiter`` per host, configured from the ``rate_limit:``
+    block of ``settings.yaml``; ``per_host`` entries may override any of its
+    keys for a single host.
+    """
+
+    KEYS = ("initial_rps", "min_rps", "max_rps", "burst", "target_latency", "increase",
+            "base_backoff", "max_backoff", "jitter")
+
+    def __init__(self, defaults: Optional[dict] = None, per_host: Optional[Dict[str, dict]] = None):
+        self.defaults = {k: v for k, v in (defaults or {}).items() if k in self.KEYS}
+        self.per_host = {h.lower(): {k: v for k, v in (o or {}).items() if k in self.KEYS}
+                         for h, o in (per_host or {}).items()}
+        self._hosts: Dict[str, HostLimiter] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Optional[dict]) -> Optional["RateLimiter"]:
+        st = settings or {}
+        rl = st.get("rate_limit") or {}
+        if not rl.get("enabled", True):
+            return None
+        return cls(rl, st.get("per_host") or {})
+
+    def host(self, host: str) -> HostLimiter:
+        lim = self._hosts.get(host)
+        if lim is None:
+            lim = self._hosts[host] = HostLimiter(host, **{**self.defaults, **self.per_host.get(host, {})})
+        return lim
+
+    def metrics(self) -> Dict[str, dict]:
+        return {h: lim.metrics() for h, lim in self._hosts.items()}
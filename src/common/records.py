@@ -0,0 +1,64 @@
+"""
+``ProductRecord``, the unvalidated listing record of the crawl hot path.
+
+Kept apart from ``src/common/models.py`` so that crawling (fetchers, crawl,
+enrich) does not import pydantic; the validated ``ProductItem`` is only
+loaded by ``clean``, the API and ``to_model`` callers.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from operator import attrgetter
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from src.common.models import ProductItem
+
+
+def utc_now_iso() -> str:
+    """Naive UTC timestamp in the form ``ProductItem.scraped_at`` serializes to."""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+@dataclass(slots=True)
+class ProductRecord:
+    """
+    Unvalidated listing record for the crawl hot path.
+
+    Same fields as ``ProductItem``, but building one is a plain slotted
+    ``__init__`` and ``as_dict`` a single tuple zip, so a crawl pays no
+    pydantic validation per product. ``scraped_at`` is already an ISO
+    string (fetchers stamp a whole page with one value), which keeps the
+    dict JSON-safe for checkpoints. Types are checked later, in ``clean``
+    (``ProductItem.model_validate``), or on demand with ``to_model``.
+    """
+    site: str
+    category: str
+    title: Optional[str] = None
+    price_text: Optional[str] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    currency: Optional[str] = None
+    moq: Optional[str] = None
+    unit: Optional[str] = None
+    supplier_name: Optional[str] = None
+    supplier_location: Optional[str] = None
+    supplier_years: Optional[str] = None
+    rating: Optional[float] = None
+    reviews_count: Optional[int] = None
+    url: Optional[str] = None
+    product_page_url: Optional[str] = None
+    images: List[str] = field(default_factory=list)
+    scraped_at: str = field(default_factory=utc_now_iso)
+
+    def as_dict(self) -> dict:
+        return dict(zip(RECORD_FIELDS, _record_values(self)))
+
+    def to_model(self) -> ProductItem:
+        from src.common.models import ProductItem
+
+        return ProductItem.model_validate(self.as_dict())
+
+
+RECORD_FIELDS = tuple(f.name for f in fields(ProductRecord))
+_record_values = attrgetter(*RECORD_FIELDS)
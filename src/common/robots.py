@@ -1,19 +1,204 @@
+"""
+robots.txt enforcement for the async fetch path.
+
+``RobotsCache.allowed(session, url)`` fetches ``/robots.txt`` once per
+origin through the shared ``HttpSession`` (so it is pooled and rate
+limited like any other request), keeps the parsed rules in memory for
+``ttl_seconds`` and persists the raw file on disk so the next run does not
+refetch it. After the first fetch a check is a dict lookup plus a few
+precompiled regex matches.
+
+Status handling follows RFC 9309: 4xx means no restrictions, 5xx or an
+unreachable host means "disallow everything" for a short ``error_ttl``.
+"""
 from __future__ import annotations
-import urllib.robotparser as urobot
-from urllib.parse import urlparse
-from functools import lru_cache
-
-@lru_cache(maxsize=64)
-def _get_parser(origin: str) -> urobot.RobotFileParser:
-    rp = urobot.RobotFileParser()
-    rp.set_url(f"{origin}/robots.txt")
-    try: rp.read()
-    except Exception: pass
-    return rp
-
-def allowed(url: str, user_agent: str = "slooze-b2b-crawler") -> bool:
-    from urllib.parse import urlparse
-    parsed = urlparse(url); origin = f"{parsed.scheme}://{parsed.netloc}"
-    rp = _get_parser(origin)
-    try: return bool(rp.can_fetch(user_agent, url))
-    except Exception: return False
+import asyncio, hashlib, json, os, re, time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_AGENT = "slooze-b2b-crawler"
+
+
+class RobotsDisallowed(Exception):
+    """Raised by the fetchers for URLs robots.txt does not allow."""
+
+    def __init__(self, url: str):
+        super().__init__(f"blocked by robots.txt: {url}")
+        self.url = url
+
+
+@dataclass
+class RobotsRules:
+    rules: List[Tuple[int, bool, "re.Pattern"]] = field(default_factory=list)  # (len, allow, regex)
+    crawl_delay: Optional[float] = None
+    disallow_all: bool = False
+
+    def can_fetch(self, path: str) -> bool:
+        if self.disallow_all:
+            return False
+        if path == "/robots.txt":
+            return True
+        # rules are sorted longest first (allow before disallow on ties)
+        for _, allow, rx in self.rules:
+            if rx.match(path):
+                return allow
+        return True
+
+
+def _pattern(p: str) -> "re.Pattern":
+    anchored = p.endswith("$")
+    body = re.escape(p[:-1] if anchored else p).replace(r"\*", ".*")
+    return re.compile(body + ("$" if anchored else ""))
+
+
+def parse_robots(text: str, agent: str = DEFAULT_AGENT) -> RobotsRules:
+    """Rules for ``agent`` (its own groups if any, else ``*``), with ``*``/``$`` wildcards."""
+    agent = agent.lower()
+    groups: List[Tuple[List[str], List[Tuple[str, str]]]] = []
+    in_agents = False
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        key, val = (s.strip() for s in line.split(":", 1))
+        key = key.lower()
+        if key == "user-agent":
+            if not in_agents:
+                groups.append(([], []))
+            groups[-1][0].append(val.lower())
+            in_agents = True
+        elif groups:
+            in_agents = False
+            if key in ("allow", "disallow", "crawl-delay"):
+                groups[-1][1].append((key, val))
+    mine = [g for g in groups if any(a != "*" and a in agent for a in g[0])]
+    chosen = mine or [g for g in groups if "*" in g[0]]
+    out = RobotsRules()
+    for _, lines in chosen:
+        for key, val in lines:
+            if key == "crawl-delay":
+                try:
+                    out.crawl_delay = max(out.crawl_delay or 0.0, float(val))
+                except ValueError:
+                    pass
+            elif val:
+                out.rules.append((len(val), key == "allow", _pattern(val)))
+    out.rules.sort(key=lambda r: (-r[0], not r[1]))
+    return out
+
+
+def _origin(url: str) -> Tuple[str, str]:
+    u = urlsplit(url)
+    return f"{u.scheme}://{u.netloc}".lower(), (u.path or "/") + (f"?{u.query}" if u.query else "")
+
+
+class RobotsCache:
+    """
+    Per-origin robots.txt rules with TTL, optional on-disk persistence
+    (``root``) and a callback fired whenever an origin's rules are (re)loaded,
+    which the crawl uses to apply ``Crawl-delay`` to its per-host pacing.
+    """
+
+    def __init__(self, root: Optional[os.PathLike] = None, agent: str = DEFAULT_AGENT,
+                 ttl_seconds: float = 86400.0, error_ttl: float = 600.0,
+                 on_rules: Optional[Callable[[str, RobotsRules], None]] = None):
+        self.root = os.fspath(root) if root is not None else None
+        self.agent = agent
+        self.ttl = float(ttl_seconds)
+        self.error_ttl = float(error_ttl)
+        self.on_rules = on_rules
+        self._rules: Dict[str, Tuple[float, RobotsRules]] = {}   # origin -> (expires, rules)
+        self._loading: Dict[str, asyncio.Future] = {}
+        self.fetches = 0
+        self.blocked = 0
+
+    @classmethod
+    def from_settings(cls, settings: Optional[dict], root: Optional[os.PathLike] = None, **kw) -> "RobotsCache":
+        rb = (settings or {}).get("robots") or {}
+        return cls(root, agent=rb.get("user_agent", DEFAULT_AGENT),
+                   ttl_seconds=float(rb.get("ttl_seconds", 86400)),
+                   error_ttl=float(rb.get("error_ttl_seconds", 600)), **kw)
+
+    # ---- persistence ----
+    def _file(self, origin: str) -> Optional[str]:
+        if self.root is None:
+            return None
+        return os.path.join(self.root, hashlib.blake2b(origin.encode(), digest_size=10).hexdigest() + ".json")
+
+    def _load_disk(self, origin: str) -> Optional[Tuple[float, RobotsRules]]:
+        path = self._file(origin)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                d = json.load(f)
+        except (OSError, ValueError, TypeError):
+            return None
+        if d.get("expires", 0) <= time.time():
+            return None
+        return d["expires"], self._rules_for(d.get("status"), d.get("body", ""))
+
+    def _save_disk(self, origin: str, status: Optional[int], body: str, expires: float) -> None:
+        path = self._file(origin)
+        if path is None:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"origin": origin, "status": status, "body": body, "expires": expires}, f)
+        os.replace(tmp, path)
+
+    # ---- fetching ----
+    def _rules_for(self, status: Optional[int], body: str) -> RobotsRules:
+        if status is not None and 200 <= status < 300:
+            return parse_robots(body, self.agent)
+        if status is not None and 400 <= status < 500:
+            return RobotsRules()
+        return RobotsRules(disallow_all=True)
+
+    async def _fetch(self, session, origin: str) -> Tuple[float, RobotsRules]:
+        from src.common.cache import CacheMiss
+
+        status, body = None, ""
+        self.fetches += 1
+        try:
+            r = await session.get(f"{origin}/robots.txt", headers={"user-agent": self.agent})
+            status, body = r.status_code, r.text
+        except CacheMiss:
+            # offline replay: nothing cached, nothing to enforce
+            return time.time() + self.error_ttl, RobotsRules()
+        except Exception as e:
+            print(f"[robots] {origin}: fetch failed -> {e}")
+        ok = status is not None and status < 500
+        expires = time.time() + (self.ttl if ok else self.error_ttl)
+        self._save_disk(origin, status, body, expires)
+        return expires, self._rules_for(status, body)
+
+    async def rules(self, session, url: str) -> RobotsRules:
+        origin, _ = _origin(url)
+        hit = self._rules.get(origin)
+        if hit is not None and hit[0] > time.time():
+            return hit[1]
+        fut = self._loading.get(origin)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        fut = self._loading[origin] = asyncio.get_running_loop().create_future()
+        try:
+            hit = self._load_disk(origin) or await self._fetch(session, origin)
+            self._rules[origin] = hit
+            if self.on_rules is not None:
+                self.on_rules(urlsplit(origin).netloc, hit[1])
+            fut.set_result(hit[1])
+            return hit[1]
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._loading[origin]
+
+    async def allowed(self, session, url: str) -> bool:
+        rules = await self.rules(session, url)
+        ok = rules.can_fetch(_origin(url)[1])
+        if not ok:
+            self.blocked += 1
+        return ok
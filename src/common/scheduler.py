@@ -0,0 +1,132 @@
+from __future__ import annotations
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from src.common.util import jittered_delay
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+class _HostLane:
+    """Work queue plus worker pool for a single host."""
+
+    def __init__(self, host: str, concurrency: int, base_delay: float, jitter: float):
+        self.host = host
+        self.concurrency = max(1, int(concurrency))
+        self.base_delay = float(base_delay)
+        self.jitter = float(jitter)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.workers: list[asyncio.Task] = []
+
+
+class HostScheduler:
+    """
+    Per-host crawl scheduler.
+
+    Every task carries a ``url``; tasks are routed to a queue for that URL's
+    host and drained by ``concurrency`` asyncio workers per host. Each worker
+    sleeps a jittered politeness delay after every request, so different hosts
+    crawl in parallel while each host sees at most ``concurrency`` requests in
+    flight.
+
+    With ``pacing=False`` the fixed delay is skipped; the crawl does that when
+    the HTTP session's adaptive rate limiter is pacing each host instead.
+
+    Handlers may ``submit`` follow-up tasks while the scheduler is running;
+    ``join`` returns once every queue is drained.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        concurrency_per_domain: int = 2,
+        base_delay: float = 1.2,
+        jitter: float = 1.0,
+        per_host: Optional[Dict[str, dict]] = None,
+        pacing: bool = True,
+    ):
+        self.handler = handler
+        self.pacing = bool(pacing)
+        self.concurrency = int(concurrency_per_domain)
+        self.base_delay = float(base_delay)
+        self.jitter = float(jitter)
+        self.per_host = {k.lower(): v or {} for k, v in (per_host or {}).items()}
+        self._lanes: Dict[str, _HostLane] = {}
+        self._min_delay: Dict[str, float] = {}
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    # -------------------- helpers --------------------
+
+    def _lane(self, host: str) -> _HostLane:
+        lane = self._lanes.get(host)
+        if lane is None:
+            opts = self.per_host.get(host, {})
+            lane = _HostLane(
+                host,
+                concurrency=opts.get("concurrency", self.concurrency),
+                base_delay=opts.get("base_delay_seconds", self.base_delay),
+                jitter=opts.get("jitter_seconds", self.jitter),
+            )
+            lane.base_delay = max(lane.base_delay, self._min_delay.get(host, 0.0))
+            for _ in range(lane.concurrency):
+                lane.workers.append(asyncio.create_task(self._worker(lane)))
+            self._lanes[host] = lane
+        return lane
+
+    async def _worker(self, lane: _HostLane) -> None:
+        while True:
+            task = await lane.queue.get()
+            try:
+                await self.handler(task)
+            except Exception as e:
+                print(f"[scheduler] {lane.host}: task failed: {getattr(task, 'url', task)} -> {e}")
+            finally:
+                lane.queue.task_done()
+                self.release()
+            if self.pacing:
+                await asyncio.sleep(jittered_delay(lane.base_delay, lane.jitter))
+
+    # -------------------- public API --------------------
+
+    def submit(self, task: Any) -> None:
+        """Queue ``task`` on its host lane. Must be called from the running loop."""
+        lane = self._lane(host_of(task.url))
+        self._pending += 1
+        self._idle.clear()
+        lane.queue.put_nowait(task)
+
+    def set_min_delay(self, host: str, seconds: float) -> None:
+        """Never pace ``host`` faster than one request per ``seconds`` per worker (robots Crawl-delay)."""
+        self._min_delay[host] = float(seconds)
+        lane = self._lanes.get(host)
+        if lane is not None:
+            lane.base_delay = max(lane.base_delay, float(seconds))
+
+    def hold(self) -> None:
+        """Keep ``join`` waiting for out-of-band work (e.g. parsing in another process)."""
+        self._pending += 1
+        self._idle.clear()
+
+    def release(self) -> None:
+        self._pending -= 1
+        if self._pending == 0:
+            self._idle.set()
+
+    async def join(self) -> None:
+        """Wait until all submitted (and follow-up) tasks are done, then stop workers."""
+        try:
+            await self._idle.wait()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        workers = [w for lane in self._lanes.values() for w in lane.workers]
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._lanes.clear()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+import typing
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from src.common.models import ProductItem
+
+# low-cardinality text columns stored dictionary-encoded
+DICTIONARY_COLUMNS = ("site", "category", "currency")
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError as e:
+        raise ImportError("Parquet output needs the optional 'pyarrow' package (pip install pyarrow)") from e
+
+
+def _unwrap(tp):
+    # Optional[X] -> X
+    args = [a for a in typing.get_args(tp) if a is not type(None)]
+    return args[0] if typing.get_origin(tp) is typing.Union and len(args) == 1 else tp
+
+
+def product_schema():
+    """Arrow schema derived from ``ProductItem``'s field annotations."""
+    pa = require_pyarrow()
+    fields = []
+    for name, info in ProductItem.model_fields.items():
+        tp = _unwrap(info.annotation)
+        if name in DICTIONARY_COLUMNS:
+            t = pa.dictionary(pa.int32(), pa.string())
+        elif tp is float:
+            t = pa.float64()
+        elif tp is int:
+            t = pa.int64()
+        elif tp is datetime:
+            t = pa.timestamp("us")
+        elif typing.get_origin(tp) in (list, List):
+            t = pa.list_(pa.string())
+        else:
+            t = pa.string()
+        fields.append(pa.field(name, t, nullable=name not in ("site", "category")))
+    return pa.schema(fields)
+
+
+def clean_schema():
+    """``product_schema`` plus the columns ``clean`` adds (``cluster_id``)."""
+    pa = require_pyarrow()
+    return product_schema().append(pa.field("cluster_id", pa.string()))
+
+
+TIMESTAMP_COLUMNS = tuple(
+    n for n, f in ProductItem.model_fields.items() if _unwrap(f.annotation) is datetime
+)
+
+
+def coerce_row(row: dict) -> dict:
+    """Make a JSON-decoded row fit ``product_schema`` (ISO strings -> datetime)."""
+    for c in TIMESTAMP_COLUMNS:
+        v = row.get(c)
+        if isinstance(v, str):
+            row[c] = _parse_ts(v)
+    return row
+
+
+def _parse_ts(v: str) -> Optional[datetime]:
+    try:
+        dt = datetime.fromisoformat(v.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
@@ -0,0 +1,46 @@
+"""
+Chart rendering for the EDA report, run in worker processes.
+
+Kept free of pandas and of the rest of the package so a spawned worker only
+imports matplotlib (with the non-interactive Agg backend). Each chart is a
+plain dict spec of already-aggregated data; ``render`` writes the PNG
+atomically and returns its path.
+"""
+from __future__ import annotations
+import os
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+
+def _bar(ax, spec: dict) -> None:
+    labels = [str(x) for x in spec["labels"]]
+    ax.bar(range(len(labels)), spec["values"])
+    ax.set_xticks(range(len(labels)), labels, rotation=90)
+
+
+def _hist(ax, spec: dict) -> None:
+    edges = spec["edges"]
+    ax.stairs(spec["counts"], edges, fill=True)
+    ax.set_xlabel(spec.get("xlabel") or "")
+    ax.set_ylabel(spec.get("ylabel") or "")
+
+
+_KINDS = {"bar": _bar, "hist": _hist}
+
+
+def render(spec: dict) -> str:
+    fig, ax = plt.subplots()
+    try:
+        _KINDS[spec["kind"]](ax, spec)
+        ax.set_title(spec["title"])
+        fig.tight_layout()
+        path = spec["path"]
+        tmp = f"{path}.tmp.png"
+        fig.savefig(tmp)
+        os.replace(tmp, path)
+    finally:
+        plt.close(fig)
+    return path
@@ -1,103 +1,264 @@
-import os
-import json
+"""
+EDA report over the cleaned dataset.
+
+The input is streamed once in chunks (CSV, Parquet or JSONL, plain or
+compressed) into running aggregates: per-column value counters, the set
+of cluster ids and a uniform reservoir sample of at most
+``PRICE_SAMPLE`` lower-bound prices for the histogram (exact below that
+size). Memory grows with the number of distinct suppliers, locations and
+products, not with the row count. Summary tables go to ``EDA_DIR`` and
+the charts to ``ART_DIR`` (see ``src/paths.py``); the charts are rendered
+in a process pool with matplotlib's non-interactive Agg backend
+(``src/eda/charts.py``).
+
+Each run records a fingerprint of the input's content and the report
+settings in ``EDA_DIR/.eda_state.json``. When nothing changed and every
+output is still on disk, ``run`` returns without reading the data again,
+so repeated ``/run`` jobs over the same clean file skip EDA entirely.
+"""
+from __future__ import annotations
+import hashlib, json, os, time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
+from src.common.prices import normalize_prices
 
-def _ensure_dirs():
-    os.makedirs("data/eda", exist_ok=True)
-    os.makedirs("artifacts/eda", exist_ok=True)
+EDA_VERSION = 3  # 3: price histogram from a bounded sample
+STATE_FILE = ".eda_state.json"
+COUNTED = ("site", "category", "supplier_name", "supplier_location")
+PRICE_COLS = ("price_min", "price_max", "price_text")
+HIST_BINS = 30
+CHUNK_ROWS = 100_000
+PRICE_SAMPLE = 200_000
 
+PathLike = Union[str, Path]
 
-def _read_any(path: str) -> pd.DataFrame:
-    if path.endswith(".jsonl"):
-        rows = []
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                rows.append(json.loads(line))
-        return pd.DataFrame(rows)
-    return pd.read_csv(path)
-
-
-def _norm_price(row):
-    lo = row.get("price_min")
-    hi = row.get("price_max")
-    if pd.isna(lo) and pd.isna(hi) and isinstance(row.get("price_text"), str):
-        # very rough parse for ranges like "$10 - $15" or "₹ 3,50,000 / Piece"
-        import re
-        nums = re.findall(r"[0-9]+(?:[.,][0-9]+)*", row["price_text"])
-        nums = [x.replace(",", "") for x in nums]
-        if nums:
-            nums = list(map(float, nums))
-            lo = min(nums)
-            hi = max(nums)
-    return pd.Series({"price_lo": lo, "price_hi": hi})
-
-
-def run(inp: str):
-    _ensure_dirs()
-    df = _read_any(inp)
-
-    if df.empty:
-        print("No data found.")
+
+@dataclass
+class EdaResult:
+    cached: bool
+    fingerprint: str
+    rows: int = 0
+    outputs: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+# -------------------- input --------------------
+
+def fingerprint(path: str, block: int = 1 << 20) -> str:
+    """Content digest of ``path`` plus the report version (clean rewrites files, so mtimes lie)."""
+    h = hashlib.blake2b(f"eda-v{EDA_VERSION}:bins={HIST_BINS}:sample={PRICE_SAMPLE}\x1f".encode(), digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            b = f.read(block)
+            if not b:
+                break
+            h.update(b)
+    return h.hexdigest()
+
+
+def _iter_frames(path: str):
+    wanted = set(COUNTED + PRICE_COLS + ("cluster_id",))
+    if path.endswith((".jsonl", ".jsonl.gz", ".jsonl.zst")):
+        from src.pipelines.clean import iter_chunks
+
+        for chunk in iter_chunks(path):
+            rows = [r for _, r in chunk if r is not None]
+            if rows:
+                yield pd.DataFrame.from_records(rows)
+        return
+    if path.endswith(".parquet"):
+        from src.common.schema import require_pyarrow
+
+        require_pyarrow()
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        cols = [c for c in pf.schema_arrow.names if c in wanted]
+        for batch in pf.iter_batches(batch_size=CHUNK_ROWS, columns=cols):
+            yield batch.to_pandas()
         return
+    yield from pd.read_csv(path, chunksize=CHUNK_ROWS, usecols=lambda c: c in wanted,
+                           dtype={c: str for c in COUNTED + ("price_text", "cluster_id")})
+
+
+def _price_bounds(df: pd.DataFrame) -> pd.DataFrame:
+    lo = pd.to_numeric(df["price_min"], errors="coerce") if "price_min" in df else pd.Series(float("nan"), index=df.index)
+    hi = pd.to_numeric(df["price_max"], errors="coerce") if "price_max" in df else pd.Series(float("nan"), index=df.index)
+    if "price_text" in df:
+        need = lo.isna() & hi.isna() & df["price_text"].notna()
+        if need.any():
+            norm = normalize_prices(df.loc[need, "price_text"])
+            lo = lo.fillna(norm["price_min"])
+            hi = hi.fillna(norm["price_max"])
+    return pd.DataFrame({"price_lo": lo, "price_hi": hi})
+
+
+# -------------------- aggregation --------------------
+
+class _Aggregates:
+    """Running totals for one pass over the input, chunk by chunk."""
+
+    def __init__(self):
+        self.rows = 0
+        self.present: set = set()
+        self.counts: Dict[str, Counter] = {c: Counter() for c in COUNTED}
+        self.clusters: Optional[set] = None
+        self.prices_seen = 0
+        self._sample = np.empty(0)
+        self._rng = np.random.default_rng(0)  # fixed seed: same input, same chart
+
+    def add(self, df: pd.DataFrame) -> None:
+        self.rows += len(df)
+        for c in COUNTED:
+            if c in df:
+                self.present.add(c)
+                counter = self.counts[c]
+                for k, n in df[c].value_counts(dropna=False).items():
+                    counter[None if k != k else k] += int(n)  # one key for NaN across chunks
+        if "cluster_id" in df:
+            if self.clusters is None:
+                self.clusters = set()
+            self.clusters.update(df["cluster_id"].dropna().unique())
+        self._add_prices(_price_bounds(df)["price_lo"].dropna().to_numpy(dtype=float))
 
-    price = df.apply(_norm_price, axis=1)
-    df["price_lo"] = price["price_lo"]
-    df["price_hi"] = price["price_hi"]
-
-    # summaries
-    pd.Series(
-        {
-            "n_rows": len(df),
-            "sites": df["site"].value_counts(dropna=False).to_dict()
-            if "site" in df
-            else {},
-            "categories": df["category"].value_counts(dropna=False)
-            .head(20)
-            .to_dict()
-            if "category" in df
-            else {},
-        }
-    ).to_csv("data/eda/summary.csv")
-
-    if "supplier_name" in df:
-        df["supplier_name"].dropna().value_counts().head(20).to_csv(
-            "data/eda/top_suppliers.csv"
-        )
-
-    if "supplier_location" in df:
-        top = df["supplier_location"].dropna().value_counts().head(20)
-        top.to_csv("data/eda/top_regions.csv")
+    def _add_prices(self, lo: np.ndarray) -> None:
+        # reservoir sampling (Algorithm R), one chunk at a time
+        room = PRICE_SAMPLE - len(self._sample)
+        if room > 0:
+            self._sample = np.concatenate([self._sample, lo[:room]])
+        rest = lo[max(room, 0):]
+        if len(rest):
+            seen = np.arange(self.prices_seen + len(lo) - len(rest), self.prices_seen + len(lo)) + 1
+            j = (self._rng.random(len(rest)) * seen).astype(np.int64)
+            keep = j < PRICE_SAMPLE
+            self._sample[j[keep]] = rest[keep]  # repeated slots: the later value wins, as sequentially
+        self.prices_seen += len(lo)
+
+    def top(self, col: str, n: int, dropna: bool = True) -> pd.Series:
+        items = [(k, v) for k, v in self.counts[col].most_common() if not (dropna and k is None)][:n]
+        return pd.Series(dict(items), name="count", dtype="int64").rename_axis(col)
+
+    @property
+    def prices(self) -> np.ndarray:
+        """All lower-bound prices, or a uniform sample of ``PRICE_SAMPLE`` of them."""
+        return self._sample
+
+
+def _to_csv(obj: pd.Series, path: Path) -> str:
+    tmp = path.with_name(path.name + ".tmp")
+    obj.to_csv(tmp)
+    os.replace(tmp, path)
+    return str(path)
+
+
+# -------------------- charts --------------------
+
+def _chart_specs(agg: _Aggregates, art_dir: Path) -> List[dict]:
+    specs = []
+    if "supplier_location" in agg.present:
+        top = agg.top("supplier_location", 20)
         if len(top):
-            plt.figure()
-            top.plot(kind="bar")
-            plt.title("Top Supplier Locations")
-            plt.tight_layout()
-            plt.savefig("artifacts/eda/top_regions.png")
-            plt.close()
-
-    if "price_lo" in df:
-        vals = pd.to_numeric(df["price_lo"], errors="coerce").dropna()
-        if len(vals):
-            plt.figure()
-            plt.hist(vals, bins=30)
-            plt.title("Price (lower bound) distribution")
-            plt.xlabel("Price")
-            plt.ylabel("Frequency")
-            plt.tight_layout()
-            plt.savefig("artifacts/eda/price_lo_hist.png")
-            plt.close()
-
-    if "category" in df:
-        cats = df["category"].value_counts().head(15)
+            specs.append({"kind": "bar", "title": "Top Supplier Locations", "path": str(art_dir / "top_regions.png"),
+                          "labels": list(top.index), "values": top.tolist()})
+    prices = agg.prices
+    if len(prices):
+        # bin here so workers get 30 counts instead of the whole price column
+        counts, edges = np.histogram(prices, bins=HIST_BINS)
+        specs.append({"kind": "hist", "title": "Price (lower bound) distribution",
+                      "path": str(art_dir / "price_lo_hist.png"), "counts": counts.tolist(),
+                      "edges": edges.tolist(), "xlabel": "Price", "ylabel": "Frequency"})
+    if "category" in agg.present:
+        cats = agg.top("category", 15)
         if len(cats):
-            plt.figure()
-            cats.plot(kind="bar")
-            plt.title("Top Categories (by items)")
-            plt.tight_layout()
-            plt.savefig("artifacts/eda/top_categories.png")
-            plt.close()
+            specs.append({"kind": "bar", "title": "Top Categories (by items)", "path": str(art_dir / "top_categories.png"),
+                          "labels": list(cats.index), "values": cats.tolist()})
+    return specs
+
+
+def _render(specs: List[dict], workers: Optional[int]) -> List[str]:
+    if not specs:
+        return []
+    if workers is None:
+        workers = min(len(specs), os.cpu_count() or 1)
+    if workers <= 1:
+        from src.eda.charts import render
+
+        return [render(s) for s in specs]
+    # spawn: forking a process that runs an event loop and thread pools is not safe
+    with ProcessPoolExecutor(max_workers=min(workers, len(specs)), mp_context=get_context("spawn")) as pool:
+        from src.eda.charts import render
+
+        return list(pool.map(render, specs))
+
+
+# -------------------- run --------------------
+
+def _load_state(path: Path) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def run(inp: str, eda_dir: Optional[PathLike] = None, art_dir: Optional[PathLike] = None,
+        workers: Optional[int] = None, force: bool = False) -> EdaResult:
+    """
+    Write the EDA tables and charts for ``inp``, or reuse the previous ones
+    when the input is unchanged (``force`` recomputes). ``workers=0`` renders
+    charts in this process; the default uses up to one process per chart.
+    """
+    if eda_dir is None or art_dir is None:
+        from src.paths import ART_DIR, EDA_DIR
+
+        eda_dir = EDA_DIR if eda_dir is None else eda_dir
+        art_dir = ART_DIR if art_dir is None else art_dir
+    eda_dir, art_dir = Path(eda_dir), Path(art_dir)
+    eda_dir.mkdir(parents=True, exist_ok=True)
+    art_dir.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    state_path = eda_dir / STATE_FILE
+    fp = fingerprint(inp)
+    state = _load_state(state_path)
+    if (not force and state.get("fingerprint") == fp and state.get("art_dir") == str(art_dir)
+            and state.get("outputs") and all(os.path.exists(p) for p in state["outputs"])):
+        return EdaResult(cached=True, fingerprint=fp, rows=state.get("rows", 0), outputs=state["outputs"],
+                         seconds=time.perf_counter() - t0)
+
+    agg = _Aggregates()
+    for df in _iter_frames(inp):
+        agg.add(df)
+    if not agg.rows:
+        print("No data found.")
+        return EdaResult(cached=False, fingerprint=fp, seconds=time.perf_counter() - t0)
+
+    outputs = []
+    summary = pd.Series({
+        "n_rows": agg.rows,
+        # near-duplicate listings share a cluster_id (see src/pipelines/dedupe.py)
+        "n_unique_products": len(agg.clusters) if agg.clusters is not None else agg.rows,
+        "sites": dict(agg.counts["site"].most_common()) if "site" in agg.present else {},
+        "categories": dict(agg.counts["category"].most_common(20)) if "category" in agg.present else {},
+    })
+    outputs.append(_to_csv(summary, eda_dir / "summary.csv"))
+    if "supplier_name" in agg.present:
+        outputs.append(_to_csv(agg.top("supplier_name", 20), eda_dir / "top_suppliers.csv"))
+    if "supplier_location" in agg.present:
+        outputs.append(_to_csv(agg.top("supplier_location", 20), eda_dir / "top_regions.csv"))
+    outputs += _render(_chart_specs(agg, art_dir), workers)
 
+    tmp = state_path.with_name(state_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fp, "input": os.path.abspath(inp), "art_dir": str(art_dir), "rows": agg.rows,
+                   "outputs": outputs, "created_at": time.time()}, f, indent=2)
+    os.replace(tmp, state_path)
+    return EdaResult(cached=False, fingerprint=fp, rows=agg.rows, outputs=outputs, seconds=time.perf_counter() - t0)
@@ -7,6 +7,8 @@ BASE = Path(os.getenv("DATA_DIR", "data")).resolve()
 RAW_DIR = BASE / "raw"
 CLEAN_DIR = BASE / "clean"
 EDA_DIR = BASE / "eda"
+CACHE_DIR = BASE / "cache"
+STATE_DIR = BASE / "state"
 
 # charts; fine to live in app image path
 ART_DIR = Path(os.getenv("ART_DIR", "artifacts/eda")).resolve()
@@ -17,3 +19,8 @@ for d in (RAW_DIR, CLEAN_DIR, EDA_DIR, ART_DIR):
 # canonical files
 RAW_JSONL = RAW_DIR / "products.jsonl"
 CLEAN_CSV = CLEAN_DIR / "products.csv"
+RAW_PARQUET = RAW_DIR / "products.parquet"
+CLEAN_PARQUET = CLEAN_DIR / "products.parquet"
+FRONTIER_DB = STATE_DIR / "frontier.sqlite"
+INDEX_DB = STATE_DIR / "index.sqlite"
+SNAPSHOT_DIR = BASE / "snapshots"  # listing HTML archive for `reparse` (crawl --snapshots)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+import json, os, time
+from typing import Optional
+
+
+def checkpoint_path(out: str) -> str:
+    """Checkpoints live next to the output they describe."""
+    return f"{out}.checkpoint.json"
+
+
+class Checkpointer:
+    """
+    Atomic JSON checkpoint for a crawl run.
+
+    A checkpoint records the byte offset of the output file at the moment it
+    was taken and every task that had not finished yet (follow-up pages with
+    their listing's pagination state). Everything before the offset was
+    produced by finished tasks, so resuming means: truncate the output back
+    to the offset, then re-run the pending tasks. Records flushed after the
+    checkpoint are dropped and re-fetched, never duplicated.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, interval: float = 30.0):
+        self.path = path
+        self.interval = float(interval)
+
+    def save(self, state: dict) -> None:
+        state = {**state, "version": self.VERSION, "updated_at": time.time()}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def load(self) -> Optional[dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("version") != self.VERSION:
+            return None
+        return state
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def truncate_to(path: str, offset: int) -> None:
+    """Drop anything written to ``path`` after ``offset`` (a checkpointed file size)."""
+    if os.path.exists(path) and os.path.getsize(path) > offset:
+        with open(path, "r+b") as f:
+            f.truncate(offset)
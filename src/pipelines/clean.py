@@ -0,0 +1,255 @@
+from __future__ import annotations
+import csv, hashlib, os, zlib
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+
+from src.common.models import ProductItem
+from src.common.schema import require_pyarrow
+from src.common.prices import normalize_prices
+from src.pipelines.dedupe import NearDupIndex, canonical_url, simhash, supplier_hash, url_key
+from src.pipelines.write_jsonl import open_jsonl
+
+COLUMNS: List[str] = list(ProductItem.model_fields) + ["cluster_id"]
+
+
+@dataclass
+class CleanStats:
+    read: int = 0
+    bad_lines: int = 0
+    invalid: int = 0
+    written: int = 0
+    clusters: int = 0
+
+    @property
+    def near_duplicates(self) -> int:
+        return self.written - self.clusters
+
+    @property
+    def duplicates(self) -> int:
+        return self.read - self.bad_lines - self.invalid - self.written
+
+
+def row_key(row: dict) -> int:
+    """64-bit digest of the dedupe key: canonical product_page_url, else (title, site)."""
+    url = url_key(row.get("product_page_url"), row.get("url"))
+    raw = f"u\x1f{url}" if url else f"t\x1f{row.get('title')}\x1f{row.get('site')}"
+    return int.from_bytes(hashlib.blake2b(raw.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def iter_chunks(path: str, chunk_bytes: int = 4 << 20) -> Iterator[List[Tuple[int, Optional[dict]]]]:
+    """
+    Yield lists of ``(row_no, row)`` roughly ``chunk_bytes`` at a time from a
+    JSONL (plain, ``.gz`` or ``.zst``) or Parquet file. Undecodable JSON
+    lines come back as ``None``.
+    """
+    if path.endswith(".parquet"):
+        yield from _iter_parquet(path)
+        return
+    line_no = 0
+    with open_jsonl(path) as f:
+        while True:
+            lines = f.readlines(chunk_bytes)
+            if not lines:
+                return
+            chunk = []
+            for line in lines:
+                if line.strip():
+                    try:
+                        chunk.append((line_no, orjson.loads(line)))
+                    except orjson.JSONDecodeError:
+                        chunk.append((line_no, None))
+                line_no += 1
+            yield chunk
+
+
+def _iter_parquet(path: str, batch_size: int = 20_000):
+    require_pyarrow()
+    import pyarrow.parquet as pq
+
+    row_no = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        rows = batch.to_pylist()
+        yield list(enumerate(rows, start=row_no))
+        row_no += len(rows)
+
+
+def validate_rows(rows: List[dict], keep: Tuple[str, ...] = ()) -> Tuple[List[dict], List[int]]:
+    """
+    Type-check crawl records against ``ProductItem`` (the crawl writes
+    unvalidated ``ProductRecord`` dicts). Returns the JSON-mode dumps of the
+    valid rows, with the non-model columns in ``keep`` carried over, and the
+    positions of the rejected ones in ``rows``.
+    """
+    ok, bad = [], []
+    validate = ProductItem.model_validate
+    for i, r in enumerate(rows):
+        try:
+            d = validate(r).model_dump(mode="json")
+        except ValidationError:
+            bad.append(i)
+            continue
+        for k in keep:
+            d[k] = r.get(k)
+        ok.append(d)
+    return ok, bad
+
+
+def _none_if_nan(v):
+    return None if v is None or v != v else v
+
+
+def normalize_rows(rows: List[dict]) -> List[dict]:
+    """Fill price_min/price_max/currency/unit for a chunk with one vectorized pass."""
+    need = [r for r in rows
+            if r.get("price_min") is None and r.get("price_max") is None and r.get("price_text")]
+    if not need:
+        return rows
+    import pandas as pd
+
+    norm = normalize_prices(pd.Series([r["price_text"] for r in need]))
+    for r, lo, hi, cur, unit in zip(need, norm["price_min"].tolist(), norm["price_max"].tolist(),
+                                    norm["currency"].tolist(), norm["unit"].tolist()):
+        r["price_min"], r["price_max"] = _none_if_nan(lo), _none_if_nan(hi)
+        r["currency"] = r.get("currency") or _none_if_nan(cur)
+        r["unit"] = r.get("unit") or _none_if_nan(unit)
+    return rows
+
+
+def _cell(v):
+    if v is None:
+        return ""
+    if isinstance(v, (list, dict)):
+        return orjson.dumps(v).decode("utf-8")
+    return v
+
+
+class _CsvSink:
+    def __init__(self, path: str):
+        self.f = open(path, "w", encoding="utf-8", newline="")
+        self.w = csv.writer(self.f)
+        self.w.writerow(COLUMNS)
+
+    def write_rows(self, rows: List[dict]) -> None:
+        self.w.writerows([_cell(r.get(c)) for c in COLUMNS] for r in rows)
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class _ParquetSink:
+    def __init__(self, path: str):
+        from src.common.schema import clean_schema
+        from src.pipelines.write_parquet import ParquetWriter
+        self.w = ParquetWriter(path, schema=clean_schema())
+
+    def write_rows(self, rows: List[dict]) -> None:
+        for r in rows:
+            self.w.write_one(r)
+
+    def close(self) -> None:
+        self.w.close()
+
+
+def stream_clean(inp: str, out: str, chunk_bytes: int = 4 << 20,
+                 near_dups: bool = True, max_distance: int = 3) -> CleanStats:
+    """
+    Dedupe and normalize a raw crawl (JSONL or Parquet) into CSV or Parquet
+    (by ``out`` extension) in bounded memory.
+
+    Pass 1 maps each row's 64-bit key digest (canonical URL, see
+    ``src/pipelines/dedupe.py``) to the row number of its last occurrence
+    (incremental crawls append newer copies, so the latest wins) and, with
+    ``near_dups``, keeps the title SimHash and supplier digest of that copy.
+    The unique products are then clustered; every written row carries a
+    ``cluster_id`` shared by its near duplicates (its own key otherwise).
+    Pass 2 streams the file again in chunks, validates only those rows
+    against ``ProductItem`` (rejects are counted as ``invalid``) and writes
+    them. Memory is proportional to the number of unique products, not rows.
+    Only if some latest copies were rejected, a third pass looks for the
+    newest valid earlier copy of just those products and writes it instead,
+    so a bad incremental append does not lose them.
+    """
+    stats = CleanStats()
+    last: Dict[int, int] = {}
+    sigs: Dict[int, Tuple[int, int, int]] = {}
+    for chunk in iter_chunks(inp, chunk_bytes):
+        keyed = []
+        for row_no, row in chunk:
+            stats.read += 1
+            if row is None:
+                stats.bad_lines += 1
+                continue
+            k = row_key(row)
+            last[k] = row_no
+            keyed.append((k, row))
+        if near_dups and keyed:
+            # only hash titles that are new for their key (re-crawled listings mostly aren't)
+            fresh = []
+            for k, row in keyed:
+                title = row.get("title") or ""
+                tag = zlib.crc32(title.encode("utf-8", "replace"))
+                seen = sigs.get(k)
+                if seen is None or seen[2] != tag:
+                    fresh.append((k, row, tag))
+            hashes = simhash([row.get("title") for _, row, _ in fresh]).tolist()
+            for (k, row, tag), h in zip(fresh, hashes):
+                sigs[k] = (h, supplier_hash(row.get("supplier_name")), tag)
+
+    clusters: Dict[int, str] = {}
+    if near_dups:
+        index = NearDupIndex(max_distance=max_distance)
+        for k, (h, sup, _) in sigs.items():
+            index.add(k, h, sup)
+        del sigs
+        clusters = index.clusters()
+    # pass 2 looks rows up by number, so keys are never recomputed
+    keep_rows = {row_no: k for k, row_no in last.items()}
+    del last
+
+    def prepare(row: dict, k: int) -> dict:
+        row["product_page_url"] = canonical_url(row.get("product_page_url"), row.get("url"))
+        row["cluster_id"] = clusters.get(k) or format(k, "016x")
+        return row
+
+    written_ids = set()
+    rejected: Dict[int, int] = {}  # key -> row number of its rejected latest copy
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    sink = _ParquetSink(out) if out.endswith(".parquet") else _CsvSink(out)
+
+    def write(rows: List[dict]) -> None:
+        rows = normalize_rows(rows)
+        sink.write_rows(rows)
+        stats.written += len(rows)
+        written_ids.update(r["cluster_id"] for r in rows)
+
+    try:
+        for chunk in iter_chunks(inp, chunk_bytes):
+            keep = [(row_no, keep_rows[row_no], row) for row_no, row in chunk
+                    if row is not None and row_no in keep_rows]
+            rows, bad = validate_rows([prepare(row, k) for _, k, row in keep], keep=("cluster_id",))
+            stats.invalid += len(bad)
+            rejected.update((keep[i][1], keep[i][0]) for i in bad)
+            write(rows)
+        if rejected:
+            # fall back to the newest valid earlier copy; only rows before the last rejection can hold one
+            fallback: Dict[int, dict] = {}
+            end = max(rejected.values())
+            for chunk in iter_chunks(inp, chunk_bytes):
+                for row_no, row in chunk:
+                    if row is None or row_no >= end:
+                        continue
+                    k = row_key(row)
+                    if row_no < rejected.get(k, -1):
+                        ok, _ = validate_rows([prepare(row, k)], keep=("cluster_id",))
+                        if ok:
+                            fallback[k] = ok[0]
+                if chunk and chunk[-1][0] >= end:
+                    break
+            write(list(fallback.values()))
+    finally:
+        sink.close()
+    stats.clusters = len(written_ids)
+    return stats
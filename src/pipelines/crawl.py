@@ -0,0 +1,645 @@
+from __future__ import annotations
+import asyncio, json, os, threading, time
+from collections import Counter
+from contextlib import AsyncExitStack
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from src.common.cache import ResponseCache
+from src.common.http import HttpSession
+from src.common.metrics import METRICS, Metrics
+from src.common.records import ProductRecord, utc_now_iso
+from src.common.robots import RobotsCache, RobotsRules
+from src.common.scheduler import HostScheduler
+from src.pipelines.checkpoint import Checkpointer
+from src.pipelines.dedupe import canonical_url, url_key
+from src.pipelines.enrich import Enricher
+from src.pipelines.frontier import Frontier, content_digest
+from src.pipelines.parse_pool import ParsePool
+from src.pipelines.snapshots import SnapshotArchive
+from src.pipelines.workqueue import WorkQueue, default_worker_id
+from src.sites.alibaba import AlibabaFetcher
+from src.sites.indiamart import IndiaMartFetcher
+from src.sites.pagination import Pagination
+
+
+@dataclass(frozen=True)
+class CrawlTask:
+    """One listing page to fetch. ``label`` becomes ``ProductRecord.category``."""
+    site: str                    # "indiamart" | "alibaba"
+    kind: str                    # "search" | "category" | "showroom"
+    url: str
+    label: str
+    query: Optional[str] = None
+    page: int = 1
+    chain: Optional[str] = None  # URL of the listing's first page (None on page 1)
+    # Pagination.state() of the listing so far, for a worker that has no local chain (queue mode)
+    pager: Optional[dict] = field(default=None, hash=False, compare=False)
+
+
+def plan_tasks(categories: List[dict], site: str, max_pages: int,
+               ind: Optional[IndiaMartFetcher] = None) -> List[CrawlTask]:
+    """Expand ``categories.yaml`` into page-level crawl tasks."""
+    ind = ind or IndiaMartFetcher()
+    tasks: List[CrawlTask] = []
+    for cat in categories:
+        if site in ("indiamart", "both"):
+            im = cat.get("indiamart", {}) or {}
+            # only page 1; the runner follows later pages until the results run out
+            for q in im.get("search_queries", []) or []:
+                tasks.append(CrawlTask("indiamart", "search", ind._build_search_url(q, 1),
+                                       label=q, query=q, page=1))
+            for url in im.get("category_urls", []) or []:
+                if url:
+                    tasks.append(CrawlTask("indiamart", "category", url, label=cat["slug"]))
+        if site in ("alibaba", "both"):
+            for url in (cat.get("alibaba", {}) or {}).get("showroom_urls", []) or []:
+                if url:
+                    tasks.append(CrawlTask("alibaba", "showroom", url, label=cat["slug"]))
+    return tasks
+
+
+class CrawlStopped(Exception):
+    """The runner's ``stop`` event was set; unfinished pages are left for a resume."""
+
+
+def task_key(task: CrawlTask) -> str:
+    """Identity of a page within a distributed run (the queue ignores a key it already has)."""
+    return f"{task.site}\x1f{task.kind}\x1f{task.label}\x1f{task.url}"
+
+
+class CrawlRunner:
+    """
+    Drives a full crawl: plans page tasks from the category config and fans
+    them out over a ``HostScheduler`` so each marketplace host is crawled
+    concurrently under its own cap and politeness delay. One pooled
+    ``HttpSession`` is opened per run and shared by both fetchers.
+
+    Every listing (search query, category or showroom) is paginated up to
+    ``max_pages``: after each page the runner follows the page's next link
+    (or, for searches, the next ``pg``) and stops early at the end of
+    results, i.e. a failed, empty or all-duplicate page or a vanished next
+    link (see ``src/sites/pagination.py``). With ``pagination.prefetch`` the
+    next search page is already requested while the current one is parsed.
+
+    With ``parse_workers > 0`` the raw HTML is handed to a ``ParsePool`` so
+    lxml work runs in separate processes and the loop keeps fetching.
+
+    With a ``Frontier`` attached every product URL is recorded across runs;
+    in ``incremental`` mode only new or changed products are written, and a
+    search query stops paginating once a page yields nothing but known ones.
+
+    With a ``Checkpointer`` the runner periodically saves the output offset
+    and all unfinished tasks, each with its listing's pagination state; pass the loaded state as ``resume`` to pick a
+    run back up (see ``src/pipelines/checkpoint.py``).
+
+    With ``enrich`` every new product is routed through an ``Enricher``
+    that fetches its detail page on a separate worker budget and writes the
+    merged record (see ``src/pipelines/enrich.py``).
+
+    Fetch, parse, item construction and write times plus request, byte,
+    retry, page and item counts go into ``metrics`` (a fresh ``Metrics``
+    per run that also feeds the process-wide ``METRICS``); ``report()``
+    turns them into the run report.
+
+    With a ``WorkQueue`` the runner is one worker of a distributed run
+    (``run_id``): it publishes the planned seed pages, then claims pages
+    from the queue under a lease instead of working through its own plan.
+    Follow-up pages go back into the queue. After each page its records are
+    flushed and the frontier committed before the page is marked done, so a
+    page is either redone or fully on disk. The session reserves per-host
+    request slots through the queue, so the rate limits hold across all
+    replicas. ``distributed:`` in settings tunes leases and claiming (see
+    ``src/pipelines/workqueue.py``).
+
+    With a ``SnapshotArchive`` every fetched listing page is archived before
+    it is parsed, so ``reparse`` can rebuild the output from it later (see
+    ``src/pipelines/snapshots.py``).
+
+    ``stop`` (a ``threading.Event``, so another thread can set it) is checked
+    before every page: once set, pages already in flight finish, queued ones
+    are left unfetched, and ``run`` saves a checkpoint and raises
+    ``CrawlStopped``. A queue worker stops claiming and lets its unfinished
+    leases expire to the other workers.
+    """
+
+    def __init__(self, settings: dict, writer, site: str = "both", max_pages: int = 2,
+                 proxy: Optional[str] = None, respect_robots: bool = True,
+                 parse_workers: int = 0, cache: Optional[ResponseCache] = None,
+                 frontier: Optional[Frontier] = None, incremental: bool = False,
+                 checkpointer: Optional[Checkpointer] = None, resume: Optional[dict] = None,
+                 robots: Optional[RobotsCache] = None, enrich: bool = False,
+                 metrics: Optional[Metrics] = None, queue: Optional[WorkQueue] = None,
+                 run_id: str = "default", worker_id: Optional[str] = None,
+                 archive: Optional[SnapshotArchive] = None, stop: Optional[threading.Event] = None):
+        self.settings = settings or {}
+        self.writer = writer
+        self.site = site
+        self.max_pages = max_pages
+        self.metrics = metrics if metrics is not None else Metrics(parent=METRICS)
+        self.session = HttpSession(self.settings, proxy=proxy, cache=cache, metrics=self.metrics, gate=queue)
+        self.robots = (robots or RobotsCache.from_settings(self.settings)) if respect_robots else None
+        if self.robots is not None:
+            self.robots.on_rules = self._on_robots
+        self.fetchers: Dict[str, object] = {
+            "indiamart": IndiaMartFetcher(self.settings, proxy=proxy, respect_robots=respect_robots,
+                                          session=self.session, robots=self.robots, metrics=self.metrics),
+            "alibaba": AlibabaFetcher(self.settings, proxy=proxy, respect_robots=respect_robots,
+                                      session=self.session, robots=self.robots, metrics=self.metrics),
+        }
+        self.parse_workers = int(parse_workers)
+        self._parse_pool: Optional[ParsePool] = None
+        self.frontier = frontier
+        self.incremental = bool(incremental and frontier is not None)
+        self.checkpointer = checkpointer
+        self.resume = resume
+        self._scheduler: Optional[HostScheduler] = None
+        self._inflight: Counter = Counter()
+        self.started_at: Optional[float] = None
+        self.pages_fetched = int((resume or {}).get("pages_fetched", 0))
+        self.items_written = int((resume or {}).get("items_written", 0))
+        self.items_skipped = 0
+        self.enrich = bool(enrich)
+        self.enricher: Optional[Enricher] = None
+        self.report_path: Optional[str] = None
+        self.queue = queue
+        self.run_id = run_id
+        self.worker_id = worker_id or default_worker_id()
+        dist = self.settings.get("distributed") or {}
+        self.lease_seconds = float(dist.get("lease_seconds", 120))
+        self.claim_batch = max(1, int(dist.get("claim_batch", 8)))
+        self.poll_seconds = float(dist.get("poll_seconds", 2.0))
+        self._leases: Dict[CrawlTask, int] = {}
+        self._slot_free: Optional[asyncio.Event] = None
+        self.pages_claimed = 0
+        self.merged_parts: Optional[int] = None
+        pg = self.settings.get("pagination") or {}
+        self.follow_next = bool(pg.get("follow_next", True))
+        # a prefetched page must be consumed by this process, not another queue worker
+        self.prefetch = bool(pg.get("prefetch", False)) and queue is None
+        self._chains: Dict[str, Pagination] = {}
+        self._prefetched: Dict[str, asyncio.Task] = {}
+        self.pagination_stops: Counter = Counter()
+        self.archive = archive
+        self.stop = stop
+
+    @property
+    def stopping(self) -> bool:
+        return self.stop is not None and self.stop.is_set()
+
+    def _on_robots(self, host: str, rules: RobotsRules) -> None:
+        # Crawl-delay caps the host's rate limiter (or stretches the fixed delay without one)
+        if not rules.crawl_delay:
+            return
+        if self.session.limiter is not None:
+            self.session.limiter.host(host).cap(1.0 / rules.crawl_delay)
+        if self._scheduler is not None:
+            self._scheduler.set_min_delay(host, rules.crawl_delay)
+
+    def _write(self, items: List[ProductRecord]) -> int:
+        """Write items (filtered through the frontier); returns how many were already known."""
+        known = 0
+        for item in items:
+            d = item.as_dict()
+            # same key as clean's row_key and the index: tracking-parameter variants are one product
+            key = url_key(d.get("product_page_url"), d.get("url")) if self.frontier is not None else None
+            if key:
+                if self.frontier.check(key, content_digest(d)) == "known":
+                    known += 1
+                    if self.incremental:
+                        self.items_skipped += 1
+                        self.metrics.inc("crawl_items_skipped_total", site=d.get("site"))
+                        continue
+            if self.enricher is not None and self.enricher.offer(d):
+                continue
+            self._emit(d)
+        return known
+
+    def _emit(self, d: dict) -> None:
+        with self.metrics.time("write_seconds"):
+            self.writer.write_one(d)
+        self.items_written += 1
+        self.metrics.inc("crawl_items_total", site=d.get("site"), category=d.get("category"))
+
+    # -------------------- pagination --------------------
+
+    def _guess_next(self, task: CrawlTask) -> Optional[str]:
+        # only search result URLs can be built without the page's next link
+        if task.kind != "search":
+            return None
+        return self.fetchers["indiamart"]._build_search_url(task.query, task.page + 1)
+
+    def _paginate(self, task: CrawlTask, items: List[ProductRecord], next_href: Optional[str],
+                  failed: bool, known: int) -> None:
+        key = task.chain or task.url
+        pager = self._chains.get(key)
+        if pager is None:
+            # in a distributed run the previous page may have been handled by another worker
+            pager = self._chains[key] = Pagination.from_state(self.max_pages, self.follow_next, task.pager)
+        guess = self._guess_next(task)
+        if self.incremental and items and known == len(items):
+            nxt, reason = None, "known"
+        else:
+            urls = None if failed else [i.product_page_url for i in items]
+            nxt, reason = pager.advance(task.url, task.page, urls, next_href, guess)
+        if guess and (nxt is None or canonical_url(nxt) != canonical_url(guess)):
+            self._drop_prefetch(guess)
+        if nxt is None:
+            del self._chains[key]
+            self.pagination_stops[reason] += 1
+            self.metrics.inc("crawl_pagination_stops_total", site=task.site, reason=reason)
+            return
+        state = None
+        if self.queue is not None:
+            # the next page may go to any worker, so it carries the listing's state instead
+            state = self._chains.pop(key).state()
+        self._submit(CrawlTask(task.site, task.kind, nxt, task.label, query=task.query,
+                               page=task.page + 1, chain=key, pager=state))
+
+    def _start_prefetch(self, task: CrawlTask) -> None:
+        url = self._guess_next(task) if self.prefetch and task.page < self.max_pages else None
+        if url and canonical_url(url) not in self._prefetched:
+            self._prefetched[canonical_url(url)] = asyncio.create_task(
+                self.fetchers[task.site].fetch_html(self.session, url))
+
+    def _drop_prefetch(self, url: str) -> None:
+        t = self._prefetched.pop(canonical_url(url), None)
+        if t is not None:
+            t.cancel()
+            self.metrics.inc("crawl_prefetch_wasted_total")
+
+    async def _fetch(self, task: CrawlTask) -> Optional[str]:
+        pre = self._prefetched.pop(canonical_url(task.url), None) if self._prefetched else None
+        if pre is not None:
+            self.metrics.inc("crawl_prefetch_used_total", site=task.site)
+            return await pre
+        return await self.fetchers[task.site].fetch_html(self.session, task.url)
+
+    def _submit(self, task: CrawlTask) -> None:
+        if self.queue is not None:
+            # any worker of the run may take it
+            self.queue.publish(self.run_id, [(task_key(task), asdict(task))])
+            return
+        self._inflight[task] += 1
+        self._scheduler.submit(task)
+
+    def _after_page(self, task: CrawlTask, items: List[ProductRecord], next_href: Optional[str] = None,
+                    failed: bool = False) -> None:
+        # runs without awaiting: writing, chaining and marking the task done
+        # happen atomically with respect to checkpoints
+        known = self._write(items)
+        self._paginate(task, items, next_href, failed, known)
+        self._inflight[task] -= 1
+        if self._inflight[task] <= 0:
+            del self._inflight[task]
+        if self.queue is not None:
+            self._finish_lease(task)
+
+    # -------------------- distributed --------------------
+
+    def _finish_lease(self, task: CrawlTask, error: Optional[BaseException] = None) -> None:
+        task_id = self._leases.pop(task, None)
+        if task_id is None:
+            return
+        if error is not None:
+            self.queue.fail(self.run_id, self.worker_id, task_id, f"{type(error).__name__}: {error}")
+        else:
+            # the page's records must be on disk before anyone sees it done
+            self.writer.flush()
+            if self.frontier is not None:
+                self.frontier.commit()
+            if self.archive is not None:
+                self.archive.commit()
+            self.queue.complete(self.run_id, self.worker_id, task_id)
+        self._slot_free.set()
+
+    async def _feed(self) -> None:
+        """Claim pages from the queue while there is room, until the whole run is drained."""
+        try:
+            while not self.stopping:
+                self._slot_free.clear()
+                free = self.claim_batch - len(self._leases)
+                if free > 0:
+                    claimed = self.queue.claim(self.run_id, self.worker_id, free, self.lease_seconds)
+                    for task_id, payload in claimed:
+                        task = CrawlTask(**payload)
+                        self._leases[task] = task_id
+                        self._inflight[task] += 1
+                        self._scheduler.submit(task)
+                    self.pages_claimed += len(claimed)
+                    if len(claimed) == free:
+                        continue
+                    if not claimed and not self._leases and not self.queue.active(self.run_id):
+                        return
+                try:
+                    await asyncio.wait_for(self._slot_free.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._scheduler.release()
+
+    async def _renew_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            self.queue.renew(self.run_id, self.worker_id, list(self._leases.values()), self.lease_seconds)
+
+    def checkpoint(self) -> None:
+        if self.checkpointer is None:
+            return
+        self.writer.flush(fsync=True)
+        self.checkpointer.save({
+            "offset": self.writer.tell(),
+            "site": self.site,
+            "max_pages": self.max_pages,
+            "incremental": self.incremental,
+            "enrich": self.enrich,
+            "pending": [self._task_state(t) for t in self._inflight.elements()],
+            "enrich_pending": self.enricher.pending() if self.enricher is not None else [],
+            "pages_fetched": self.pages_fetched,
+            "items_written": self.items_written,
+        })
+        if self.frontier is not None:
+            self.frontier.commit()
+
+    def _task_state(self, task: CrawlTask) -> dict:
+        # a follow-up page takes its listing's pagination state along, so a resumed run
+        # keeps duplicate and loop detection where it left off
+        d = asdict(task)
+        pager = self._chains.get(task.chain or task.url)
+        if pager is not None:
+            d["pager"] = pager.state()
+        return d
+
+    async def _checkpoint_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.checkpointer.interval)
+            self.checkpoint()
+
+    async def _on_records(self, task: CrawlTask, records: List[dict], next_href: Optional[str]) -> None:
+        try:
+            with self.metrics.time("build_items_seconds", site=task.site):
+                now = utc_now_iso()
+                items = [ProductRecord(site=task.site, category=task.label, url=task.url, scraped_at=now, **rec)
+                         for rec in records]
+            self._after_page(task, items, next_href)
+        finally:
+            self._scheduler.release()
+
+    async def _handle(self, task: CrawlTask) -> None:
+        if self.stopping:
+            return  # stays in _inflight (and leased), so the checkpoint keeps it
+        try:
+            await self._handle_page(task)
+        except Exception as e:
+            if self.queue is not None:
+                self._finish_lease(task, e)
+            raise
+
+    async def _handle_page(self, task: CrawlTask) -> None:
+        fetcher = self.fetchers[task.site]
+        html = await self._fetch(task)
+        self.pages_fetched += 1
+        self.metrics.inc("crawl_pages_total", site=task.site)
+        if not html:
+            self._after_page(task, [], failed=True)
+            return
+        self._start_prefetch(task)
+        if self.archive is not None:
+            with self.metrics.time("snapshot_seconds", site=task.site):
+                self.archive.add(task.url, html, task.site, task.kind, task.label, task.query, task.page)
+        if self._parse_pool is not None:
+            self._scheduler.hold()
+            try:
+                await self._parse_pool.submit(task, html)
+            except BaseException:
+                self._scheduler.release()
+                raise
+        else:
+            self._after_page(task, *fetcher.parse_page(html, task.url, task.label))
+
+    async def run(self, categories: List[dict]) -> None:
+        st = self.settings
+        self.started_at = time.time()
+        scheduler = self._scheduler = HostScheduler(
+            self._handle,
+            concurrency_per_domain=int(st.get("concurrency_per_domain", 2)),
+            base_delay=float(st.get("base_delay_seconds", 1.2)),
+            jitter=float(st.get("jitter_seconds", 1.0)),
+            per_host=st.get("per_host") or {},
+            pacing=self.session.limiter is None,
+        )
+        async with self.session, AsyncExitStack() as stack:
+            if self.parse_workers > 0:
+                self._parse_pool = await stack.enter_async_context(ParsePool(
+                    self.parse_workers, self._on_records, backend=st.get("parser_backend"),
+                    queue_size=st.get("parse_queue_size"), metrics=self.metrics,
+                ))
+            if self.enrich:
+                self.enricher = Enricher.from_settings(st, self.session, self.fetchers, self._emit, self.frontier)
+            if self.resume is not None:
+                tasks = [CrawlTask(**d) for d in self.resume.get("pending", [])]
+                if self.enricher is not None:
+                    self.enricher.resubmit(self.resume.get("enrich_pending", []))
+            else:
+                tasks = plan_tasks(categories, self.site, self.max_pages, self.fetchers["indiamart"])
+            if self.queue is not None:
+                self.queue.publish(self.run_id, [(task_key(t), asdict(t)) for t in tasks])
+            else:
+                for task in tasks:
+                    self._submit(task)
+            ticker = None
+            if self.checkpointer is not None and self.checkpointer.interval > 0:
+                ticker = asyncio.create_task(self._checkpoint_loop())
+            feeders = []
+            if self.queue is not None:
+                self._slot_free = asyncio.Event()
+                scheduler.hold()  # join() waits for the feeder; it releases once the run is drained
+                feeders = [asyncio.create_task(self._feed()), asyncio.create_task(self._renew_loop())]
+            try:
+                await scheduler.join()
+                if self.stopping:
+                    raise CrawlStopped(f"stopped after {self.pages_fetched} pages")
+                if self.enricher is not None:
+                    # listing pages are done; let the detail queue drain
+                    await self.enricher.join()
+            except BaseException:
+                self.checkpoint()
+                raise
+            finally:
+                for t in feeders:
+                    t.cancel()
+                if feeders:
+                    await asyncio.gather(*feeders, return_exceptions=True)
+                if ticker is not None:
+                    ticker.cancel()
+                if self.enricher is not None:
+                    await self.enricher.close()
+                for t in self._prefetched.values():
+                    t.cancel()
+                self._prefetched.clear()
+        self._parse_pool = None
+        if self.checkpointer is not None:
+            self.checkpointer.clear()
+        if self.frontier is not None:
+            self.frontier.commit()
+        if self.archive is not None:
+            self.archive.commit()
+
+    def report(self, status: str = "ok") -> dict:
+        """Structured summary of the run: counts, per-stage timings and the raw metrics."""
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        rc, lim, en = self.session.cache, self.session.limiter, self.enricher
+        return {
+            "status": status,
+            "site": self.site,
+            "max_pages": self.max_pages,
+            "incremental": self.incremental,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at or 0)),
+            "duration_s": round(elapsed, 3),
+            "pages_fetched": self.pages_fetched,
+            "items_written": self.items_written,
+            "items_skipped": self.items_skipped,
+            "items_per_sec": round(self.items_written / elapsed, 2) if elapsed else 0.0,
+            "http": self.session.stats.as_dict(),
+            "cache": rc.stats.as_dict() if rc is not None and rc.enabled else None,
+            "rate_limit": lim.metrics() if lim is not None else None,
+            "robots_blocked": self.robots.blocked if self.robots is not None else 0,
+            "pagination_stops": dict(self.pagination_stops),
+            "snapshots": self.archive.stats.as_dict() if self.archive is not None else None,
+            "enrich": {"fetched": en.fetched, "reused": en.reused, "failed": en.failed} if en is not None else None,
+            "distributed": {"run_id": self.run_id, "worker_id": self.worker_id, "pages_claimed": self.pages_claimed,
+                            "queue": self.queue.counts(self.run_id)} if self.queue is not None else None,
+            "stages": self.metrics.summary(),
+            "metrics": self.metrics.as_dict(),
+        }
+
+
+def write_report(runner: CrawlRunner, path: str, status: str = "ok") -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(runner.report(status), f, indent=2)
+    os.replace(tmp, path)
+
+
+async def run_crawl(
+    categories: List[dict],
+    settings: dict,
+    out: str,
+    site: str = "both",
+    max_pages: int = 2,
+    parse_workers: int = 0,
+    cache_mode: Optional[str] = None,
+    incremental: bool = False,
+    frontier_path: Optional[str] = None,
+    resume: bool = False,
+    checkpoint_interval: float = 30.0,
+    enrich: bool = False,
+    on_runner: Optional[Callable[[CrawlRunner], None]] = None,
+    report: Optional[str] = None,
+    queue: Optional[str] = None,
+    run_id: Optional[str] = None,
+    worker_id: Optional[str] = None,
+    snapshots: Optional[bool] = None,
+    stop: Optional[threading.Event] = None,
+) -> CrawlRunner:
+    """
+    Set up writer, cache, frontier and checkpointing for ``out`` and run one
+    crawl. Shared by the ``crawl`` command and the in-process job API.
+    ``on_runner`` is called with the runner before it starts (for progress).
+    The run report is written to ``report`` (default ``<out>.report.json``),
+    also when the crawl fails or is interrupted; pass ``""`` to skip it.
+
+    With ``queue`` (a ``open_queue`` spec) this process joins distributed run
+    ``run_id`` as ``worker_id``. The run id is required, and a run that has
+    already finished is refused (``ValueError``): rejoining it would crawl
+    nothing. It writes its
+    records to its own part file (``<out>.parts/<run>/<worker>.jsonl``); the
+    worker that sees the run finish merges all parts into ``out``.
+    Checkpoints are off, since the queue's leases take their place.
+
+    ``snapshots`` (default: ``snapshots.enabled`` in settings) archives the
+    fetched listing pages under ``SNAPSHOT_DIR``; retention is applied when
+    the crawl ends.
+
+    Setting ``stop`` ends the crawl at the next page boundary with
+    ``CrawlStopped``; the checkpoint it leaves can be resumed.
+    """
+    from src.paths import CACHE_DIR, FRONTIER_DB, SNAPSHOT_DIR, STATE_DIR
+    from src.pipelines.checkpoint import checkpoint_path, truncate_to
+    from src.pipelines.workqueue import merge_parts, open_queue, part_path
+    from src.pipelines.write_parquet import open_writer
+
+    st = settings or {}
+    proxy = st.get("proxy") or None
+    q, dest = None, out
+    if queue:
+        if resume or out.endswith(".parquet"):
+            raise ValueError("a distributed crawl writes JSONL parts and resumes through the queue; "
+                             "drop --resume and use a .jsonl[.gz|.zst] --out")
+        if not run_id:
+            raise ValueError("a distributed crawl needs an explicit run_id shared by all its workers")
+        worker_id = worker_id or default_worker_id()
+        dest, checkpoint_interval = part_path(out, run_id, worker_id), 0
+    ck = Checkpointer(checkpoint_path(out), interval=checkpoint_interval)
+    state = None
+    if resume:
+        state = ck.load()
+        if state is None:
+            raise FileNotFoundError(f"No checkpoint for {out}; nothing to resume.")
+        site, max_pages = state.get("site", site), state.get("max_pages", max_pages)
+        incremental = bool(state.get("incremental", incremental))
+        enrich = bool(state.get("enrich", enrich))
+        truncate_to(out, state["offset"])
+    if out.endswith(".parquet"):
+        checkpoint_interval = 0  # parquet can't be truncated/appended
+    rc = ResponseCache.from_settings(st, CACHE_DIR / "http", mode=cache_mode)
+    writer = open_writer(dest, append=incremental or resume or bool(queue), **(st.get("writer") or {}))
+    # other workers share the frontier file: never hold its write lock across awaits
+    frontier = Frontier(frontier_path or FRONTIER_DB,
+                        commit_every=1 if queue else 0 if checkpoint_interval > 0 else 500)
+    if queue:
+        dist = st.get("distributed") or {}
+        q = open_queue(queue, max_attempts=int(dist.get("max_attempts", 3)))
+        if q.finished(run_id):
+            q.close()
+            raise ValueError(f"distributed run {run_id!r} already finished and was merged; "
+                             "start a new one with a different run_id")
+    if snapshots is None:
+        snapshots = bool((st.get("snapshots") or {}).get("enabled", False))
+    archive = SnapshotArchive.from_settings(st, SNAPSHOT_DIR, writer_id=worker_id or default_worker_id()) \
+        if snapshots else None
+    respect_robots = bool(st.get("respect_robots", True))
+    robots = RobotsCache.from_settings(st, root=STATE_DIR / "robots") if respect_robots else None
+    runner = CrawlRunner(st, writer, site=site, max_pages=max_pages, proxy=proxy,
+                         respect_robots=respect_robots, robots=robots, enrich=enrich,
+                         parse_workers=parse_workers, cache=rc, frontier=frontier, incremental=incremental,
+                         checkpointer=ck if checkpoint_interval > 0 else None, resume=state,
+                         queue=q, run_id=run_id or "default", worker_id=worker_id, archive=archive,
+                         stop=stop)
+    if on_runner is not None:
+        on_runner(runner)
+    report = runner.report_path = f"{dest}.report.json" if report is None else (report or None)
+    status = "failed"
+    try:
+        await runner.run(categories)
+        status = "ok"
+    except (asyncio.CancelledError, KeyboardInterrupt, CrawlStopped):
+        status = "interrupted"
+        raise
+    finally:
+        writer.close()
+        frontier.close()
+        if archive is not None:
+            archive.close()
+        if report:
+            write_report(runner, report, status)
+        if q is not None and status != "ok":
+            q.close()
+    if q is not None:
+        try:
+            if q.finish(runner.run_id, runner.worker_id):
+                runner.merged_parts = merge_parts(out, runner.run_id, append=incremental)
+        finally:
+            q.close()
+    return runner
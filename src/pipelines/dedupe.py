@@ -0,0 +1,204 @@
+"""
+URL canonicalization and near-duplicate product clustering for ``clean``.
+
+Exact dedupe keys on the canonical product URL: scheme and host are
+lower-cased, default ports, fragments, repeated or trailing slashes and
+tracking parameters (``utm_*``, ``spm``, ``pos``, ``kwd`` ...) are dropped,
+and the remaining query is sorted. The key additionally ignores the scheme
+and ``www.`` / ``m.`` host prefixes. A listing reached through different
+search queries or campaign links gets one key.
+
+Near duplicates (the same product syndicated under slightly different
+titles, or re-listed under another URL) are found with 64-bit SimHash over
+title unigrams and bigrams. A banded index splits each signature into
+``max_distance + 1`` bands, so any two signatures within that Hamming
+distance share at least one band exactly. Only rows in the same band
+bucket are compared, which keeps clustering near-linear; buckets are
+capped so very generic titles can't make it quadratic. Two rows only join
+a cluster when their supplier names agree (or one is unknown).
+
+Each cluster is identified by the smallest row key among its members, as
+16 hex digits, so ids don't depend on input order.
+"""
+from __future__ import annotations
+import hashlib, re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin
+
+if TYPE_CHECKING:
+    import numpy as np
+
+TRACKING_PARAMS = frozenset({
+    "gclid", "fbclid", "msclkid", "yclid", "dclid", "gbraid", "wbraid", "mc_cid", "mc_eid", "_ga", "_gl",
+    "spm", "scm", "tracelog", "traceid", "trace_id", "ref", "referer", "referrer", "src", "source", "from",
+    "pos", "position", "kwd", "tags", "pla", "prdsrc", "list_vw", "stype", "sessionid", "sid",
+})
+TRACKING_PREFIXES = ("utm_", "_hs", "ali_", "aff_")
+
+_HOST_PREFIXES = ("www.", "m.")
+_SLASHES = re.compile(r"/{2,}")
+_URL = re.compile(r"([A-Za-z][A-Za-z0-9+.-]*)://([^/?#]*)([^?#]*)(?:\?([^#]*))?")
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+_MASK64 = (1 << 64) - 1
+
+
+# -------------------- URLs --------------------
+
+def _tracking(name: str) -> bool:
+    n = name.lower()
+    return n in TRACKING_PARAMS or n.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url: Optional[str], base: Optional[str] = None) -> Optional[str]:
+    """Canonical form of a product URL (relative ones resolved against ``base``)."""
+    if not url:
+        return None
+    # clean calls this for every row in both passes; listings repeat a lot
+    return _canonical(url, base if url[:1] == "/" or "://" not in url else None)
+
+
+@lru_cache(maxsize=1 << 16)
+def _canonical(url: str, base: Optional[str]) -> str:
+    # hand-rolled split: urlsplit + parse_qsl dominated clean's runtime
+    url = url.strip()
+    if base and "://" not in url:
+        url = urljoin(base, url)
+    elif url.startswith("//"):
+        url = "https:" + url
+    m = _URL.match(url)
+    if not m:
+        return url
+    scheme, netloc, path, query = m.groups()
+    scheme = scheme.lower()
+    host = netloc.rpartition("@")[2].lower()
+    name, sep, port = host.rpartition(":")
+    if sep and port.isdigit():
+        host = name.rstrip(".") + ("" if (scheme, port) in (("http", "80"), ("https", "443")) else f":{port}")
+    else:
+        host = host.rstrip(".")
+    if "//" in path:
+        path = _SLASHES.sub("/", path)
+    if len(path) > 1 and path.endswith("/"):
+        path = path[:-1]
+    if query:
+        query = "&".join(sorted(p for p in query.split("&") if p and not _tracking(p.partition("=")[0])))
+    return f"{scheme}://{host}{path or '/'}" + (f"?{query}" if query else "")
+
+
+def url_key(url: Optional[str], base: Optional[str] = None) -> Optional[str]:
+    """Dedupe key: the canonical URL without scheme and ``www.`` / ``m.`` (same page either way)."""
+    c = canonical_url(url, base)
+    if not c:
+        return None
+    c = c.split("://", 1)[-1]
+    for p in _HOST_PREFIXES:
+        if c.startswith(p):
+            return c[len(p):]
+    return c
+
+
+# -------------------- SimHash --------------------
+
+def _features(title: str) -> List[str]:
+    toks = _TOKEN.findall(title.lower())
+    return toks + [f"{a} {b}" for a, b in zip(toks, toks[1:])]
+
+
+@lru_cache(maxsize=1 << 18)
+def _h64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(titles: Iterable[Optional[str]]) -> np.ndarray:
+    """64-bit SimHash per title (0 for empty titles), vectorized over the batch."""
+    # numpy is imported here: crawl and enrich only need the URL helpers above
+    import numpy as np
+
+    hashes: List[int] = []
+    counts: List[int] = []
+    for t in titles:
+        feats = _features(t) if t else []
+        hashes.extend(_h64(f) for f in feats)
+        counts.append(len(feats))
+    out = np.zeros(len(counts), dtype=np.uint64)
+    if not hashes:
+        return out
+    # one row per bit (reducing along contiguous memory is ~2x faster); a bit
+    # is set when more than half of the title's features have it set
+    octets = np.ascontiguousarray(np.array(hashes, dtype="<u8").view(np.uint8).reshape(-1, 8).T)
+    bits = np.unpackbits(octets, axis=0, bitorder="little")
+    n = np.array(counts)
+    has = n > 0
+    starts = np.concatenate(([0], np.cumsum(n)[:-1]))[has]
+    ones = np.add.reduceat(bits, starts, axis=1, dtype=np.int32).T
+    packed = np.ascontiguousarray(np.packbits(2 * ones > n[has, None], axis=1, bitorder="little")).view("<u8").ravel()
+    out[has] = packed
+    return out
+
+
+def supplier_hash(name: Optional[str]) -> int:
+    """0 when unknown, else a 64-bit digest of the normalized supplier name."""
+    toks = _TOKEN.findall(name.lower()) if name else []
+    if not toks:
+        return 0
+    return _h64(" ".join(toks)) or 1
+
+
+# -------------------- clustering --------------------
+
+class NearDupIndex:
+    """
+    Banded SimHash index with union-find clusters.
+
+    ``add(key, sig, supplier)`` for every unique product, then ``clusters()``
+    maps each key to its cluster id. ``max_distance`` is the largest Hamming
+    distance still treated as the same title; ``bucket_cap`` bounds how many
+    earlier members of one band bucket a new signature is compared with.
+    """
+
+    def __init__(self, max_distance: int = 3, bucket_cap: int = 64):
+        self.max_distance = int(max_distance)
+        self.bands = self.max_distance + 1
+        self.width = 64 // self.bands
+        self.bucket_cap = int(bucket_cap)
+        self._buckets: Dict[Tuple[int, int], List[int]] = {}
+        self._sig: Dict[int, Tuple[int, int]] = {}
+        self._parent: Dict[int, int] = {}
+
+    def _find(self, k: int) -> int:
+        parent = self._parent
+        root = k
+        while parent[root] != root:
+            root = parent[root]
+        while parent[k] != root:
+            parent[k], k = root, parent[k]
+        return root
+
+    def _union(self, a: int, b: int) -> None:
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            self._parent[max(ra, rb)] = min(ra, rb)
+
+    def add(self, key: int, sig: int, supplier: int = 0) -> None:
+        if key in self._parent:
+            return
+        self._parent[key] = key
+        if not sig:
+            return
+        self._sig[key] = (sig, supplier)
+        mask = (1 << self.width) - 1
+        for b in range(self.bands):
+            bucket = self._buckets.setdefault((b, (sig >> (b * self.width)) & mask), [])
+            for other in bucket:
+                osig, osup = self._sig[other]
+                if (supplier == osup or not supplier or not osup) \
+                        and (sig ^ osig).bit_count() <= self.max_distance:
+                    self._union(key, other)
+            if len(bucket) < self.bucket_cap:
+                bucket.append(key)
+
+    def clusters(self) -> Dict[int, str]:
+        """Row key -> cluster id (smallest member key in hex)."""
+        # union keeps the smaller key as root, so the root is the cluster's minimum
+        return {k: format(self._find(k) & _MASK64, "016x") for k in self._parent}
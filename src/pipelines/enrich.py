@@ -0,0 +1,127 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin
+
+from src.common.scheduler import HostScheduler
+from src.pipelines.dedupe import url_key
+from src.pipelines.frontier import Frontier
+
+
+@dataclass
+class DetailTask:
+    site: str
+    url: str          # absolute detail page URL
+    item: dict        # listing record, JSON-safe
+    key: str = ""     # url_key of the product (frontier / pending key)
+    dups: List[dict] = field(default_factory=list)  # later listings of the same product, written with it
+
+    def items(self) -> List[dict]:
+        return [self.item, *self.dups]
+
+
+class Enricher:
+    """
+    Streaming detail-page stage fed by the listing crawl.
+
+    ``offer`` is called with each listing record as it is produced. If the
+    frontier holds detail fields younger than ``max_age`` they are merged in
+    place and the caller writes the record straight away; otherwise the
+    record is queued and written (via ``write``) once its detail page has
+    been fetched and parsed, or as-is if that fails. Further listings of a
+    product whose detail page is already queued wait on that same fetch.
+    Detail fetches run on their own ``HostScheduler`` with ``concurrency``
+    workers per host, so they never take slots from listing pages; both
+    share the session and its per-host rate limiter.
+    """
+
+    def __init__(self, session, fetchers: Dict[str, object], write: Callable[[dict], None],
+                 frontier: Optional[Frontier] = None, concurrency: int = 2, max_age_days: float = 7.0,
+                 pacing: bool = False, base_delay: float = 1.2, jitter: float = 1.0):
+        self.session = session
+        self.fetchers = fetchers
+        self.write = write
+        self.frontier = frontier
+        self.max_age = float(max_age_days) * 86400
+        self.scheduler = HostScheduler(self._handle, concurrency_per_domain=concurrency,
+                                       base_delay=base_delay, jitter=jitter, pacing=pacing)
+        self._pending: Dict[str, DetailTask] = {}
+        self.fetched = 0
+        self.reused = 0
+        self.failed = 0
+
+    @classmethod
+    def from_settings(cls, settings: dict, session, fetchers, write, frontier=None) -> "Enricher":
+        en = settings.get("enrich") or {}
+        return cls(session, fetchers, write, frontier=frontier,
+                   concurrency=int(en.get("concurrency", 2)),
+                   max_age_days=float(en.get("max_age_days", 7)),
+                   pacing=session.limiter is None,
+                   base_delay=float(settings.get("base_delay_seconds", 1.2)),
+                   jitter=float(settings.get("jitter_seconds", 1.0)))
+
+    def offer(self, item: dict) -> bool:
+        """True if the stage took ``item`` over (it will be written later)."""
+        url = item.get("product_page_url")
+        if not url or item.get("site") not in self.fetchers:
+            return False
+        key = url_key(url, item.get("url")) or url  # the frontier's product key
+        task = self._pending.get(key)
+        if task is not None:
+            # same product listed again while its detail page is in flight: wait for those fields too
+            task.dups.append(item)
+            return True
+        if self.frontier is not None:
+            fields = self.frontier.detail(key, self.max_age)
+            if fields is not None:
+                _merge(item, fields)
+                self.reused += 1
+                return False
+        # listing links are often relative or protocol-relative
+        task = self._pending[key] = DetailTask(item["site"], urljoin(item.get("url") or "", url), item, key=key)
+        self.scheduler.submit(task)
+        return True
+
+    def pending(self) -> List[dict]:
+        """Queued listing records, for checkpoints."""
+        return [it for t in self._pending.values() for it in t.items()]
+
+    def resubmit(self, items: List[dict]) -> None:
+        for item in items:
+            if not self.offer(item):
+                self.write(item)
+
+    async def _handle(self, task: DetailTask) -> None:
+        fetcher = self.fetchers[task.site]
+        try:
+            html = await fetcher.fetch_html(self.session, task.url)
+            fields = fetcher.parse_detail(html, task.url) if html else None
+        except Exception as e:
+            print(f"[enrich] {task.url}: {e}")
+            fields = None
+        key = task.key
+        if self._pending.pop(key, None) is None:
+            return
+        if fields:
+            self.fetched += 1
+            for item in task.items():
+                _merge(item, fields)
+            if self.frontier is not None:
+                self.frontier.store_detail(key, fields)
+        else:
+            self.failed += 1
+        for item in task.items():
+            self.write(item)
+
+    async def join(self) -> None:
+        await self.scheduler.join()
+
+    async def close(self) -> None:
+        await self.scheduler.close()
+
+
+def _merge(item: dict, fields: dict) -> None:
+    # detail pages are authoritative, but never blank out what the listing had
+    for k, v in fields.items():
+        if v not in (None, "", []):
+            item[k] = v
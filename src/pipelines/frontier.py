@@ -0,0 +1,107 @@
+from __future__ import annotations
+import hashlib, json, os, sqlite3, time
+from typing import Optional
+
+# fields that make a listing "changed" when they differ between runs
+CONTENT_FIELDS = ("title", "price_text", "moq", "unit", "supplier_name", "supplier_location",
+                  "supplier_years", "rating", "reviews_count")
+
+
+def content_digest(item: dict) -> int:
+    """Signed 64-bit digest of the listing's content fields (fits an SQLite INTEGER)."""
+    h = hashlib.blake2b(digest_size=8)
+    for f in CONTENT_FIELDS:
+        h.update(repr(item.get(f)).encode("utf-8"))
+        h.update(b"\x1f")
+    return int.from_bytes(h.digest(), "big", signed=True)
+
+
+class Frontier:
+    """
+    Persistent seen-URL set shared across crawl runs (SQLite, WAL mode),
+    keyed by ``dedupe.url_key`` so tracking-parameter, scheme and ``www.``
+    variants of a product URL are one entry.
+
+    ``check`` classifies a product as ``"new"``, ``"changed"`` (content
+    digest differs from the stored one) or ``"known"`` and records it.
+    Writes are committed in batches of ``commit_every`` (0 = only on explicit
+    ``commit``, which lets a checkpointed crawl commit in step with its
+    checkpoints); call ``close`` (or use as a context manager) to flush the
+    tail.
+
+    ``detail``/``store_detail`` keep the fields the enrichment stage pulled
+    from each product's detail page, so recently enriched products are not
+    fetched again.
+    """
+
+    def __init__(self, path: os.PathLike, commit_every: int = 500):
+        os.makedirs(os.path.dirname(os.fspath(path)) or ".", exist_ok=True)
+        self.path = path
+        self.commit_every = int(commit_every)
+        self.db = sqlite3.connect(os.fspath(path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " url TEXT PRIMARY KEY, digest INTEGER, first_seen REAL, last_seen REAL"
+            ") WITHOUT ROWID"
+        )
+        # detail-page fields from the enrichment stage, reused while fresh
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS details (url TEXT PRIMARY KEY, fetched_at REAL, doc TEXT) WITHOUT ROWID"
+        )
+        self._dirty = 0
+
+    def __enter__(self) -> "Frontier":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __contains__(self, url: str) -> bool:
+        return self.db.execute("SELECT 1 FROM seen WHERE url=?", (url,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def check(self, url: str, digest: int, now: Optional[float] = None) -> str:
+        now = time.time() if now is None else now
+        row = self.db.execute("SELECT digest FROM seen WHERE url=?", (url,)).fetchone()
+        if row is None:
+            self.db.execute("INSERT INTO seen VALUES (?,?,?,?)", (url, digest, now, now))
+            status = "new"
+        elif row[0] != digest:
+            self.db.execute("UPDATE seen SET digest=?, last_seen=? WHERE url=?", (digest, now, url))
+            status = "changed"
+        else:
+            self.db.execute("UPDATE seen SET last_seen=? WHERE url=?", (now, url))
+            status = "known"
+        self._dirty += 1
+        if self.commit_every and self._dirty >= self.commit_every:
+            self.commit()
+        return status
+
+    def detail(self, url: str, max_age: float, now: Optional[float] = None) -> Optional[dict]:
+        """Stored detail fields for ``url`` if fetched within ``max_age`` seconds."""
+        now = time.time() if now is None else now
+        row = self.db.execute("SELECT fetched_at, doc FROM details WHERE url=?", (url,)).fetchone()
+        if row is None or now - row[0] > max_age:
+            return None
+        return json.loads(row[1])
+
+    def store_detail(self, url: str, fields: dict, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self.db.execute("INSERT OR REPLACE INTO details VALUES (?,?,?)", (url, now, json.dumps(fields)))
+        self._dirty += 1
+        if self.commit_every and self._dirty >= self.commit_every:
+            self.commit()
+
+    def commit(self) -> None:
+        self.db.commit()
+        self._dirty = 0
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.commit()
+            self.db.close()
+            self.db = None
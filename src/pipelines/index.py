@@ -0,0 +1,191 @@
+from __future__ import annotations
+import hashlib, os, sqlite3, threading
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+import orjson
+
+from src.common.schema import _parse_ts
+from src.pipelines.clean import normalize_rows, row_key
+from src.pipelines.write_jsonl import jsonl_codec
+
+_TAIL = 4096  # bytes before the indexed offset used to notice a rewritten source
+KEY_VERSION = 2  # bump when row_key changes (2: canonical product URLs); forces a rebuild
+
+
+def _signed(k: int) -> int:
+    return k - (1 << 64) if k >= 1 << 63 else k
+
+
+def _epoch(v) -> Optional[float]:
+    if isinstance(v, str):
+        v = _parse_ts(v)
+    if isinstance(v, datetime) and v.tzinfo is not None:
+        v = v.astimezone(timezone.utc).replace(tzinfo=None)
+    return (v - datetime(1970, 1, 1)).total_seconds() if isinstance(v, datetime) else None
+
+
+class DatasetIndex:
+    """
+    SQLite index over the raw JSONL crawl output, for filtered queries.
+
+    Holds one row per product (same key and keep-last rule as ``clean``)
+    with the filter columns broken out and the normalized record as JSON.
+    ``refresh`` only reads what was appended since the last call; if the
+    source was truncated or rewritten (non-incremental crawl, ``--resume``)
+    the index is rebuilt from scratch. The product ``rowid`` is stable and
+    serves as the pagination cursor.
+    """
+
+    def __init__(self, path: os.PathLike, source: os.PathLike):
+        os.makedirs(os.path.dirname(os.fspath(path)) or ".", exist_ok=True)
+        self.path = os.fspath(path)
+        self.source = os.fspath(source)
+        self._lock = threading.Lock()
+        db = self._connect()
+        db.executescript(
+            "CREATE TABLE IF NOT EXISTS products ("
+            " id INTEGER PRIMARY KEY, key INTEGER UNIQUE NOT NULL, site TEXT, category TEXT,"
+            " price_min REAL, price_max REAL, scraped_at REAL, doc BLOB NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS products_site_cat ON products(site, category, id);"
+            "CREATE INDEX IF NOT EXISTS products_scraped ON products(scraped_at);"
+            "CREATE INDEX IF NOT EXISTS products_price ON products(price_min);"
+            "CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v);"
+        )
+        db.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # ---- maintenance ----
+    def _meta(self, db, k: str, default=None):
+        row = db.execute("SELECT v FROM meta WHERE k=?", (k,)).fetchone()
+        return row[0] if row else default
+
+    @staticmethod
+    def _tail_digest(f, offset: int) -> str:
+        start = max(0, offset - _TAIL)
+        f.seek(start)
+        return hashlib.blake2b(f.read(offset - start), digest_size=16).hexdigest()
+
+    def refresh(self, chunk_bytes: int = 4 << 20) -> int:
+        """Index lines appended to the source since the last refresh. Returns rows indexed."""
+        if not os.path.exists(self.source):
+            return 0
+        if jsonl_codec(self.source):
+            raise ValueError(f"{self.source}: the index reads byte offsets; point it at an uncompressed .jsonl")
+        with self._lock:
+            db = self._connect()
+            try:
+                return self._refresh(db, chunk_bytes)
+            finally:
+                db.close()
+
+    def _refresh(self, db, chunk_bytes: int) -> int:
+        st = os.stat(self.source)
+        offset = int(self._meta(db, "offset", 0))
+        with open(self.source, "rb") as f:
+            if offset and (st.st_size < offset or st.st_ino != self._meta(db, "inode")
+                           or self._meta(db, "key_version", 1) != KEY_VERSION
+                           or self._tail_digest(f, offset) != self._meta(db, "tail")):
+                db.execute("DELETE FROM products")
+                offset = 0
+            if st.st_size == offset:
+                db.commit()
+                return 0
+            f.seek(offset)
+            n = 0
+            while True:
+                lines = f.readlines(chunk_bytes)
+                # a line still being written has no newline yet; leave it for next time
+                if lines and not lines[-1].endswith(b"\n"):
+                    lines.pop()
+                if not lines:
+                    break
+                offset += sum(len(b) for b in lines)
+                n += self._upsert(db, lines)
+                db.executemany("INSERT OR REPLACE INTO meta VALUES (?,?)", [
+                    ("offset", offset), ("inode", st.st_ino), ("tail", self._tail_digest(f, offset)),
+                    ("key_version", KEY_VERSION)])
+                db.commit()
+                f.seek(offset)
+            return n
+
+    def _upsert(self, db, lines: List[bytes]) -> int:
+        rows = []
+        for line in lines:
+            if line.strip():
+                try:
+                    rows.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    continue
+        normalize_rows(rows)
+        db.executemany(
+            "INSERT INTO products(key, site, category, price_min, price_max, scraped_at, doc)"
+            " VALUES (?,?,?,?,?,?,?) ON CONFLICT(key) DO UPDATE SET site=excluded.site,"
+            " category=excluded.category, price_min=excluded.price_min, price_max=excluded.price_max,"
+            " scraped_at=excluded.scraped_at, doc=excluded.doc",
+            [(_signed(row_key(r)), r.get("site"), r.get("category"), r.get("price_min"), r.get("price_max"),
+              _epoch(r.get("scraped_at")), orjson.dumps(r)) for r in rows],
+        )
+        return len(rows)
+
+    # ---- queries ----
+    @staticmethod
+    def _where(site=None, category=None, min_price=None, max_price=None,
+               since: Optional[datetime] = None, until: Optional[datetime] = None,
+               after: int = 0) -> Tuple[str, list]:
+        clauses, args = ["id > ?"], [after]
+        for col, v in (("site", site), ("category", category)):
+            if v:
+                clauses.append(f"{col} = ?")
+                args.append(v)
+        # price ranges overlap the requested band
+        if min_price is not None:
+            clauses.append("COALESCE(price_max, price_min) >= ?")
+            args.append(min_price)
+        if max_price is not None:
+            clauses.append("price_min <= ?")
+            args.append(max_price)
+        if since is not None:
+            clauses.append("scraped_at >= ?")
+            args.append(_epoch(since))
+        if until is not None:
+            clauses.append("scraped_at < ?")
+            args.append(_epoch(until))
+        return " AND ".join(clauses), args
+
+    def next_cursor(self, limit: int, **filters) -> Optional[int]:
+        """Cursor for the page after this one, or None if this is the last page."""
+        where, args = self._where(**filters)
+        db = self._connect()
+        try:
+            rows = db.execute(f"SELECT id FROM products WHERE {where} ORDER BY id LIMIT 2 OFFSET ?",
+                              (*args, limit - 1)).fetchall()
+        finally:
+            db.close()
+        return rows[0][0] if len(rows) == 2 else None
+
+    def iter_docs(self, limit: int, batch: int = 500, **filters) -> Iterator[List[bytes]]:
+        """Yield batches of JSON documents matching ``filters`` in cursor order."""
+        where, args = self._where(**filters)
+        db = self._connect()
+        try:
+            cur = db.execute(f"SELECT doc FROM products WHERE {where} ORDER BY id LIMIT ?", (*args, limit))
+            while True:
+                rows = cur.fetchmany(batch)
+                if not rows:
+                    return
+                yield [r[0] for r in rows]
+        finally:
+            db.close()
+
+    def __len__(self) -> int:
+        db = self._connect()
+        try:
+            return db.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        finally:
+            db.close()
@@ -0,0 +1,220 @@
+"""
+In-process crawl -> clean -> EDA jobs for the API.
+
+``JobManager.submit`` returns immediately; the job runs as an asyncio task
+on the server loop. The crawl gets its own event loop in a worker thread
+(parsing is CPU-bound and would otherwise stall request handling), clean
+and EDA run in threads as well. Jobs writing the same output path queue
+behind each other on a per-path lock; jobs with different paths run side
+by side.
+
+``cancel`` (and ``shutdown``, for all jobs) cancels the job's task; a
+running crawl thread is told through its stop event and ends at the next
+page boundary, leaving a checkpoint behind.
+"""
+from __future__ import annotations
+import asyncio, threading, time, traceback, uuid
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+STAGES = ("queued", "crawl", "clean", "eda", "done")
+TERMINAL = ("succeeded", "failed", "cancelled")
+
+
+async def _in_thread(fn, *args, stop: Optional[threading.Event] = None):
+    # a thread can't be cancelled: on cancel, set its stop event (if it has one) and wait for it,
+    # so the job keeps its path locks until nothing writes those files any more
+    fut = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+    try:
+        return await asyncio.shield(fut)
+    except asyncio.CancelledError:
+        if stop is not None:
+            stop.set()
+        await asyncio.gather(fut, return_exceptions=True)
+        raise
+
+
+@dataclass
+class JobParams:
+    site: str = "both"
+    pages: int = 2
+    incremental: bool = True
+    fmt: str = "csv"            # clean output: csv | parquet
+    eda: bool = True
+    enrich: bool = False        # fetch detail pages too
+    raw: str = ""               # filled with defaults by the manager
+    clean: str = ""
+
+
+@dataclass
+class Job:
+    id: str
+    params: JobParams
+    status: str = "queued"      # queued | running | succeeded | failed | cancelled
+    stage: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Dict[str, object] = field(default_factory=dict)
+    runner: object = None       # live CrawlRunner while crawling (progress source)
+    pages_fetched: int = 0
+    items_written: int = 0
+    crawl_seconds: float = 0.0
+    hosts: Dict[str, dict] = field(default_factory=dict)   # rate limiter state per host
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL
+
+    def _sync_progress(self) -> None:
+        r = self.runner
+        if r is not None:
+            self.pages_fetched, self.items_written = r.pages_fetched, r.items_written
+            if r.session.limiter is not None:
+                self.hosts = r.session.limiter.metrics()
+            if r.started_at:
+                self.crawl_seconds = time.time() - r.started_at
+
+    def snapshot(self) -> dict:
+        self._sync_progress()
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "params": vars(self.params),
+            "pages_fetched": self.pages_fetched,
+            "items_written": self.items_written,
+            "items_per_sec": round(self.items_written / self.crawl_seconds, 2) if self.crawl_seconds else 0.0,
+            "hosts": self.hosts,
+            "elapsed": round(end - self.started_at, 2) if self.started_at else 0.0,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class JobManager:
+    def __init__(self, settings_cfg: str = "configs/settings.yaml",
+                 categories_cfg: str = "configs/categories.yaml", keep: int = 100):
+        self.settings_cfg = settings_cfg
+        self.categories_cfg = categories_cfg
+        self.keep = keep
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # EDA outputs and their fingerprint state are shared by every job
+        self._eda_lock = asyncio.Lock()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def submit(self, params: JobParams) -> Job:
+        from src.paths import CLEAN_CSV, CLEAN_PARQUET, RAW_JSONL
+
+        params.raw = params.raw or str(RAW_JSONL)
+        params.clean = params.clean or str(CLEAN_PARQUET if params.fmt == "parquet" else CLEAN_CSV)
+        job = Job(id=uuid.uuid4().hex[:12], params=params)
+        self.jobs[job.id] = job
+        self._prune()
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _t, i=job.id: self._tasks.pop(i, None))
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; False if it is unknown or already finished."""
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _prune(self) -> None:
+        finished = [j.id for j in self.jobs.values() if j.done]
+        for job_id in finished[: max(0, len(self.jobs) - self.keep)]:
+            del self.jobs[job_id]
+
+    async def _run(self, job: Job) -> None:
+        p = job.params
+        # anything that writes the same files must not interleave; fixed lock order avoids deadlock
+        async with AsyncExitStack() as stack:
+            try:
+                for path in sorted({p.raw, p.clean}):
+                    await stack.enter_async_context(self._locks.setdefault(path, asyncio.Lock()))
+            except asyncio.CancelledError:
+                job.status, job.finished_at = "cancelled", time.time()
+                raise
+            job.status, job.started_at = "running", time.time()
+            try:
+                await self._crawl(job)
+                job.stage = "clean"
+                stats = await _in_thread(self._clean, p)
+                job.result.update(raw=p.raw, clean=p.clean, clean_rows=stats.written, unique_products=stats.clusters)
+                if p.eda and stats.written:
+                    job.stage = "eda"
+                    async with self._eda_lock:
+                        eda = await _in_thread(self._eda, p.clean)
+                    job.result.update(eda="cached" if eda.cached else "rendered")
+                job.stage, job.status = "done", "succeeded"
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+                raise
+            except Exception as e:
+                job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+            finally:
+                job._sync_progress()
+                job.runner = None
+                job.finished_at = time.time()
+
+    async def _crawl(self, job: Job) -> None:
+        import yaml
+        from src.pipelines.crawl import run_crawl
+
+        def load(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return yaml.safe_load(f) or {}
+
+        p = job.params
+        st, cfg = load(self.settings_cfg), load(self.categories_cfg)
+        job.stage = "crawl"
+
+        def attach(runner):
+            job.runner = runner
+
+        stop = threading.Event()
+
+        def crawl():
+            return asyncio.run(run_crawl(cfg.get("categories", []), st, p.raw, site=p.site,
+                                         max_pages=p.pages, incremental=p.incremental, enrich=p.enrich,
+                                         on_runner=attach, stop=stop))
+
+        runner = await _in_thread(crawl, stop=stop)
+        job.result.update(items_skipped=runner.items_skipped, http_requests=runner.session.stats.requests,
+                          report=runner.report_path)
+
+    @staticmethod
+    def _clean(p: JobParams):
+        import os
+        from src.pipelines.clean import CleanStats, stream_clean
+
+        if not os.path.exists(p.raw) or os.path.getsize(p.raw) == 0:
+            return CleanStats()
+        return stream_clean(p.raw, p.clean)
+
+    @staticmethod
+    def _eda(path: str):
+        from src.eda.eda_report import run as run_eda
+
+        return run_eda(path)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import asyncio, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from src.common.metrics import METRICS, Metrics
+from src.sites.extract import extract_page
+
+
+def _parse_job(site: str, backend: Optional[str], html: str) -> Tuple[List[dict], Optional[str], float]:
+    # runs in a worker process; returns compact dict records (not models), the
+    # next-link href and the extraction time, so pickling and queueing aren't
+    # counted as parsing
+    t0 = time.perf_counter()
+    records, next_href = extract_page(html, site, backend)
+    return records, next_href, time.perf_counter() - t0
+
+
+class ParsePool:
+    """
+    Fetch -> parse hand-off backed by a ``ProcessPoolExecutor``.
+
+    Fetch workers ``await submit(task, html)``; the queue between them and
+    the parse consumers is bounded (``queue_size``), so when parsing falls
+    behind the fetchers block instead of piling raw HTML up in memory.
+    Parsed records are passed to ``on_records(task, records, next_href)`` on
+    the event loop, where they are turned into ``ProductRecord`` and written.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        on_records: Callable[[Any, List[dict], Optional[str]], Awaitable[None]],
+        backend: Optional[str] = None,
+        queue_size: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.workers = max(1, int(workers))
+        self.on_records = on_records
+        self.backend = backend
+        self.queue_size = int(queue_size or self.workers * 2)
+        self.metrics = metrics if metrics is not None else METRICS
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._consumers: List[asyncio.Task] = []
+
+    async def __aenter__(self) -> "ParsePool":
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                await self._queue.join()
+        finally:
+            for c in self._consumers:
+                c.cancel()
+            await asyncio.gather(*self._consumers, return_exceptions=True)
+            self._executor.shutdown(wait=exc_type is None, cancel_futures=exc_type is not None)
+
+    async def submit(self, task: Any, html: str) -> None:
+        await self._queue.put((task, html))
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            task, html = await self._queue.get()
+            try:
+                try:
+                    records, next_href, seconds = await loop.run_in_executor(
+                        self._executor, _parse_job, task.site, self.backend, html)
+                    self.metrics.observe("parse_seconds", seconds, site=task.site, kind="listing")
+                except Exception as e:
+                    print(f"[parse] {task.url} -> {e}")
+                    records, next_href = [], None
+                await self.on_records(task, records, next_href)
+            except Exception as e:
+                print(f"[parse] {task.url}: record handler failed -> {e}")
+            finally:
+                self._queue.task_done()
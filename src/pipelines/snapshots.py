@@ -0,0 +1,298 @@
+"""
+Snapshot archive of fetched listing pages, for re-extraction without refetching.
+
+With ``snapshots.enabled`` (or ``crawl --snapshots``) every listing page the
+crawl fetches is appended to the archive under ``DATA_DIR/snapshots``; the
+``reparse`` command later runs the site extractors over it and regenerates
+``products.jsonl``, e.g. after a markup change or a new extracted field.
+
+Layout, loosely after WARC:
+
+    segments/<created>-<writer>.snap.zst   append-only; one compressed frame per page
+    index.sqlite                            (url, fetched_at) -> segment, offset, length
+
+Every page is its own zstd frame (gzip member when ``zstandard`` is not
+installed), so one page is read with a seek and a single decompress, and a
+segment cut short by a crash loses only its torn tail. A frame holds one
+JSON header line (url, fetch time, site, kind, label, query, page) and the
+UTF-8 HTML, so a segment still describes itself without the index. Each
+writer (crawl process, distributed worker) appends to its own segment and
+starts a new one past ``segment_bytes``.
+
+Retention works on whole closed segments: ``max_age_days`` drops segments
+whose newest page is older than that, ``max_bytes`` drops the oldest ones
+until the archive fits. It runs when a crawl closes its archive and on
+``snapshots --prune``.
+"""
+from __future__ import annotations
+import gzip, json, os, sqlite3, time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"SNAP/1 "
+_STALE_SECONDS = 86400  # an unclosed segment idle this long belongs to a dead writer
+
+
+def _compressor(level: Optional[int]):
+    try:
+        import zstandard
+        return "zstd", zstandard.ZstdCompressor(level=3 if level is None else level).compress
+    except ImportError:
+        # zstd levels don't map onto zlib's; the fallback keeps gzip's default
+        return "gzip", lambda b: gzip.compress(b, 6, mtime=0)
+
+
+def _decompressor(codec: str):
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress
+    return gzip.decompress
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Index entry of one archived page."""
+    id: int
+    url: str
+    fetched_at: float
+    site: str
+    kind: str
+    label: str
+    query: Optional[str]
+    page: int
+    segment: str
+    offset: int
+    length: int
+
+    @property
+    def scraped_at(self) -> str:
+        # same naive-UTC form as utc_now_iso, from the original fetch time
+        return datetime.fromtimestamp(self.fetched_at, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+@dataclass
+class PruneStats:
+    segments: int = 0
+    pages: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class ArchiveStats:
+    pages_added: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    segments_opened: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {"pages": self.pages_added, "html_bytes": self.bytes_in, "stored_bytes": self.bytes_out,
+                "ratio": round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else None,
+                "segments": list(self.segments_opened)}
+
+
+class SnapshotArchive:
+    """
+    Append-only page archive with an SQLite offset index (see module docstring).
+
+    ``add`` appends a page to this writer's current segment; index rows are
+    committed every ``commit_every`` pages (after the segment is flushed, so
+    a committed row always points at bytes on disk) and on ``close``, which
+    also applies the retention policy if this archive wrote pages. Readers
+    use ``select`` and ``read_page``; both work while crawls are appending.
+    """
+
+    def __init__(self, root: os.PathLike, writer_id: str = "local", level: Optional[int] = None,
+                 segment_bytes: int = 64 << 20, max_age_days: float = 0, max_bytes: int = 0,
+                 commit_every: int = 50):
+        self.root = Path(root)
+        self.seg_dir = self.root / "segments"
+        self.seg_dir.mkdir(parents=True, exist_ok=True)
+        self.writer_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in writer_id)
+        self.level = level
+        self.segment_bytes = int(segment_bytes)
+        self.max_age = float(max_age_days or 0) * 86400
+        self.max_bytes = int(max_bytes or 0)
+        self.commit_every = int(commit_every)
+        self.stats = ArchiveStats()
+        self.db = sqlite3.connect(os.fspath(self.root / "index.sqlite"), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " name TEXT PRIMARY KEY, codec TEXT NOT NULL, created_at REAL NOT NULL, last_at REAL NOT NULL,"
+            " pages INTEGER NOT NULL DEFAULT 0, bytes INTEGER NOT NULL DEFAULT 0, closed_at REAL);"
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " id INTEGER PRIMARY KEY, url TEXT NOT NULL, fetched_at REAL NOT NULL, site TEXT NOT NULL,"
+            " kind TEXT, label TEXT, query TEXT, page INTEGER, segment TEXT NOT NULL,"
+            " offset INTEGER NOT NULL, length INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS pages_url ON pages (url, fetched_at);"
+            "CREATE INDEX IF NOT EXISTS pages_segment ON pages (segment);"
+        )
+        self._codec: Optional[str] = None
+        self._compress = None
+        self._f = None
+        self._segment: Optional[str] = None
+        self._dirty = 0
+
+    @classmethod
+    def from_settings(cls, settings: dict, root: os.PathLike, writer_id: str = "local") -> "SnapshotArchive":
+        s = (settings or {}).get("snapshots") or {}
+        return cls(root, writer_id=writer_id, level=s.get("level"),
+                   segment_bytes=int(s.get("segment_bytes", 64 << 20)),
+                   max_age_days=float(s.get("max_age_days") or 0), max_bytes=int(s.get("max_bytes") or 0))
+
+    def __enter__(self) -> "SnapshotArchive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    # -------------------- write --------------------
+
+    def _open_segment(self) -> None:
+        if self._compress is None:
+            self._codec, self._compress = _compressor(self.level)
+        now = time.time()
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now))
+        ext = "zst" if self._codec == "zstd" else "gz"
+        name = f"{stamp}-{self.writer_id}-{len(self.stats.segments_opened)}.snap.{ext}"
+        self._f = open(self.seg_dir / name, "ab")
+        self._segment = name
+        self.db.execute("INSERT OR IGNORE INTO segments (name, codec, created_at, last_at) VALUES (?,?,?,?)",
+                        (name, self._codec, now, now))
+        self.stats.segments_opened.append(name)
+
+    def _close_segment(self) -> None:
+        if self._f is None:
+            return
+        self._f.close()
+        self.db.execute("UPDATE segments SET closed_at=? WHERE name=?", (time.time(), self._segment))
+        self._f = self._segment = None
+
+    def add(self, url: str, html: str, site: str, kind: str = "", label: str = "",
+            query: Optional[str] = None, page: int = 1, fetched_at: Optional[float] = None) -> None:
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        if self._f is not None and self._f.tell() >= self.segment_bytes:
+            self._close_segment()
+        if self._f is None:
+            self._open_segment()
+        head = {"url": url, "fetched_at": fetched_at, "site": site, "kind": kind, "label": label,
+                "query": query, "page": page}
+        body = html.encode("utf-8")
+        blob = self._compress(MAGIC + json.dumps(head, ensure_ascii=False).encode("utf-8") + b"\n" + body)
+        offset = self._f.tell()
+        self._f.write(blob)
+        self.db.execute("INSERT INTO pages (url, fetched_at, site, kind, label, query, page, segment, offset, length)"
+                        " VALUES (?,?,?,?,?,?,?,?,?,?)",
+                        (url, fetched_at, site, kind, label, query, page, self._segment, offset, len(blob)))
+        self.db.execute("UPDATE segments SET last_at=?, pages=pages+1, bytes=bytes+? WHERE name=?",
+                        (fetched_at, len(blob), self._segment))
+        self.stats.pages_added += 1
+        self.stats.bytes_in += len(body)
+        self.stats.bytes_out += len(blob)
+        self._dirty += 1
+        if self.commit_every and self._dirty >= self.commit_every:
+            self.commit()
+
+    def commit(self) -> None:
+        if self._f is not None:
+            self._f.flush()
+        self.db.commit()
+        self._dirty = 0
+
+    def close(self) -> None:
+        if self.db is None:
+            return
+        try:
+            self._close_segment()
+            self.commit()
+            # only writers apply retention; readers (reparse, status) never delete
+            if self.stats.segments_opened and (self.max_age or self.max_bytes):
+                self.prune()
+        finally:
+            self.db.close()
+            self.db = None
+
+    # -------------------- retention --------------------
+
+    def prune(self, max_age_days: Optional[float] = None, max_bytes: Optional[int] = None,
+              now: Optional[float] = None) -> PruneStats:
+        """
+        Drop whole segments past ``max_age_days`` or beyond ``max_bytes``
+        (oldest first); both default to the archive's policy, 0 disables.
+        """
+        now = time.time() if now is None else now
+        max_age = self.max_age if max_age_days is None else float(max_age_days) * 86400
+        max_bytes = self.max_bytes if max_bytes is None else int(max_bytes)
+        rows = self.db.execute(
+            "SELECT name, last_at, pages, bytes FROM segments WHERE closed_at IS NOT NULL OR last_at<?"
+            " ORDER BY last_at", (now - _STALE_SECONDS,)).fetchall()
+        total = self.db.execute("SELECT COALESCE(SUM(bytes), 0) FROM segments").fetchone()[0]
+        drop = []
+        for name, last_at, pages, size in rows:
+            if (max_age and last_at < now - max_age) or (max_bytes and total > max_bytes):
+                drop.append((name, pages, size))
+                total -= size
+        ps = PruneStats()
+        for name, pages, size in drop:
+            # index rows go first: a crash in between leaves an orphan file, never a dangling row
+            with self.db:
+                self.db.execute("DELETE FROM pages WHERE segment=?", (name,))
+                self.db.execute("DELETE FROM segments WHERE name=?", (name,))
+            try:
+                (self.seg_dir / name).unlink()
+            except FileNotFoundError:
+                pass
+            ps.segments += 1
+            ps.pages += pages
+            ps.bytes += size
+        return ps
+
+    # -------------------- read --------------------
+
+    def select(self, site: Optional[str] = None, until: Optional[float] = None,
+               all_versions: bool = False) -> List[Snapshot]:
+        """
+        Archived pages in fetch order: the newest copy of each listing page
+        (site, label, URL) as of ``until``, or every copy with ``all_versions``.
+        """
+        where, args = ["1=1"], []
+        if site:
+            where.append("site=?")
+            args.append(site)
+        if until is not None:
+            where.append("fetched_at<=?")
+            args.append(until)
+        cols = "id, url, fetched_at, site, kind, label, query, page, segment, offset, length"
+        sql = f"SELECT {cols} FROM pages WHERE {' AND '.join(where)}"
+        if not all_versions:
+            sql = (f"SELECT {cols} FROM pages WHERE id IN (SELECT id FROM ("
+                   f" SELECT id, ROW_NUMBER() OVER (PARTITION BY site, label, url ORDER BY fetched_at DESC, id DESC) AS n"
+                   f" FROM pages WHERE {' AND '.join(where)}) WHERE n=1)")
+        return [Snapshot(*r) for r in self.db.execute(sql + " ORDER BY fetched_at, id", args)]
+
+    def summary(self) -> Dict[str, object]:
+        pages, urls, first, last = self.db.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT url), MIN(fetched_at), MAX(fetched_at) FROM pages").fetchone()
+        segs, size, open_ = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0), COALESCE(SUM(closed_at IS NULL), 0) FROM segments").fetchone()
+        return {"pages": pages, "urls": urls, "segments": segs, "open_segments": open_, "bytes": size,
+                "first_fetch": first, "last_fetch": last}
+
+
+def read_page(root: os.PathLike, snap: Snapshot) -> Tuple[dict, str]:
+    """Header and HTML of one archived page (one seek, one decompress)."""
+    with open(Path(root) / "segments" / snap.segment, "rb") as f:
+        f.seek(snap.offset)
+        blob = f.read(snap.length)
+    data = _decompressor("zstd" if snap.segment.endswith(".zst") else "gzip")(blob)
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{snap.segment}@{snap.offset}: not a snapshot record")
+    head, _, body = data[len(MAGIC):].partition(b"\n")
+    return json.loads(head), body.decode("utf-8")
+
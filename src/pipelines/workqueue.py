@@ -0,0 +1,303 @@
+"""
+Shared work queue for distributed crawls (``crawl --queue``).
+
+Several crawler processes or replicas work through one run. Seed pages are
+published into the queue. Every replica publishes the same seeds, and
+publishing is idempotent per ``(run, key)``, so all replicas can start with
+the same command. Workers claim pages with a lease and renew it while
+working. A page whose worker stops renewing it (crash, lost replica) goes
+back to the queue once the lease expires, up to ``max_attempts`` claims.
+Follow-up pages (pagination) are published back into the queue, so any
+replica may pick them up.
+
+The same store coordinates politeness across replicas. ``reserve(host,
+interval)`` hands out the next free request slot for a host, at most one
+per ``interval`` seconds over all replicas. ``backoff`` makes every replica
+pause a host after one of them was throttled.
+
+Backends implement ``WorkQueue``. ``open_queue`` picks one from a spec:
+a plain path or ``sqlite:///path`` gives the built-in SQLite backend (WAL
+mode, safe for many processes on one host or a shared disk). Register
+others (e.g. a network service) with ``register_backend``.
+"""
+from __future__ import annotations
+import json, os, socket, sqlite3, threading, time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+STATES = ("pending", "leased", "done", "failed")
+
+
+class WorkQueue(ABC):
+    """Leased task queue plus per-host request slots, shared by all workers of a run."""
+
+    max_attempts: int = 3
+
+    # ---- tasks ----
+
+    @abstractmethod
+    def publish(self, run: str, tasks: Iterable[Tuple[str, dict]]) -> int:
+        """Add ``(key, payload)`` tasks to ``run``; keys already in the run are ignored. Returns how many were new."""
+
+    @abstractmethod
+    def claim(self, run: str, worker: str, limit: int, lease: float) -> List[Tuple[int, dict]]:
+        """Lease up to ``limit`` pending (or expired) tasks to ``worker`` for ``lease`` seconds."""
+
+    @abstractmethod
+    def renew(self, run: str, worker: str, ids: Iterable[int], lease: float) -> int:
+        """Extend ``worker``'s leases on ``ids``; returns how many it still held."""
+
+    @abstractmethod
+    def complete(self, run: str, worker: str, task_id: int) -> None:
+        """Mark a task done."""
+
+    @abstractmethod
+    def fail(self, run: str, worker: str, task_id: int, error: str) -> None:
+        """Give a task back after an error; it fails for good after ``max_attempts`` claims."""
+
+    @abstractmethod
+    def counts(self, run: str) -> Dict[str, int]:
+        """Tasks per state."""
+
+    def active(self, run: str) -> int:
+        """Tasks not finished yet (pending or leased, expired leases included)."""
+        c = self.counts(run)
+        return c.get("pending", 0) + c.get("leased", 0)
+
+    @abstractmethod
+    def finish(self, run: str, worker: str) -> bool:
+        """True for exactly one caller once every task of ``run`` is done or failed (that worker merges)."""
+
+    @abstractmethod
+    def finished(self, run: str) -> bool:
+        """Whether ``run`` has already been finished (and merged) by one of its workers."""
+
+    # ---- politeness ----
+    # called from the session's gate thread, not the event loop; must be thread-safe
+
+    @abstractmethod
+    def reserve(self, host: str, interval: float) -> float:
+        """Take the next request slot for ``host``; returns seconds to wait before sending."""
+
+    @abstractmethod
+    def backoff(self, host: str, seconds: float) -> None:
+        """Keep every worker off ``host`` for ``seconds``."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SqliteQueue(WorkQueue):
+    """
+    ``WorkQueue`` on one SQLite file; every state change is a short ``BEGIN
+    IMMEDIATE`` transaction. Host slots use a second connection, since
+    ``HttpSession`` reserves them from its gate thread.
+    """
+
+    def __init__(self, path: os.PathLike, max_attempts: int = 3, timeout: float = 30.0):
+        os.makedirs(os.path.dirname(os.fspath(path)) or ".", exist_ok=True)
+        self.path = path
+        self.max_attempts = int(max_attempts)
+        self.timeout = timeout
+        # autocommit; transactions are opened explicitly so the write lock is never held across awaits
+        self.db = sqlite3.connect(os.fspath(path), timeout=timeout, isolation_level=None)
+        self._slots: Optional[sqlite3.Connection] = None
+        self._slots_lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id INTEGER PRIMARY KEY, run TEXT NOT NULL, key TEXT NOT NULL, payload TEXT NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'pending', owner TEXT, lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated_at REAL, UNIQUE (run, key));"
+            "CREATE INDEX IF NOT EXISTS tasks_state ON tasks (run, state, id);"
+            "CREATE TABLE IF NOT EXISTS runs (run TEXT PRIMARY KEY, created_at REAL, finished_by TEXT, finished_at REAL);"
+            "CREATE TABLE IF NOT EXISTS hosts ("
+            " host TEXT PRIMARY KEY, next_at REAL NOT NULL DEFAULT 0, backoff_until REAL NOT NULL DEFAULT 0"
+            ") WITHOUT ROWID;"
+        )
+
+    @contextmanager
+    def _tx(self, db: Optional[sqlite3.Connection] = None) -> Iterator[sqlite3.Connection]:
+        db = self.db if db is None else db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @contextmanager
+    def _slot_tx(self) -> Iterator[sqlite3.Connection]:
+        with self._slots_lock:
+            if self._slots is None:
+                self._slots = sqlite3.connect(os.fspath(self.path), timeout=self.timeout, isolation_level=None,
+                                              check_same_thread=False)
+            with self._tx(self._slots) as db:
+                yield db
+
+    # -------------------- tasks --------------------
+
+    def publish(self, run: str, tasks: Iterable[Tuple[str, dict]]) -> int:
+        now = time.time()
+        rows = [(run, key, json.dumps(payload), now) for key, payload in tasks]
+        with self._tx() as db:
+            db.execute("INSERT OR IGNORE INTO runs (run, created_at) VALUES (?, ?)", (run, now))
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO tasks (run, key, payload, updated_at) VALUES (?,?,?,?)", rows)
+            return db.total_changes - before
+
+    def claim(self, run: str, worker: str, limit: int, lease: float) -> List[Tuple[int, dict]]:
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._tx() as db:
+            # a task whose lease ran out after its last allowed attempt is given up on
+            db.execute("UPDATE tasks SET state='failed', error='lease expired', updated_at=?"
+                       " WHERE run=? AND state='leased' AND lease_until<? AND attempts>=?",
+                       (now, run, now, self.max_attempts))
+            rows = db.execute(
+                "UPDATE tasks SET state='leased', owner=?, lease_until=?, attempts=attempts+1, updated_at=?"
+                " WHERE id IN (SELECT id FROM tasks WHERE run=?"
+                "  AND (state='pending' OR (state='leased' AND lease_until<?)) ORDER BY id LIMIT ?)"
+                " RETURNING id, payload",
+                (worker, now + lease, now, run, now, int(limit))).fetchall()
+        return [(i, json.loads(p)) for i, p in sorted(rows)]
+
+    def renew(self, run: str, worker: str, ids: Iterable[int], lease: float) -> int:
+        ids = list(ids)
+        if not ids:
+            return 0
+        now = time.time()
+        with self._tx() as db:
+            before = db.total_changes
+            db.executemany("UPDATE tasks SET lease_until=?, updated_at=? WHERE id=? AND run=? AND owner=? AND state='leased'",
+                           [(now + lease, now, i, run, worker) for i in ids])
+            return db.total_changes - before
+
+    def complete(self, run: str, worker: str, task_id: int) -> None:
+        with self._tx() as db:
+            # also accepted after the lease expired: the work is done either way
+            db.execute("UPDATE tasks SET state='done', owner=?, lease_until=NULL, updated_at=? WHERE id=? AND run=?",
+                       (worker, time.time(), task_id, run))
+
+    def fail(self, run: str, worker: str, task_id: int, error: str) -> None:
+        with self._tx() as db:
+            db.execute("UPDATE tasks SET state=CASE WHEN attempts>=? THEN 'failed' ELSE 'pending' END,"
+                       " lease_until=NULL, error=?, updated_at=? WHERE id=? AND run=? AND owner=? AND state='leased'",
+                       (self.max_attempts, error[:500], time.time(), task_id, run, worker))
+
+    def counts(self, run: str) -> Dict[str, int]:
+        rows = self.db.execute("SELECT state, COUNT(*) FROM tasks WHERE run=? GROUP BY state", (run,)).fetchall()
+        return {s: 0 for s in STATES} | dict(rows)
+
+    def finish(self, run: str, worker: str) -> bool:
+        with self._tx() as db:
+            left = db.execute("SELECT COUNT(*) FROM tasks WHERE run=? AND state IN ('pending','leased')",
+                              (run,)).fetchone()[0]
+            if left:
+                return False
+            cur = db.execute("UPDATE runs SET finished_by=?, finished_at=? WHERE run=? AND finished_by IS NULL",
+                             (worker, time.time(), run))
+            return cur.rowcount == 1
+
+    def finished(self, run: str) -> bool:
+        row = self.db.execute("SELECT finished_by FROM runs WHERE run=?", (run,)).fetchone()
+        return row is not None and row[0] is not None
+
+    # -------------------- politeness --------------------
+
+    def reserve(self, host: str, interval: float) -> float:
+        with self._slot_tx() as db:
+            now = time.time()  # after the lock: the wait for it must not shift the slot
+            row = db.execute("SELECT next_at, backoff_until FROM hosts WHERE host=?", (host,)).fetchone()
+            start = max(now, *row) if row else now
+            db.execute("INSERT INTO hosts (host, next_at) VALUES (?, ?)"
+                       " ON CONFLICT (host) DO UPDATE SET next_at=excluded.next_at", (host, start + interval))
+        return start - now
+
+    def backoff(self, host: str, seconds: float) -> None:
+        until = time.time() + seconds
+        with self._slot_tx() as db:
+            db.execute("INSERT INTO hosts (host, backoff_until) VALUES (?, ?)"
+                       " ON CONFLICT (host) DO UPDATE SET backoff_until=MAX(backoff_until, excluded.backoff_until)",
+                       (host, until))
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        with self._slots_lock:
+            if self._slots is not None:
+                self._slots.close()
+                self._slots = None
+
+
+# -------------------- backends --------------------
+
+BACKENDS: Dict[str, Callable[..., WorkQueue]] = {"sqlite": SqliteQueue}
+
+
+def register_backend(scheme: str, factory: Callable[..., WorkQueue]) -> None:
+    """Make ``open_queue("<scheme>://...")`` build queues with ``factory(rest, **opts)``."""
+    BACKENDS[scheme] = factory
+
+
+def open_queue(spec: str, **opts) -> WorkQueue:
+    """Queue for ``spec``: ``sqlite:///abs/path``, ``sqlite://rel/path``, a plain path, or a registered scheme."""
+    scheme, sep, rest = spec.partition("://")
+    if not sep:
+        scheme, rest = "sqlite", spec
+    factory = BACKENDS.get(scheme)
+    if factory is None:
+        raise ValueError(f"unknown queue backend {scheme!r}; known: {', '.join(sorted(BACKENDS))}")
+    return factory(rest, **opts)
+
+
+# -------------------- results --------------------
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _part_ext(out: str) -> str:
+    base = os.path.basename(out)
+    return base[base.index(".jsonl"):] if ".jsonl" in base else os.path.splitext(base)[1]
+
+
+def part_path(out: str, run: str, worker: str) -> str:
+    """Where one worker writes its share of ``out``: ``<out>.parts/<run>/<worker><ext>``."""
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in worker)
+    return os.path.join(f"{out}.parts", run, safe + _part_ext(out))
+
+
+def merge_parts(out: str, run: str, append: bool = False) -> int:
+    """
+    Concatenate every worker's part file of ``run`` into ``out`` (appended in
+    incremental mode). Plain JSONL, gzip members and zstd frames all stay
+    valid when concatenated, so no re-encoding is needed. Returns the number
+    of part files merged.
+    """
+    import shutil
+
+    run_dir, ext = os.path.join(f"{out}.parts", run), _part_ext(out)
+    parts = sorted(os.path.join(run_dir, n) for n in os.listdir(run_dir) if n.endswith(ext)) \
+        if os.path.isdir(run_dir) else []
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    tmp = f"{out}.merge.tmp"
+    if append and os.path.exists(out):
+        shutil.copyfile(out, tmp)
+    with open(tmp, "ab" if append else "wb") as dst:
+        for p in parts:
+            with open(p, "rb") as src:
+                shutil.copyfileobj(src, dst, 1 << 20)
+    os.replace(tmp, out)
+    return len(parts)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+import os
+from typing import List
+
+from src.common.schema import coerce_row, product_schema, require_pyarrow
+
+
+class ParquetWriter:
+    """
+    Batched Parquet writer with the typed ``ProductItem`` schema (or
+    ``schema``, e.g. ``clean_schema()`` for cleaned output).
+
+    Same surface as ``JsonlWriter`` (``write_one`` / ``flush`` / ``close``).
+    Rows are buffered and written as one record batch per ``batch_size``
+    rows; Parquet files cannot be appended to, so there is no ``append``.
+    """
+
+    def __init__(self, path: str, batch_size: int = 5000, compression: str = "zstd", schema=None):
+        require_pyarrow()
+        import pyarrow.parquet as pq
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.batch_size = int(batch_size)
+        self.schema = schema if schema is not None else product_schema()
+        self._w = pq.ParquetWriter(path, self.schema, compression=compression)
+        self._rows: List[dict] = []
+        self.rows_written = 0
+
+    def write_one(self, obj: dict):
+        self._rows.append(coerce_row(dict(obj)))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self, fsync: bool = False):
+        if not self._rows:
+            return
+        import pyarrow as pa
+        batch = pa.RecordBatch.from_pylist(self._rows, schema=self.schema)
+        self._w.write_batch(batch)
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+    def close(self):
+        if self._w is not None:
+            self.flush()
+            self._w.close()
+            self._w = None
+
+
+def open_writer(path: str, append: bool = False, **opts):
+    """
+    JSONL (optionally ``.gz`` / ``.zst``) or Parquet writer, picked by file
+    extension. ``opts`` are the ``writer:`` settings (batch/flush thresholds,
+    compression level); Parquet only uses ``batch_size``.
+    """
+    if path.endswith(".parquet"):
+        if append:
+            raise ValueError("Parquet output cannot be appended to; use a .jsonl output for "
+                             "--incremental/--resume")
+        return ParquetWriter(path, **({"batch_size": opts["batch_size"]} if "batch_size" in opts else {}))
+    from src.pipelines.write_jsonl import JsonlWriter
+    return JsonlWriter(path, append=append, **opts)
@@ -1,32 +1,15 @@
 import asyncio
-from typing import AsyncGenerator, Iterable, Optional, Union
+from typing import TYPE_CHECKING, AsyncGenerator, Iterable
 
-import httpx
-from parsel import Selector
+from src.common.records import ProductRecord
+from src.sites.base import SiteFetcher, _jittered_delay
+from src.sites.pagination import Pagination
 
-from src.common.models import ProductItem  # your existing model
+if TYPE_CHECKING:
+    from src.common.models import ProductItem
 
 
-def _jittered_delay(base: float, jitter: float) -> float:
-    import random
-    return max(0.05, base + random.uniform(-jitter, jitter))
-
-
-def _load_settings(settings_or_path: Optional[Union[str, dict]]) -> dict:
-    """
-    Accepts either a dict or a YAML file path and returns a dict.
-    """
-    if isinstance(settings_or_path, dict) or settings_or_path is None:
-        return settings_or_path or {}
-    try:
-        import yaml  # PyYAML
-        with open(settings_or_path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f) or {}
-    except Exception:
-        return {}
-
-
-class AlibabaFetcher:
+class AlibabaFetcher(SiteFetcher):
     """
     Lightweight HTML fetcher for Alibaba showroom/category pages.
 
@@ -34,98 +17,66 @@ class AlibabaFetcher:
         AlibabaFetcher(settings_cfg, proxy=..., respect_robots=...)
 
     - Accepts settings as dict OR YAML path.
-    - HTTP/2 disabled to avoid 'h2' dependency.
+    - HTTP via a pooled HttpSession (HTTP/2 only when 'h2' is installed);
+      pass ``session=`` to share one across fetchers.
     - Resilient per-URL try/except around network access.
-    """
-
-    def __init__(
-        self,
-        settings: Optional[Union[str, dict]] = None,
-        proxy: Optional[str] = None,
-        respect_robots: bool = True,
-    ):
-        self.settings = _load_settings(settings)
-        self.user_agent_pool = self.settings.get("user_agent_pool", [])
-        self.timeout = float(self.settings.get("timeout_seconds", 20))
-        self.proxy = proxy or (self.settings.get("proxy") or "").strip() or None
-        self.respect_robots = bool(respect_robots)
 
-    # -------------------- helpers --------------------
+    Fetching, parsing and the page-level API live in ``SiteFetcher``
+    (``src/sites/base.py``).
+    """
 
-    def _headers(self) -> dict:
-        import random
-        ua = random.choice(self.user_agent_pool) if self.user_agent_pool else (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
-        )
-        return {
-            "user-agent": ua,
-            "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "accept-language": "en-US,en;q=0.9",
-            "cache-control": "no-cache",
-        }
-
-    async def _get(self, client: httpx.AsyncClient, url: str) -> str:
-        """
-        Minimal retry loop for a single GET; respects global timeout.
-        """
-        last_err = None
-        retries = int(self.settings.get("max_retries", 3))
-        for _ in range(max(1, retries)):
-            try:
-                r = await client.get(url, timeout=self.timeout)
-                r.raise_for_status()
-                return r.text
-            except Exception as e:
-                last_err = e
-                await asyncio.sleep(0.75)
-        raise last_err or RuntimeError("request failed")
+    site = "alibaba"
+    log_name = "Alibaba"
+    page_kind = "showroom"
 
     # -------------------- public iterators --------------------
 
-    async def iter_showroom_pages(
+    async def iter_showroom_records(
         self,
         showroom_urls: Iterable[str],
         label: str,
         base_delay: float = 1.2,
         jitter: float = 1.0,
-    ) -> AsyncGenerator[ProductItem, None]:
+        max_pages: int = 1,
+    ) -> AsyncGenerator[ProductRecord, None]:
         """
-        Iterate showroom pages and yield lightweight ProductItem stubs.
+        Iterate showroom pages and yield unvalidated ``ProductRecord``s.
+        With ``max_pages > 1`` each showroom's next links are followed until
+        a failed, empty or repeated page (see ``src/sites/pagination.py``).
         """
-        async with httpx.AsyncClient(
-            http2=False,  # IMPORTANT: avoid requiring 'h2'
-            headers=self._headers(),
-            follow_redirects=True,
-            proxies=self.proxy,
-        ) as client:
+        async with self._session() as session:
+            first = True
             for url in showroom_urls:
                 if not url:
                     continue
-                try:
-                    html = await self._get(client, url)
-                except Exception as e:
-                    print(f"[Alibaba] showroom error: {url} -> {e}")
-                    await asyncio.sleep(_jittered_delay(base_delay, jitter))
-                    continue
+                pager = Pagination(max_pages, follow_next=self.follow_next)
+                page = 1
+                while url:
+                    if not first:
+                        await asyncio.sleep(_jittered_delay(base_delay, jitter))
+                    first = False
+                    try:
+                        html = await self._get(session, url)
+                    except Exception as e:
+                        print(f"[Alibaba] showroom error: {url} -> {e}")
+                        break
+                    items, next_href = self.parse_page(html, url, label)
+                    for item in items:
+                        yield item
+                    url, _ = pager.advance(url, page, [i.product_page_url for i in items], next_href)
+                    page += 1
 
-                sel = Selector(html)
-
-                # product tiles typically link to '/product-detail/'
-                for a_html in sel.css("a[href*='/product-detail/']").getall():
-                    s = Selector(text=a_html)
-                    href = s.css("a::attr(href)").get()
-                    title = s.css("a::attr(title), a::text").get()
-                    if href:
-                        yield ProductItem(
-                            site="alibaba",
-                            category=label,
-                            title=(title or "").strip() or None,
-                            product_page_url=href,
-                            url=url,
-                        )
-
-                await asyncio.sleep(_jittered_delay(base_delay, jitter))
+    async def iter_showroom_pages(
+        self,
+        showroom_urls: Iterable[str],
+        label: str,
+        base_delay: float = 1.2,
+        jitter: float = 1.0,
+        max_pages: int = 1,
+    ) -> AsyncGenerator["ProductItem", None]:
+        """``iter_showroom_records`` as validated ``ProductItem``s."""
+        async for rec in self.iter_showroom_records(showroom_urls, label, base_delay, jitter, max_pages):
+            yield rec.to_model()
 
     # ---- compatibility aliases (match CLI expectations) ----
 
@@ -135,7 +86,8 @@ class AlibabaFetcher:
         label: str,
         base_delay: float = 1.2,
         jitter: float = 1.0,
-    ) -> AsyncGenerator[ProductItem, None]:
+        max_pages: int = 1,
+    ) -> AsyncGenerator["ProductItem", None]:
         """
         Some CLIs call this name. Delegate to iter_showroom_pages.
         """
@@ -144,6 +96,7 @@ class AlibabaFetcher:
             label=label,
             base_delay=base_delay,
             jitter=jitter,
+            max_pages=max_pages,
         ):
             yield item
 
@@ -153,7 +106,8 @@ class AlibabaFetcher:
         label: str,
         base_delay: float = 1.2,
         jitter: float = 1.0,
-    ) -> AsyncGenerator[ProductItem, None]:
+        max_pages: int = 1,
+    ) -> AsyncGenerator["ProductItem", None]:
         """
         Some CLIs call this name. Delegate to iter_showroom_pages.
         """
@@ -162,5 +116,6 @@ class AlibabaFetcher:
             label=label,
             base_delay=base_delay,
             jitter=jitter,
+            max_pages=max_pages,
         ):
             yield item
@@ -0,0 +1,175 @@
+"""
+Shared plumbing for the marketplace fetchers (``IndiaMartFetcher``,
+``AlibabaFetcher``): settings loading, request headers, the retrying
+``_get``, page parsing into ``ProductRecord``s and the page-level API.
+
+Two result types are on offer. The crawl hot path uses ``parse_page`` /
+``fetch_records`` (and the ``*_records`` iterators), which build plain
+``ProductRecord``s without validation. ``parse_listing``, ``fetch_page``
+and the public ``iter_*`` iterators keep returning validated
+``ProductItem`` models, as they always have, for external callers.
+"""
+from __future__ import annotations
+import asyncio
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+
+from src.common.http import HttpSession
+from src.common.metrics import METRICS, Metrics
+from src.common.records import ProductRecord, utc_now_iso
+from src.common.ratelimit import is_retryable
+from src.common.robots import RobotsCache, RobotsDisallowed
+from src.sites.detail import extract_detail
+from src.sites.extract import extract_page
+
+if TYPE_CHECKING:
+    from src.common.models import ProductItem
+
+
+def _jittered_delay(base: float, jitter: float) -> float:
+    import random
+    return max(0.05, base + random.uniform(-jitter, jitter))
+
+
+def _load_settings(settings_or_path: Optional[Union[str, dict]]) -> dict:
+    """
+    Accepts either a dict or a YAML file path and returns a dict.
+    """
+    if isinstance(settings_or_path, dict) or settings_or_path is None:
+        return settings_or_path or {}
+    try:
+        import yaml  # PyYAML
+        with open(settings_or_path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    except Exception:
+        return {}
+
+
+class SiteFetcher:
+    """
+    Base class of the site fetchers. Subclasses set ``site`` (the record's
+    ``site`` and metrics label), ``log_name`` and ``page_kind`` (used in
+    error messages) and add their own listing iterators.
+    """
+
+    site = ""
+    log_name = ""
+    page_kind = "page"
+
+    def __init__(
+        self,
+        settings: Optional[Union[str, dict]] = None,
+        proxy: Optional[str] = None,
+        respect_robots: bool = True,
+        session: Optional[HttpSession] = None,
+        robots: Optional[RobotsCache] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.settings = _load_settings(settings)
+        self.user_agent_pool = self.settings.get("user_agent_pool", [])
+        self.timeout = float(self.settings.get("timeout_seconds", 20))
+        self.proxy = proxy or (self.settings.get("proxy") or "").strip() or None
+        self.respect_robots = bool(respect_robots)
+        # share one RobotsCache across fetchers so each origin's robots.txt is fetched once
+        self.robots = (robots or RobotsCache.from_settings(self.settings)) if self.respect_robots else None
+        self.session = session
+        self.metrics = metrics or (session.metrics if session is not None else METRICS)
+        self.parser_backend = self.settings.get("parser_backend")
+        self.follow_next = bool((self.settings.get("pagination") or {}).get("follow_next", True))
+
+    # -------------------- helpers --------------------
+
+    def _headers(self) -> dict:
+        import random
+        ua = random.choice(self.user_agent_pool) if self.user_agent_pool else (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+        )
+        return {
+            "user-agent": ua,
+            "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "accept-language": "en-US,en;q=0.9",
+            "cache-control": "no-cache",
+        }
+
+    def _session(self):
+        """
+        Shared session if one was injected, else a private one for this call.
+        """
+        if self.session is not None:
+            return nullcontext(self.session)
+        return HttpSession(self.settings, proxy=self.proxy)
+
+    async def _get(self, session: HttpSession, url: str) -> str:
+        """
+        Minimal retry loop for a single GET; respects global timeout.
+        """
+        if self.robots is not None and not await self.robots.allowed(session, url):
+            raise RobotsDisallowed(url)
+        last_err = None
+        retries = int(self.settings.get("max_retries", 3))
+        with session.metrics.time("fetch_seconds", site=self.site):
+            for attempt in range(max(1, retries)):
+                if attempt:
+                    session.metrics.inc("fetch_retries_total", site=self.site)
+                try:
+                    r = await session.get(url, headers=self._headers(), timeout=self.timeout)
+                    r.raise_for_status()
+                    return r.text
+                except Exception as e:
+                    last_err = e
+                    if not is_retryable(e):
+                        break
+                    # the session's rate limiter backs the host off before the next attempt
+                    if session.limiter is None:
+                        await asyncio.sleep(0.75)
+        raise last_err or RuntimeError("request failed")
+
+    # -------------------- page-level API --------------------
+
+    def parse_page(self, html: str, url: str, label: str) -> Tuple[List[ProductRecord], Optional[str]]:
+        """
+        Product records (link, title, price, MOQ, supplier, location) of a
+        listing page in one pass, plus its next-link href (None if it has none).
+        """
+        with self.metrics.time("parse_seconds", site=self.site, kind="listing"):
+            records, next_href = extract_page(html, self.site, backend=self.parser_backend)
+        with self.metrics.time("build_items_seconds", site=self.site):
+            now = utc_now_iso()
+            return [ProductRecord(site=self.site, category=label, url=url, scraped_at=now, **rec)
+                    for rec in records], next_href
+
+    def parse_listing(self, html: str, url: str, label: str) -> List[ProductItem]:
+        """Validated ``ProductItem``s of a listing page (``parse_page`` without the next link)."""
+        return [r.to_model() for r in self.parse_page(html, url, label)[0]]
+
+    def parse_detail(self, html: str, url: str) -> dict:
+        """
+        Extract price, MOQ, supplier, rating, reviews and images from a
+        product detail page (see ``src/sites/detail.py``).
+        """
+        with self.metrics.time("parse_seconds", site=self.site, kind="detail"):
+            return extract_detail(html, self.site, url)
+
+    async def fetch_html(self, session: HttpSession, url: str) -> Optional[str]:
+        """
+        Fetch a single page. Errors are logged and return None.
+        """
+        try:
+            return await self._get(session, url)
+        except Exception as e:
+            print(f"[{self.log_name}] {self.page_kind} error: {url} -> {e}")
+            return None
+
+    async def fetch_records(self, session: HttpSession, url: str, label: str) -> List[ProductRecord]:
+        """
+        Fetch and parse a single listing page into ``ProductRecord``s.
+        """
+        html = await self.fetch_html(session, url)
+        return self.parse_page(html, url, label)[0] if html else []
+
+    async def fetch_page(self, session: HttpSession, url: str, label: str) -> List[ProductItem]:
+        """
+        Fetch and parse a single listing page into ``ProductItem``s.
+        """
+        return [r.to_model() for r in await self.fetch_records(session, url, label)]
@@ -0,0 +1,215 @@
+"""
+Product detail page extraction for the enrichment stage.
+
+Detail pages are read in three layers, each only filling what the previous
+one left empty:
+
+1. schema.org ``Product`` JSON-LD (offers, aggregateRating, image, brand /
+   seller), which both marketplaces embed for search engines;
+2. OpenGraph / product meta tags (``og:image``, ``product:price:amount``);
+3. class-name hints per site, walked once over the page like the listing
+   extractor does.
+
+Returns a dict with any of ``DETAIL_FIELDS``; missing values are omitted.
+"""
+from __future__ import annotations
+import json, re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+DETAIL_FIELDS = ("title", "price_text", "currency", "moq", "supplier_name", "supplier_location",
+                 "supplier_years", "rating", "reviews_count", "images")
+
+MAX_IMAGES = 12
+
+_NUM_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_YEARS_RE = re.compile(r"(\d+)\s*(?:\+\s*)?(?:yrs?|years?)", re.I)
+
+
+@dataclass(frozen=True)
+class DetailSpec:
+    """Class-name fragments per field (first match in document order wins)."""
+    title: Tuple[str, ...]
+    price: Tuple[str, ...]
+    moq: Tuple[str, ...]
+    supplier: Tuple[str, ...]
+    location: Tuple[str, ...]
+    years: Tuple[str, ...]
+    rating: Tuple[str, ...]
+    reviews: Tuple[str, ...]
+    gallery: Tuple[str, ...]
+
+
+DETAIL_SPECS: Dict[str, DetailSpec] = {
+    "indiamart": DetailSpec(
+        title=("bo center-heading", "prd-name", "pdp-title"),
+        price=("bo price-unit", "prc", "price"),
+        moq=("moq", "min-order", "minorder"),
+        supplier=("companyname", "cmp-nm", "company-name"),
+        location=("cityLocation", "location", "city"),
+        years=("gst-yr", "years", "yrs"),
+        rating=("rating-value", "ratingValue", "star-rating"),
+        reviews=("rating-count", "review-count", "reviews"),
+        gallery=("pdpImg", "img-zoom", "gallery", "thumb"),
+    ),
+    "alibaba": DetailSpec(
+        title=("product-title", "module-pdp-title", "title-text"),
+        price=("price-range", "promotion-price", "price"),
+        moq=("min-order", "moq", "quantity"),
+        supplier=("company-name", "supplier-name", "shop-name"),
+        location=("company-location", "register-country", "country"),
+        years=("company-year", "join-year", "year"),
+        rating=("review-score", "rating-score", "score"),
+        reviews=("review-count", "reviews-number", "review-num"),
+        gallery=("main-image", "detail-gallery", "image-thumb", "thumb"),
+    ),
+}
+
+_HINTS = (("title", "title"), ("price", "price_text"), ("moq", "moq"), ("supplier", "supplier_name"),
+          ("location", "supplier_location"), ("years", "supplier_years"), ("rating", "rating"),
+          ("reviews", "reviews_count"))
+
+
+def _clean(text) -> Optional[str]:
+    if text is None:
+        return None
+    return " ".join(str(text).split()) or None
+
+
+def _float(v) -> Optional[float]:
+    m = _NUM_RE.search(str(v)) if v is not None else None
+    return float(m.group(0).replace(",", "")) if m else None
+
+
+def _int(v) -> Optional[int]:
+    f = _float(v)
+    return int(f) if f is not None else None
+
+
+def _put(out: dict, key: str, value) -> None:
+    if value in (None, "", []) or out.get(key) not in (None, "", []):
+        return
+    out[key] = value
+
+
+# -------------------- JSON-LD / meta --------------------
+
+def _ld_products(data) -> List[dict]:
+    stack, out = [data], []
+    while stack:
+        d = stack.pop()
+        if isinstance(d, list):
+            stack.extend(d)
+        elif isinstance(d, dict):
+            kind = d.get("@type")
+            if kind == "Product" or (isinstance(kind, list) and "Product" in kind):
+                out.append(d)
+            stack.extend(v for k, v in d.items() if k == "@graph")
+    return out
+
+
+def _name(v) -> Optional[str]:
+    return _clean(v.get("name") if isinstance(v, dict) else v)
+
+
+def _from_json_ld(root, out: dict) -> None:
+    for node in root.xpath("//script[@type='application/ld+json']"):
+        try:
+            data = json.loads(node.text or "")
+        except ValueError:
+            continue
+        for p in _ld_products(data):
+            _put(out, "title", _clean(p.get("name")))
+            offers = p.get("offers") or {}
+            if isinstance(offers, list):
+                offers = offers[0] if offers else {}
+            lo = offers.get("lowPrice", offers.get("price"))
+            hi = offers.get("highPrice")
+            cur = offers.get("priceCurrency")
+            if lo is not None:
+                _put(out, "price_text", _clean(f"{cur or ''} {lo}" + (f" - {hi}" if hi not in (None, lo) else "")))
+            _put(out, "currency", _clean(cur))
+            qty = offers.get("eligibleQuantity")
+            if isinstance(qty, dict) and qty.get("value") is not None:
+                _put(out, "moq", _clean(f"{qty['value']} {qty.get('unitText') or ''}"))
+            seller = offers.get("seller") or p.get("brand") or p.get("manufacturer")
+            _put(out, "supplier_name", _name(seller))
+            agg = p.get("aggregateRating") or {}
+            _put(out, "rating", _float(agg.get("ratingValue")))
+            _put(out, "reviews_count", _int(agg.get("reviewCount", agg.get("ratingCount"))))
+            img = p.get("image")
+            imgs = img if isinstance(img, list) else [img] if img else []
+            _put(out, "images", [i.get("url") if isinstance(i, dict) else i for i in imgs if i])
+
+
+def _from_meta(root, out: dict) -> None:
+    meta = {}
+    for m in root.xpath("//meta[@property or @name][@content]"):
+        meta.setdefault((m.get("property") or m.get("name")).lower(), m.get("content"))
+    _put(out, "title", _clean(meta.get("og:title")))
+    amount = meta.get("product:price:amount") or meta.get("og:price:amount")
+    cur = meta.get("product:price:currency") or meta.get("og:price:currency")
+    if amount:
+        _put(out, "price_text", _clean(f"{cur or ''} {amount}"))
+        _put(out, "currency", _clean(cur))
+    if meta.get("og:image"):
+        _put(out, "images", [meta["og:image"]])
+
+
+# -------------------- class hints --------------------
+
+def _from_hints(root, spec: DetailSpec, out: dict) -> None:
+    found: Dict[str, str] = {}
+    images: List[str] = []
+    want = [h for h, key in _HINTS if out.get(key) in (None, "", [])]
+    for el in root.iter():
+        if not isinstance(el.tag, str):
+            continue
+        cls = el.get("class")
+        if not cls:
+            continue
+        for hint in want:
+            if hint not in found and any(frag in cls for frag in getattr(spec, hint)):
+                found[hint] = " ".join(el.itertext())
+        if any(frag in cls for frag in spec.gallery):
+            for img in (el,) if el.tag == "img" else el.iter("img"):
+                src = img.get("data-src") or img.get("src") or img.get("data-zoom")
+                if src and not src.startswith("data:"):
+                    images.append(src)
+    for hint, key in _HINTS:
+        if hint not in found:
+            continue
+        raw = found[hint]
+        if key == "rating":
+            _put(out, key, _float(raw))
+        elif key == "reviews_count":
+            _put(out, key, _int(raw))
+        elif key == "supplier_years":
+            m = _YEARS_RE.search(raw)
+            _put(out, key, f"{m.group(1)} yrs" if m else _clean(raw))
+        else:
+            _put(out, key, _clean(raw))
+    _put(out, "images", images)
+
+
+def extract_detail(html: str, site: str, url: Optional[str] = None) -> dict:
+    """Fields from a product detail page of ``site``; image URLs are made absolute against ``url``."""
+    from parsel import Selector
+
+    root = Selector(text=html).root
+    out: dict = {}
+    _from_json_ld(root, out)
+    _from_meta(root, out)
+    _from_hints(root, DETAIL_SPECS[site], out)
+    if out.get("images"):
+        seen, imgs = set(), []
+        for i in out["images"]:
+            i = urljoin(url or "", i.strip())
+            if i not in seen:
+                seen.add(i)
+                imgs.append(i)
+        out["images"] = imgs[:MAX_IMAGES]
+    if isinstance(out.get("rating"), float) and not 0 <= out["rating"] <= 5:
+        del out["rating"]
+    return {k: v for k, v in out.items() if k in DETAIL_FIELDS}
@@ -0,0 +1,90 @@
+"""
+End-of-results detection for paginated listings (search queries, showrooms).
+
+A ``Pagination`` follows one listing from its first page and decides after
+each page whether another is worth a request, and which URL that is. It
+stops when:
+
+    failed      the page could not be fetched (after the fetcher's retries)
+    empty       the page has no product links
+    duplicate   every product on the page was already seen in this listing
+                (sites often repeat the last page for out-of-range numbers)
+    no_next     the listing showed next links before and this page has none,
+                or there is neither a next link nor a URL to guess
+    loop        the next URL was already visited
+    max_pages   the page budget is used up
+
+The next URL is the page's own next link (same host only) when
+``follow_next`` is on, else the ``fallback`` the caller can build (e.g. the
+search URL with ``pg+1``).
+
+``state``/``from_state`` carry a listing's progress in a JSON-safe dict, so
+the next page can be handled by another worker or after a restart. Product
+URLs are kept as 64-bit digests to keep that dict small.
+"""
+from __future__ import annotations
+import hashlib
+from typing import Iterable, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+
+STOP_REASONS = ("failed", "empty", "duplicate", "no_next", "loop", "max_pages")
+
+
+def _digest(url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class Pagination:
+    def __init__(self, max_pages: int, follow_next: bool = True):
+        self.max_pages = int(max_pages)
+        self.follow_next = bool(follow_next)
+        self.had_next = False
+        self._seen: Set[int] = set()
+        self._visited: Set[str] = set()
+
+    def state(self) -> dict:
+        return {"had_next": self.had_next, "seen": sorted(self._seen), "visited": sorted(self._visited)}
+
+    @classmethod
+    def from_state(cls, max_pages: int, follow_next: bool = True, state: Optional[dict] = None) -> "Pagination":
+        pager = cls(max_pages, follow_next=follow_next)
+        if state:
+            pager.had_next = bool(state.get("had_next"))
+            pager._seen = set(state.get("seen") or ())
+            pager._visited = set(state.get("visited") or ())
+        return pager
+
+    def advance(self, url: str, page: int, product_urls: Optional[Iterable[Optional[str]]],
+                next_href: Optional[str] = None, fallback: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """
+        Record page ``page`` at ``url`` (``product_urls=None`` when it failed)
+        and return ``(next_url, "")`` or ``(None, reason)``.
+        """
+        self._visited.add(url)
+        if product_urls is None:
+            return None, "failed"
+        urls = list(product_urls)
+        if not urls:
+            return None, "empty"
+        keys = [_digest(u) for u in urls if u]
+        fresh = [u for u in keys if u not in self._seen]
+        self._seen.update(fresh)
+        if keys and not fresh:
+            return None, "duplicate"
+        if page >= self.max_pages:
+            return None, "max_pages"
+        nxt = None
+        if next_href:
+            self.had_next = True
+            if self.follow_next:
+                cand = urljoin(url, next_href)
+                if urlsplit(cand).netloc.lower() == urlsplit(url).netloc.lower():
+                    nxt = cand
+        elif self.had_next:
+            return None, "no_next"
+        nxt = nxt or fallback
+        if nxt is None:
+            return None, "no_next"
+        if nxt in self._visited:
+            return None, "loop"
+        return nxt, ""